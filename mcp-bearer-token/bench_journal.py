@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Journal store benchmark for the Quest & Rewards MCP Server
+Measures fsynced append throughput for sequential and concurrent writers (group commit), then
+snapshot size and restart time for a large user base, with and without a journal tail to replay
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from quest_journal import JournalQuestStore
+from quest_storage import UpdateOp
+
+def _user_op(i: int, version: int = 0) -> UpdateOp:
+    return UpdateOp(key=f"user_{i}", set_fields={
+        "name": f"User {i}", "total_xp": i % 5000, "daily_xp": i % 50, "streak": i % 30,
+        "last_reset_day": 20000, "created_at": 1728000000 + i, "version": version + 1,
+    }, add_to_set={"quests_completed": [f"quest_{i % 40}", f"quest_{i % 7}"]})
+
+async def bench_appends(directory: str, appends: int, concurrency: int) -> dict:
+    store = JournalQuestStore(directory, snapshot_every=10**12)
+    await store.connect()
+    queue = iter(range(appends))
+
+    async def writer():
+        for i in queue:
+            await store.bulk_write("users", [_user_op(i)])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    result = {"appends_per_s": appends / elapsed, "fsyncs": store.journal.batches,
+              "group": store.journal.records / store.journal.batches}
+    store.journal.close()
+    store._unlock()
+    return result
+
+async def bench_restart(directory: str, users: int, tail: int, chunk: int = 1000) -> dict:
+    store = JournalQuestStore(directory, snapshot_every=10**12, sync=False)
+    await store.connect()
+    start = time.perf_counter()
+    for first in range(0, users, chunk):
+        await store.bulk_write("users", [_user_op(i) for i in range(first, min(users, first + chunk))])
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    await store.close()  # final snapshot
+    write_s = time.perf_counter() - start
+    snapshot_mb = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)) / 2**20
+
+    store = JournalQuestStore(directory, snapshot_every=10**12, sync=False)
+    await store.connect()
+    for first in range(0, tail, chunk):
+        await store.bulk_write("users", [_user_op(i, version=1) for i in range(first, min(tail, first + chunk))])
+    store.journal.close()  # crash: the tail stays in the journal
+    store._unlock()
+
+    recovered = JournalQuestStore(directory)
+    start = time.perf_counter()
+    await recovered.connect()
+    restart_s = time.perf_counter() - start
+    assert len(recovered.collections["users"]) == users
+    assert tail == 0 or recovered.collections["users"]["user_0"]["version"] == 2
+    recovered.journal.close()
+    recovered._unlock()
+    return {"load_s": loaded, "write_s": write_s, "snapshot_mb": snapshot_mb, "restart_s": restart_s, **recovered.recovery}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--appends", type=int, default=2000, help="Single-user writes per throughput run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=100_000, help="User writes left in the journal after the snapshot")
+    args = parser.parse_args()
+
+    print(f"📒 Benchmarking fsynced journal appends ({args.appends:,} writes)...\n")
+    for concurrency in args.concurrency:
+        with tempfile.TemporaryDirectory() as directory:
+            result = asyncio.run(bench_appends(directory, args.appends, concurrency))
+        print(f"   • {concurrency} writer(s): {result['appends_per_s']:,.0f} appends/s, "
+              f"{result['fsyncs']:,} fsyncs ({result['group']:.1f} records each)")
+
+    print(f"\n🔁 Restarting with {args.users:,} users and a {args.tail:,}-write journal tail...\n")
+    with tempfile.TemporaryDirectory() as directory:
+        result = asyncio.run(bench_restart(directory, args.users, args.tail))
+    print(f"   • snapshot: {result['snapshot_mb']:.0f} MB written in {result['write_s']:.2f} s")
+    print(f"   • restart: {result['restart_s']:.2f} s (snapshot loaded in {result['snapshot_s']:.2f} s, "
+          f"{result['replayed_records']:,} records replayed in {result['replay_s']:.2f} s)")
+
+if __name__ == "__main__":
+    main()
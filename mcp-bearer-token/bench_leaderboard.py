@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Leaderboard benchmark for the Quest & Rewards MCP Server
+Builds a synthetic population and measures update throughput plus rank/top-N latency
+"""
+
+import argparse
+import random
+import time
+
+from quest_indexes import Leaderboard
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def run_benchmark(users: int, queries: int, max_xp: int, seed: int) -> dict:
+    """Return timings in microseconds (throughputs in ops/s)"""
+    rng = random.Random(seed)
+    board = Leaderboard()
+    user_ids = [f"user_{i}" for i in range(users)]
+
+    start = time.perf_counter()
+    for user_id in user_ids:
+        board.update(user_id, rng.randint(0, max_xp))
+    build_s = time.perf_counter() - start
+
+    # XP awards: small increments on random users, like complete_quest/review_submission
+    targets = [rng.choice(user_ids) for _ in range(queries)]
+    start = time.perf_counter()
+    for user_id in targets:
+        board.update(user_id, board.score(user_id) + rng.randint(1, 15))
+    update_s = time.perf_counter() - start
+
+    rank_us = []
+    for user_id in (rng.choice(user_ids) for _ in range(queries)):
+        t0 = time.perf_counter_ns()
+        board.rank(user_id)
+        rank_us.append((time.perf_counter_ns() - t0) / 1000)
+
+    top_us = []
+    for _ in range(min(queries, 10000)):
+        t0 = time.perf_counter_ns()
+        board.top(10)
+        top_us.append((time.perf_counter_ns() - t0) / 1000)
+
+    return {
+        "users": users,
+        "build_ops_per_s": users / build_s,
+        "update_ops_per_s": queries / update_s,
+        "rank_p50_us": _percentile(rank_us, 50),
+        "rank_p99_us": _percentile(rank_us, 99),
+        "top10_p50_us": _percentile(top_us, 50),
+        "top10_p99_us": _percentile(top_us, 99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100_000)
+    parser.add_argument("--max-xp", type=int, default=5_000, help="Upper bound of initial synthetic XP")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"🏆 Benchmarking leaderboard with {args.users:,} users...\n")
+    result = run_benchmark(args.users, args.queries, args.max_xp, args.seed)
+    print(f"   • Build: {result['build_ops_per_s']:,.0f} inserts/s")
+    print(f"   • XP updates: {result['update_ops_per_s']:,.0f} updates/s")
+    print(f"   • Rank query: p50 {result['rank_p50_us']:.1f} µs | p99 {result['rank_p99_us']:.1f} µs")
+    print(f"   • Top 10: p50 {result['top10_p50_us']:.1f} µs | p99 {result['top10_p99_us']:.1f} µs")
+
+    if result["rank_p99_us"] < 1000:
+        print("\n✅ Rank queries stay sub-millisecond")
+    else:
+        print("\n⚠️ Rank queries exceeded 1 ms at p99")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+list_quests benchmark for the Quest & Rewards MCP Server
+Compares the render-cached list_quests with per-call rendering on a large catalogue, for first
+and deep pages, checking both produce identical text, and times the first call after a new quest
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ["MONGO_URI"] = ""
+
+import quest_rewards_mcp as server
+from quest_rewards_mcp import Quest
+
+QUEST_TYPES = ["climate", "social", "personal"]
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def _render_uncached(user, quest_type, show_completed, limit=20, after=0) -> str:
+    """list_quests as it rendered before the cache, paged: a dict per quest and a fragment per shown quest per call"""
+    available_quests = []
+    position = -1  # position among quests of this type, which is what cursors count
+    for quest in server.QUESTS.values():
+        if quest_type and quest.quest_type != quest_type:
+            continue
+        position += 1
+        is_completed = quest.quest_id in user.quests_completed
+        if is_completed and not show_completed:
+            continue
+        available_quests.append({
+            "position": position,
+            "quest_id": quest.quest_id,
+            "title": quest.title,
+            "description": quest.description,
+            "xp_reward": quest.xp_reward,
+            "quest_type": quest.quest_type,
+            "is_golden": quest.is_golden,
+            "is_completed": is_completed,
+            "created_by": quest.created_by,
+        })
+    if not available_quests:
+        return "📭 **No quests found!** Create your first quest to get started! 🎯"
+    remaining = [quest for quest in available_quests if quest["position"] >= after]
+    page, rest = remaining[:limit], remaining[limit:]
+    response = f"📋 **Available Quests** ({len(available_quests)} found"
+    response += f", showing {len(page)})\n\n" if len(page) < len(available_quests) else ")\n\n"
+    for quest in page:
+        status_emoji = "✅" if quest["is_completed"] else "🎯"
+        golden_emoji = "🌟" if quest["is_golden"] else ""
+        type_emoji = {"climate": "🌱", "social": "🤝", "personal": "📚"}[quest["quest_type"]]
+        response += (
+            f"{status_emoji} **{quest['title']}** {golden_emoji}\n"
+            f"   📖 {quest['description']}\n"
+            f"   🏆 {quest['xp_reward']} XP | {type_emoji} {quest['quest_type'].title()}\n"
+            f"   🆔 `{quest['quest_id']}`\n\n"
+        )
+    if rest:
+        response += server._next_page_hint("More quests", "list_quests", rest[0]["position"], puch_user_id=user.user_id,
+                                           quest_type=quest_type, show_completed=show_completed, limit=limit)
+    return response
+
+def _make_quest(i: int, rng: random.Random) -> Quest:
+    return Quest(
+        quest_id=f"bench_quest_{i}",
+        title=f"🌟 Community quest number {i}",
+        description=f"Synthetic user-created quest {i}: do something good for {rng.choice(['people', 'the planet', 'yourself'])}",
+        xp_reward=rng.randint(1, 10),
+        quest_type=rng.choice(QUEST_TYPES),
+        is_golden=rng.random() < 0.05,
+        created_by=f"user_{rng.randint(0, 999)}",
+        created_at=server._now(),
+    )
+
+async def run_benchmark(quests: int, calls: int, limit: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    await server._startup()
+    for i in range(quests):
+        server._register_quest(_make_quest(i, rng))
+    quest_ids = list(server.QUESTS)
+
+    scenarios = []
+    for completed in (0, 20, 500):
+        user = await server._get_user(f"bench_list_{completed}")
+        for quest_id in rng.sample(quest_ids, completed):
+            user.add_to_set("quests_completed", quest_id)
+        for quest_type, show_completed in ((None, False), (None, True), ("social", False)):
+            for page_name, after in (("first page", 0), ("deep page", quests * 9 // 10 if quest_type is None else quests * 3 // 10)):
+                scenarios.append((f"{completed} done, type={quest_type or 'all'}, show_completed={show_completed}, {page_name}",
+                                  user, quest_type, show_completed, after))
+
+    results = []
+    for name, user, quest_type, show_completed, after in scenarios:
+        arguments = dict(puch_user_id=user.user_id, quest_type=quest_type, show_completed=show_completed,
+                         limit=limit, cursor=str(after))
+        cached = await server.list_quests.fn(**arguments)
+        assert cached[0].text == _render_uncached(user, quest_type, show_completed, limit, after), f"output differs: {name}"
+        timings = {"uncached": [], "cached": []}
+        for _ in range(calls):
+            start = time.perf_counter()
+            _render_uncached(user, quest_type, show_completed, limit, after)
+            timings["uncached"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            await server.list_quests.fn(**arguments)
+            timings["cached"].append(time.perf_counter() - start)
+        results.append({"scenario": name, **{
+            f"{kind}_{pct}_ms": _percentile(samples, pct) * 1000 for kind, samples in timings.items() for pct in (50, 99)
+        }})
+
+    # A new quest is rendered once and appended to the "all" and its type's views
+    user = scenarios[0][1]
+    after_create = []
+    renders_before = server.QUEST_LIST.renders
+    for i in range(calls):
+        quest = _make_quest(quests + i, rng)
+        server._register_quest(quest)
+        start = time.perf_counter()
+        await server.list_quests.fn(puch_user_id=user.user_id, limit=limit)
+        after_create.append(time.perf_counter() - start)
+    cached = await server.list_quests.fn(puch_user_id=user.user_id, limit=limit)
+    assert cached[0].text == _render_uncached(user, None, False, limit), "output differs after create_quest"
+    results.append({
+        "scenario": "first call after create_quest",
+        "cached_50_ms": _percentile(after_create, 50) * 1000,
+        "cached_99_ms": _percentile(after_create, 99) * 1000,
+        "renders_per_create": (server.QUEST_LIST.renders - renders_before) / calls,
+    })
+    await server._shutdown()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quests", type=int, default=10_000)
+    parser.add_argument("--calls", type=int, default=50, help="Timed calls per scenario")
+    parser.add_argument("--limit", type=int, default=20, help="Page size")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"📋 Benchmarking list_quests with {args.quests:,} quests, {args.limit} per page...\n")
+    results = asyncio.run(run_benchmark(args.quests, args.calls, args.limit, args.seed))
+    for result in results:
+        line = f"   • {result['scenario']}: cached p50 {result['cached_50_ms']:.2f} ms | p99 {result['cached_99_ms']:.2f} ms"
+        if "uncached_50_ms" in result:
+            line += (f" vs uncached p50 {result['uncached_50_ms']:.2f} ms | p99 {result['uncached_99_ms']:.2f} ms "
+                     f"({result['uncached_50_ms'] / result['cached_50_ms']:.0f}x)")
+        else:
+            line += f" ({result['renders_per_create']:.0f} fragment rendered per new quest)"
+        print(line)
+    print("\n✅ Cached output matches per-call rendering in every scenario")
+
+if __name__ == "__main__":
+    main()
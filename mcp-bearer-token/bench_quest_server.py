@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Load-testing benchmark for the Quest & Rewards MCP Server
+Drives the real tools through FastMCP's in-memory client with a synthetic population and
+reports throughput plus p50/p95/p99 latency per tool, optionally as JSON for comparing commits
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Offline and unthrottled: the in-memory store, no rate limits, no concurrency cap
+os.environ["MONGO_URI"] = ""
+os.environ["RATE_LIMITS"] = ""
+os.environ["MAX_CONCURRENT_CALLS"] = "1000000"
+os.environ["DAILY_RESET_SCHEDULER"] = "0"
+
+from fastmcp import Client
+
+import quest_rewards_mcp as server
+from quest_rewards_mcp import Quest
+
+QUEST_TYPES = ["climate", "social", "personal"]
+SUBMISSION_ID = re.compile(r"`([^`]+)`")
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class LoadRunner:
+    """Runs batches of tool calls with bounded concurrency and records per-tool latency"""
+
+    def __init__(self, client: Client, concurrency: int):
+        self.client = client
+        self.concurrency = concurrency
+        self.latencies: dict[str, list[float]] = {}  # tool -> seconds
+        self.errors: dict[str, int] = {}
+        self.busy_seconds: dict[str, float] = {}  # tool -> wall time of the phases it ran in
+        self.phases: dict[str, dict] = {}
+
+    async def call(self, tool: str, arguments: dict) -> str:
+        start = time.perf_counter()
+        result = await self.client.call_tool(tool, arguments, raise_on_error=False)
+        self.latencies.setdefault(tool, []).append(time.perf_counter() - start)
+        if result.is_error:
+            self.errors[tool] = self.errors.get(tool, 0) + 1
+        return result.content[0].text if result.content else ""
+
+    async def phase(self, name: str, calls: list[tuple[str, dict]]) -> list[str]:
+        """Run `calls` with `concurrency` in flight; returns the response texts in order"""
+        responses = [""] * len(calls)
+        next_call = iter(range(len(calls)))
+
+        async def worker():
+            for i in next_call:
+                responses[i] = await self.call(*calls[i])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(calls)))))
+        elapsed = time.perf_counter() - start
+        self.phases[name] = {"calls": len(calls), "seconds": elapsed, "ops_per_s": len(calls) / elapsed if elapsed else 0.0}
+        for tool in {tool for tool, _ in calls}:
+            self.busy_seconds[tool] = self.busy_seconds.get(tool, 0.0) + elapsed
+        return responses
+
+    def tool_results(self) -> dict[str, dict]:
+        results = {}
+        for tool, samples in sorted(self.latencies.items()):
+            results[tool] = {
+                "calls": len(samples),
+                "errors": self.errors.get(tool, 0),
+                "ops_per_s": len(samples) / self.busy_seconds[tool],
+                "mean_ms": sum(samples) / len(samples) * 1000,
+                "p50_ms": _percentile(samples, 50) * 1000,
+                "p95_ms": _percentile(samples, 95) * 1000,
+                "p99_ms": _percentile(samples, 99) * 1000,
+                "max_ms": max(samples) * 1000,
+            }
+        return results
+
+def _seed_auto_quests(count: int, rng: random.Random) -> list[str]:
+    """Auto-verified quests can only come from admins, so they're added directly"""
+    quest_ids = []
+    for i in range(count):
+        quest = Quest(
+            quest_id=f"bench_auto_{i}",
+            title=f"⚡ Bench quest {i}",
+            description="Auto-verified benchmark quest",
+            xp_reward=rng.randint(1, 5),
+            quest_type=rng.choice(QUEST_TYPES),
+            verification_method="auto",
+            created_by="admin",
+            created_at=server._now(),
+        )
+        server._register_quest(quest)
+        server._persist("quests", quest, new=True)
+        quest_ids.append(quest.quest_id)
+    return quest_ids
+
+async def run_benchmark(users: int, quests: int, submissions: int, ops: int, concurrency: int,
+                        store_latency_ms: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    # Refusals (daily cap, unaffordable rewards) are expected; don't time their traceback logging
+    logging.getLogger("FastMCP").setLevel(logging.CRITICAL)
+    await server._startup()
+    server.store.latency = store_latency_ms / 1000
+    try:
+        async with Client(server.mcp) as client:
+            runner = LoadRunner(client, concurrency)
+            user_ids = [f"bench_user_{i}" for i in range(users)]
+
+            await runner.phase("register_users", [
+                ("register_user", {"puch_user_id": user_id, "name": f"Bencher {i}"}) for i, user_id in enumerate(user_ids)
+            ])
+            await runner.phase("create_quests", [
+                ("create_quest", {"puch_user_id": rng.choice(user_ids), "title": f"Community quest {i}",
+                                  "description": "Synthetic manual-verification quest",
+                                  "xp_reward": rng.randint(1, 10), "quest_type": rng.choice(QUEST_TYPES)})
+                for i in range(quests)
+            ])
+            manual_quests = [quest_id for quest_id, quest in server.QUESTS.items() if quest.verification_method == "manual"]
+            auto_quests = _seed_auto_quests(max(10, quests // 10), rng)
+
+            responses = await runner.phase("submit_proofs", [
+                ("submit_proof", {"puch_user_id": rng.choice(user_ids), "quest_id": rng.choice(manual_quests),
+                                  "proof_text": "Synthetic proof"})
+                for _ in range(submissions)
+            ])
+            submission_ids = [match.group(1) for match in map(SUBMISSION_ID.search, responses) if match]
+            await runner.phase("review_submissions", [
+                ("review_submission", {"reviewer_id": "admin", "submission_id": submission_id, "approve": rng.random() < 0.8})
+                for submission_id in rng.sample(submission_ids, len(submission_ids) * 3 // 4)
+            ])
+
+            # Steady state: mostly reads, with XP awards and claims mixed in
+            mix = [
+                ("list_quests", 25, lambda user_id: {"puch_user_id": user_id}),
+                ("user_profile", 20, lambda user_id: {"puch_user_id": user_id}),
+                ("complete_quest", 20, lambda user_id: {"puch_user_id": user_id, "quest_id": rng.choice(auto_quests)}),
+                ("leaderboard", 15, lambda user_id: {"puch_user_id": user_id}),
+                ("list_rewards", 10, lambda user_id: {"puch_user_id": user_id}),
+                ("claim_reward", 5, lambda user_id: {"puch_user_id": user_id,
+                                                     "reward_id": rng.choice(list(server.REWARDS))}),
+                ("list_pending_submissions", 5, lambda user_id: {"reviewer_id": "admin"}),
+            ]
+            tools = [tool for tool, _, _ in mix]
+            weights = [weight for _, weight, _ in mix]
+            arguments = {tool: make for tool, _, make in mix}
+            await runner.phase("mixed", [
+                (tool, arguments[tool](rng.choice(user_ids))) for tool in rng.choices(tools, weights, k=ops)
+            ])
+    finally:
+        await server._shutdown()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "user_backend": server.USER_BACKEND,
+            "params": {"users": users, "quests": quests, "submissions": submissions, "ops": ops,
+                       "concurrency": concurrency, "store_latency_ms": store_latency_ms, "seed": seed},
+        },
+        "phases": runner.phases,
+        "tools": runner.tool_results(),
+    }
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print per-tool changes against a baseline run; returns the regressions beyond `tolerance` percent"""
+    regressions = []
+    print(f"\n📈 Compared with {baseline['meta'].get('commit') or 'baseline'} (tolerance {tolerance:.0f}%):")
+    if baseline["meta"].get("params") != result["meta"]["params"]:
+        print(f"   ⚠️ Baseline ran with different parameters: {baseline['meta'].get('params')}")
+    for tool, now in result["tools"].items():
+        before = baseline["tools"].get(tool)
+        if before is None:
+            print(f"   • {tool}: new")
+            continue
+        changes = {name: (now[key] / before[key] - 1) * 100 if before[key] else 0.0
+                   for name, key in (("p50", "p50_ms"), ("p95", "p95_ms"), ("ops/s", "ops_per_s"))}
+        # Latency regresses upwards, throughput downwards
+        worse = [name for name, change in changes.items() if (-change if name == "ops/s" else change) > tolerance]
+        flag = "⚠️" if worse else "✅"
+        print(f"   {flag} {tool}: p50 {changes['p50']:+.1f}% | p95 {changes['p95']:+.1f}% | ops/s {changes['ops/s']:+.1f}%")
+        regressions += [f"{tool} {name}" for name in worse]
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--quests", type=int, default=100, help="User-created (manual) quests")
+    parser.add_argument("--submissions", type=int, default=1000)
+    parser.add_argument("--ops", type=int, default=5000, help="Calls in the mixed steady-state phase")
+    parser.add_argument("--concurrency", type=int, default=32, help="Calls in flight at once")
+    parser.add_argument("--store-latency-ms", type=float, default=0.0, help="Simulated database round-trip")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Percent slowdown reported as a regression")
+    args = parser.parse_args()
+
+    print(f"🏋️ Benchmarking quest tools: {args.users:,} users, {args.quests:,} quests, "
+          f"{args.submissions:,} submissions, {args.ops:,} mixed calls x{args.concurrency}...\n")
+    result = asyncio.run(run_benchmark(args.users, args.quests, args.submissions, args.ops,
+                                       args.concurrency, args.store_latency_ms, args.seed))
+
+    for name, phase in result["phases"].items():
+        print(f"   • {name}: {phase['calls']:,} calls in {phase['seconds']:.2f}s ({phase['ops_per_s']:,.0f} ops/s)")
+    print()
+    print(f"   {'Tool':<26}{'Calls':>8}{'Errors':>8}{'ops/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for tool, stats in result["tools"].items():
+        print(f"   {tool:<26}{stats['calls']:>8,}{stats['errors']:>8,}{stats['ops_per_s']:>10,.0f}"
+              f"{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n⚠️ Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No regressions beyond tolerance")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+User memory benchmark for the Quest & Rewards MCP Server
+Compares resident memory of cached users as pydantic User models vs the compact UserTable
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+
+def _rss_bytes() -> int:
+    """Current resident set size (falls back to peak RSS off Linux)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+def _synthetic_users(count: int, seed: int):
+    """Users shaped like real ones: a few completed quests, one or two per-type counters"""
+    from quest_rewards_mcp import User
+
+    rng = random.Random(seed)
+    quest_ids = [f"quest_{i}" for i in range(200)]
+    quest_types = ["climate", "social", "personal"]
+    now = 1_750_000_000
+    for i in range(count):
+        completed = rng.sample(quest_ids, rng.randint(0, 12))
+        types = rng.sample(quest_types, rng.randint(1, 2))
+        yield User(
+            user_id=f"user_{i:08d}",
+            name=f"Adventurer_{i:08d}",
+            total_xp=rng.randint(0, 5000),
+            daily_xp=rng.randint(0, 15),
+            last_reset_day=now // 86400,
+            quests_completed=completed,
+            streak_days=rng.randint(0, 30),
+            last_quest_at=now - rng.randint(0, 86400 * 30),
+            last_quest_day=now // 86400 - rng.randint(0, 30),
+            rewards_claimed={"first_quest"} if completed else set(),
+            xp_by_type={t: rng.randint(1, 500) for t in types},
+            quest_counts={t: rng.randint(1, 10) for t in types},
+            created_at=now - rng.randint(0, 86400 * 365),
+        )
+
+def measure(backend: str, count: int, seed: int) -> dict:
+    """RSS growth from holding `count` users in the given backend (run in a fresh process)"""
+    from quest_columns import UserTable
+    import quest_rewards_mcp  # noqa: F401 -- import the server before the baseline so only users are counted
+
+    users = UserTable() if backend == "compact" else {}
+    gc.collect()
+    before = _rss_bytes()
+    for user in _synthetic_users(count, seed):
+        users[user.user_id] = user
+    del user
+    gc.collect()
+    after = _rss_bytes()
+    return {"backend": backend, "users": count, "rss_bytes": after - before, "bytes_per_user": (after - before) / count}
+
+def _run_child(backend: str, count: int, seed: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", backend, "--users", str(count), "--seed", str(seed)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--backends", nargs="+", default=["model", "compact"], choices=["model", "compact"])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--child", choices=["model", "compact"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.users[0], args.seed)))
+        return
+
+    print("🧠 Benchmarking user memory (each run in a fresh process)...\n")
+    for count in args.users:
+        results = {backend: _run_child(backend, count, args.seed) for backend in args.backends}
+        for backend, result in results.items():
+            print(f"   • {count:,} users | {backend:<7} | {result['rss_bytes'] / 2**20:,.1f} MiB "
+                  f"({result['bytes_per_user']:,.0f} B/user)")
+        if len(results) == 2:
+            ratio = results["model"]["rss_bytes"] / max(results["compact"]["rss_bytes"], 1)
+            print(f"   ✅ compact uses {ratio:.1f}x less memory at {count:,} users\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+# Shared test setup for the Quest & Rewards MCP Server
+# The server's locks, write buffer and journals bind to the event loop they first run on, and pytest
+# imports every test file into one process, so all tests drive one loop through run(). Test files
+# import run() from here too, which keeps them runnable as plain scripts.
+
+import asyncio
+import sys
+
+import pytest
+
+LOOP = asyncio.new_event_loop()
+
+def run(coro):
+    """Run a coroutine to completion on the shared test loop"""
+    return LOOP.run_until_complete(coro)
+
+@pytest.fixture(scope="session", autouse=True)
+def shutdown_server():
+    """Flush and stop the quest server after the last test, if any test loaded it"""
+    yield
+    server = sys.modules.get("quest_rewards_mcp")
+    if server is not None:
+        run(server._shutdown())
@@ -0,0 +1,140 @@
+# Opt-in sampling profiler shared by the MCP servers in this directory
+# Profiles a fraction of tool calls and aggregates their stacks per tool as collapsed stacks
+# ("tool;frame;frame <count>"), the input of flamegraph.pl, speedscope and inferno.
+#
+#   PROFILE_SAMPLE_RATE=0.05   profile 5% of tool calls (0, the default, disables profiling)
+#   PROFILE_INTERVAL_MS=5      stack sampling interval
+#   PROFILE_DIR=profiles       where dumps go: on SIGUSR1, at exit, or via PROFILER.dump()
+
+import atexit
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from fastmcp import FastMCP
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+class StackSampler:
+    """Samples the Python stacks of profiled tool calls from a background thread
+
+    Tool calls run as coroutines on the event loop thread. While a profiled call is
+    executing (not awaiting I/O), its frames hang below the middleware frame that started
+    it, so each sample walks up from the running frame to that frame and charges the
+    stack to its tool. The result is on-CPU time; waiting on the database costs nothing.
+    The thread sleeps while no profiled call is active.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: dict[str, Counter] = {}  # tool -> collapsed stack -> samples
+        self.calls: Counter = Counter()  # tool -> profiled calls
+        self._active: dict = {}  # middleware frame -> (tool, thread id)
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, frame, tool: str) -> None:
+        self._active[frame] = (tool, threading.get_ident())
+        self.calls[tool] += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mcp-profiler", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def end(self, frame) -> None:
+        self._active.pop(frame, None)
+        if not self._active:
+            self._wake.clear()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            self.sample()
+
+    def sample(self) -> None:
+        """Record one stack for every thread currently executing a profiled call"""
+        active = dict(self._active)
+        if not active:
+            return
+        current = sys._current_frames()
+        for thread_id in {thread_id for _, thread_id in active.values()}:
+            frame = current.get(thread_id)
+            labels = []
+            while frame is not None and frame not in active:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if frame is None or not labels:
+                continue  # this thread is running something else right now
+            tool = active[frame][0]
+            labels.append(tool)
+            with self._lock:
+                self.stacks.setdefault(tool, Counter())[";".join(reversed(labels))] += 1
+
+    def collapsed(self, tool: Optional[str] = None) -> str:
+        with self._lock:
+            tools = [tool] if tool else sorted(self.stacks)
+            lines = [f"{stack} {count}" for name in tools for stack, count in sorted(self.stacks.get(name, {}).items())]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stacks.clear()
+            self.calls.clear()
+
+    def dump(self, directory: str | os.PathLike) -> list[Path]:
+        """Write `<tool>.collapsed` per tool plus `all.collapsed`; returns the files written"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        for name in [*sorted(self.stacks), None]:
+            path = directory / f"{name or 'all'}.collapsed"
+            path.write_text(self.collapsed(name))
+            written.append(path)
+        return written
+
+class ProfilerMiddleware(Middleware):
+    """Profiles a random `sample_rate` fraction of tool calls with a StackSampler"""
+
+    def __init__(self, sampler: StackSampler, sample_rate: float):
+        self.sampler = sampler
+        self.sample_rate = sample_rate
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        if random.random() >= self.sample_rate:
+            return await call_next(context)
+        frame = sys._getframe()
+        self.sampler.begin(frame, context.message.name)
+        try:
+            return await call_next(context)
+        finally:
+            self.sampler.end(frame)
+
+def install_profiler(mcp: FastMCP) -> Optional[StackSampler]:
+    """Enable profiling on `mcp` when PROFILE_SAMPLE_RATE > 0; returns the sampler or None"""
+    sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+    if sample_rate <= 0:
+        return None
+    sampler = StackSampler(interval=float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000)
+    directory = os.environ.get("PROFILE_DIR", "profiles")
+    mcp.add_middleware(ProfilerMiddleware(sampler, min(sample_rate, 1.0)))
+
+    def dump(*_):
+        paths = sampler.dump(directory)
+        print(f"🔥 Wrote {len(paths)} collapsed stack files to {directory}/")
+
+    atexit.register(lambda: sampler.calls and dump())
+    if hasattr(signal, "SIGUSR1"):  # not available on Windows
+        signal.signal(signal.SIGUSR1, dump)
+    print(f"🔥 Profiling {sample_rate:.0%} of tool calls (kill -USR1 {os.getpid()} to dump to {directory}/)")
+    return sampler
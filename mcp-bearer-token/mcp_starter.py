@@ -9,6 +9,8 @@ from mcp.server.auth.provider import AccessToken
 from mcp.types import TextContent, ImageContent, INVALID_PARAMS, INTERNAL_ERROR
 from pydantic import BaseModel, Field, AnyUrl
 
+from mcp_profiler import install_profiler
+
 import markdownify
 import httpx
 import readabilipy
@@ -122,6 +124,7 @@ mcp = FastMCP(
     "Job Finder MCP Server",
     auth=SimpleBearerAuthProvider(TOKEN),
 )
+install_profiler(mcp)  # no-op unless PROFILE_SAMPLE_RATE is set
 
 # --- Tool: validate (required by Puch) ---
 @mcp.tool
@@ -14,6 +14,8 @@ from mcp import ErrorData, McpError
 from mcp.types import TextContent, INVALID_PARAMS, INTERNAL_ERROR
 from pydantic import Field, BaseModel  # <-- add BaseModel
 
+from mcp_profiler import install_profiler
+
 # --- Env ---
 load_dotenv()
 TOKEN = os.environ.get("AUTH_TOKEN")
@@ -43,6 +45,7 @@ mcp = FastMCP(
     "Task Management MCP Server",
     auth=SimpleBearerAuthProvider(TOKEN),
 )
+install_profiler(mcp)  # no-op unless PROFILE_SAMPLE_RATE is set
 
 # since its a starter, we can use an in memory dict as a db
 TASKS: dict[str, dict[str, dict]] = {}
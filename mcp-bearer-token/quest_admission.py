@@ -0,0 +1,103 @@
+# Admission control for the Quest & Rewards MCP Server
+# Per-user token buckets for every tool plus a global cap on concurrent tool calls.
+
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from mcp import ErrorData, McpError
+
+# JSON-RPC implementation-defined server error, the code FastMCP's own rate limiter uses
+RATE_LIMITED = -32000
+
+def parse_rate_limits(spec: str) -> dict[str, tuple[float, float]]:
+    """Parse "tool:count/seconds,..." into {tool: (burst, tokens_per_second)}; "*" covers other tools"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        tool, _, rate = item.partition(":")
+        count, _, seconds = rate.partition("/")
+        limits[tool.strip()] = (float(count), float(count) / float(seconds))
+    return limits
+
+class TokenBucketLimiter:
+    """Token buckets keyed by (tool, user), kept only while they are refilling
+
+    A bucket left idle long enough to refill completely is the same as a new one, so it
+    is dropped after that time: memory stays O(recently active users). Buckets are kept
+    in last-use order, so eviction only ever pops from the front.
+    """
+
+    def __init__(self, limits: dict[str, tuple[float, float]], clock: Callable[[], float] = time.monotonic):
+        self.limits = limits
+        self.clock = clock
+        self._buckets: OrderedDict[tuple[str, str], tuple[float, float]] = OrderedDict()  # -> (tokens, updated_at)
+        self._idle_after = max((burst / rate for burst, rate in limits.values()), default=0.0)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, tool: str, user_id: str) -> float:
+        """Take a token; returns 0 if the call may proceed, else seconds until a token is available"""
+        limit = self.limits.get(tool, self.limits.get("*"))
+        if limit is None:
+            return 0.0
+        burst, rate = limit
+        now = self.clock()
+        self._evict_idle(now)
+        key = (tool, user_id)
+        bucket = self._buckets.pop(key, None)
+        tokens = burst if bucket is None else min(burst, bucket[0] + (now - bucket[1]) * rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / rate
+
+    def _evict_idle(self, now: float) -> None:
+        while self._buckets:
+            key, (_, updated_at) = next(iter(self._buckets.items()))
+            if now - updated_at < self._idle_after:
+                break
+            del self._buckets[key]
+
+class AdmissionMiddleware(Middleware):
+    """Sheds tool calls beyond `max_concurrent` in flight, then applies per-user rate limits
+
+    Rejections are immediate MCP errors carrying `retry_after` seconds, so overload never
+    turns into an unbounded queue of waiting calls.
+    """
+
+    def __init__(self, limiter: TokenBucketLimiter, max_concurrent: int,
+                 user_args: tuple[str, ...] = ("puch_user_id", "reviewer_id")):
+        self.limiter = limiter
+        self.max_concurrent = max_concurrent
+        self.user_args = user_args
+        self.active = 0
+        self.rejected = 0
+
+    def _user_id(self, arguments: dict) -> Optional[str]:
+        for name in self.user_args:
+            if arguments.get(name):
+                return str(arguments[name])
+        return None
+
+    def _reject(self, message: str, retry_after: float) -> McpError:
+        self.rejected += 1
+        return McpError(ErrorData(code=RATE_LIMITED, message=message, data={"retry_after": round(retry_after, 1)}))
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool = context.message.name
+        if self.active >= self.max_concurrent:
+            raise self._reject(f"🚦 Server is busy ({self.active} calls in progress), please retry shortly", 1.0)
+        user_id = self._user_id(context.message.arguments or {})
+        if user_id is not None:
+            retry_after = self.limiter.acquire(tool, user_id)
+            if retry_after:
+                raise self._reject(f"⏳ Too many {tool} calls, try again in {math.ceil(retry_after)}s", retry_after)
+        self.active += 1
+        try:
+            return await call_next(context)
+        finally:
+            self.active -= 1
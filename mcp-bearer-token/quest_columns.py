@@ -0,0 +1,406 @@
+# Compact column-oriented user storage for the Quest & Rewards MCP Server
+# Selected with USER_BACKEND=compact. Instead of one pydantic User per user, every field
+# lives in a shared column indexed by row, and _get_user hands out lightweight views.
+
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Callable, Iterator, Optional
+
+from quest_storage import UpdateOp
+
+# --- Interning ---
+class InternTable:
+    """Maps repeated strings (quest IDs, reward IDs, quest types) to small integers"""
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._values: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def intern(self, value: str) -> int:
+        i = self._ids.get(value)
+        if i is None:
+            i = self._ids[value] = len(self._values)
+            self._values.append(value)
+        return i
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self._ids.get(value)
+
+    def value(self, i: int) -> str:
+        return self._values[i]
+
+# --- Column Views ---
+class InternedSet:
+    """Set-like view of a row's interned string column, kept sorted by id for bisect lookups"""
+    __slots__ = ("_user", "_column")
+
+    def __init__(self, user: "CompactUser", column: str):
+        self._user = user
+        self._column = column
+
+    def _items(self) -> Optional[array]:
+        return self._user._table._sets[self._column][self._user._live()]
+
+    def __contains__(self, value: object) -> bool:
+        items = self._items()
+        if items is None or not isinstance(value, str):
+            return False
+        i = self._user._table._interns[self._column].lookup(value)
+        if i is None:
+            return False
+        pos = bisect_left(items, i)
+        return pos < len(items) and items[pos] == i
+
+    def __len__(self) -> int:
+        items = self._items()
+        return 0 if items is None else len(items)
+
+    def __iter__(self) -> Iterator[str]:
+        intern = self._user._table._interns[self._column]
+        return (intern.value(i) for i in self._items() or ())
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+class InternedCounter:
+    """Dict-like view of a row's {interned string: int} column, stored as flat key/value pairs"""
+    __slots__ = ("_user", "_column")
+
+    def __init__(self, user: "CompactUser", column: str):
+        self._user = user
+        self._column = column
+
+    @property
+    def _table(self) -> "UserTable":
+        return self._user._table
+
+    def _pairs(self) -> Optional[array]:
+        return self._table._counters[self._column][self._user._live()]
+
+    def _slot(self, key: str) -> int:
+        """Index of `key` in the pair array, or -1"""
+        pairs = self._pairs()
+        i = self._table._interns[self._column].lookup(key)
+        if pairs is None or i is None:
+            return -1
+        for slot in range(0, len(pairs), 2):
+            if pairs[slot] == i:
+                return slot
+        return -1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        slot = self._slot(key)
+        return default if slot < 0 else self._pairs()[slot + 1]
+
+    def __getitem__(self, key: str) -> int:
+        slot = self._slot(key)
+        if slot < 0:
+            raise KeyError(key)
+        return self._pairs()[slot + 1]
+
+    def __setitem__(self, key: str, value: int) -> None:
+        slot = self._slot(key)
+        if slot >= 0:
+            self._pairs()[slot + 1] = value
+            return
+        column, row = self._table._counters[self._column], self._user._live()
+        if column[row] is None:
+            column[row] = array("q")
+        column[row].extend((self._table._interns[self._column].intern(key), value))
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._slot(key) >= 0
+
+    def __len__(self) -> int:
+        pairs = self._pairs()
+        return 0 if pairs is None else len(pairs) // 2
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, _ in self.items())
+
+    def items(self) -> Iterator[tuple[str, int]]:
+        pairs = self._pairs() or ()
+        intern = self._table._interns[self._column]
+        return ((intern.value(pairs[i]), pairs[i + 1]) for i in range(0, len(pairs), 2))
+
+    def values(self) -> Iterator[int]:
+        return (value for _, value in self.items())
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+# --- User Table ---
+_NULL = -1  # stored for None in nullable integer columns
+
+INT_FIELDS = ("total_xp", "daily_xp", "streak_days", "last_reset_day", "last_quest_at", "last_quest_day", "created_at", "version")
+NULLABLE_FIELDS = frozenset({"last_quest_at", "last_quest_day"})
+SET_FIELDS = ("quests_completed", "rewards_claimed")
+COUNTER_FIELDS = ("xp_by_type", "xp_by_program", "quest_counts")
+ALL_FIELDS = ("user_id", "name", *INT_FIELDS, *SET_FIELDS, *COUNTER_FIELDS)
+
+class UserTable:
+    """Users stored across typed columns, with the same get/set interface as the USERS LRU
+
+    Integer fields live in `array('q')` columns, quest and reward IDs are interned into
+    small integers, and per-type counters are flat key/value arrays, so a user costs
+    on the order of a hundred bytes instead of a pydantic model with several containers.
+    Like LRUCache, the table holds at most `maxsize` users and evicts the least recently
+    used one not pinned by `pinned(user_id)`. Rows of evicted or popped users go on a free
+    list for the next user; each reuse bumps the row's generation, so a view still held
+    for the old user raises LookupError instead of reading someone else's data.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, pinned: Optional[Callable[[str], bool]] = None):
+        self.maxsize = maxsize
+        self.pinned = pinned
+        self._rows: OrderedDict[str, int] = OrderedDict()
+        self._free: list[int] = []
+        self._gens = array("I")
+        self._ids: list[str] = []
+        self._names: list[str] = []
+        self._ints = {name: array("q") for name in INT_FIELDS}
+        # Quest and reward IDs are shared across sets; counter keys (types, programs) across counters
+        quest_ids, reward_ids, counter_keys = InternTable(), InternTable(), InternTable()
+        self._interns = {
+            "quests_completed": quest_ids, "rewards_claimed": reward_ids,
+            **{name: counter_keys for name in COUNTER_FIELDS},
+        }
+        self._sets: dict[str, list[Optional[array]]] = {name: [] for name in SET_FIELDS}
+        self._counters: dict[str, list[Optional[array]]] = {name: [] for name in COUNTER_FIELDS}
+        # Change tracking only exists for rows with unpersisted edits
+        self._dirty: dict[int, set[str]] = {}
+        self._added: dict[int, dict[str, list]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, user_id: object) -> bool:
+        return user_id in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def _view(self, row: int) -> "CompactUser":
+        return CompactUser(self, row, self._gens[row])
+
+    def get(self, user_id: str, default: Any = None) -> Any:
+        row = self._rows.get(user_id)
+        if row is None:
+            return default
+        self._rows.move_to_end(user_id)
+        return self._view(row)
+
+    def __getitem__(self, user_id: str) -> "CompactUser":
+        self._rows.move_to_end(user_id)
+        return self._view(self._rows[user_id])
+
+    def __setitem__(self, user_id: str, user: Any) -> None:
+        """Store a User model (or any object with the same attributes) in the columns"""
+        row = self._rows.get(user_id)
+        if row is None:
+            row = self._rows[user_id] = self._allocate(user_id)
+        self._rows.move_to_end(user_id)
+        view = self._view(row)
+        for name in ALL_FIELDS[1:]:
+            setattr(view, name, getattr(user, name))
+        self._dirty.pop(row, None)
+        self._added.pop(row, None)
+        self._evict(keep=user_id)
+
+    def pop(self, user_id: str, default: Any = None) -> Any:
+        """Remove a user and free its row; returns the user's fields as a dict, since the row is reused"""
+        row = self._rows.pop(user_id, None)
+        if row is None:
+            return default
+        fields = self._view(row).model_dump()
+        self._release(row)
+        return fields
+
+    def values(self) -> Iterator["CompactUser"]:
+        return (self._view(row) for row in self._rows.values())
+
+    def items(self) -> Iterator[tuple[str, "CompactUser"]]:
+        return ((user_id, self._view(row)) for user_id, row in self._rows.items())
+
+    # --- Row Allocation ---
+    def _allocate(self, user_id: str) -> int:
+        if self._free:
+            row = self._free.pop()
+            self._ids[row] = user_id
+            return row
+        self._ids.append(user_id)
+        self._names.append("")
+        self._gens.append(0)
+        for name in INT_FIELDS:
+            self._ints[name].append(_NULL)
+        for column in (*self._sets.values(), *self._counters.values()):
+            column.append(None)
+        return len(self._ids) - 1
+
+    def _release(self, row: int) -> None:
+        """Clear a row and put it on the free list; existing views of it go stale"""
+        self._ids[row] = self._names[row] = ""
+        for name in INT_FIELDS:
+            self._ints[name][row] = _NULL
+        for column in (*self._sets.values(), *self._counters.values()):
+            column[row] = None
+        self._dirty.pop(row, None)
+        self._added.pop(row, None)
+        self._gens[row] += 1
+        self._free.append(row)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        # Same policy as LRUCache._evict: pinned users and the one just stored are skipped
+        if self.maxsize is None:
+            return
+        attempts = len(self._rows)
+        while len(self._rows) > self.maxsize and attempts > 0:
+            attempts -= 1
+            user_id = next(iter(self._rows))
+            if user_id == keep or (self.pinned is not None and self.pinned(user_id)):
+                self._rows.move_to_end(user_id)
+                continue
+            self._release(self._rows.pop(user_id))
+
+def _int_column(name: str) -> property:
+    nullable = name in NULLABLE_FIELDS
+
+    def fget(self):
+        value = self._table._ints[name][self._live()]
+        return None if nullable and value == _NULL else value
+
+    def fset(self, value):
+        self._table._ints[name][self._live()] = _NULL if value is None else value
+        self._touch(name)
+    return property(fget, fset)
+
+def _set_column(name: str) -> property:
+    def fget(self):
+        return InternedSet(self, name)
+
+    def fset(self, values):
+        intern = self._table._interns[name]
+        ids = array("I", sorted({intern.intern(value) for value in values}))
+        self._table._sets[name][self._live()] = ids or None
+        self._touch(name)
+    return property(fget, fset)
+
+def _counter_column(name: str) -> property:
+    def fget(self):
+        return InternedCounter(self, name)
+
+    def fset(self, mapping):
+        intern = self._table._interns[name]
+        pairs = array("q")
+        for key, value in dict(mapping).items():
+            pairs.extend((intern.intern(key), value))
+        self._table._counters[name][self._live()] = pairs or None
+        self._touch(name)
+    return property(fget, fset)
+
+class CompactUser:
+    """View of one UserTable row with the attribute and change-tracking API of a User model"""
+    __slots__ = ("_table", "_row", "_gen")
+
+    def __init__(self, table: UserTable, row: int, gen: int):
+        self._table = table
+        self._row = row
+        self._gen = gen
+
+    def _live(self) -> int:
+        """The view's row, checked to still belong to this user"""
+        if self._table._gens[self._row] != self._gen:
+            raise LookupError("user view used after its row was evicted")
+        return self._row
+
+    def __eq__(self, other: object) -> bool:
+        return (isinstance(other, CompactUser) and other._table is self._table
+                and (other._row, other._gen) == (self._row, self._gen))
+
+    def __hash__(self) -> int:
+        return hash((id(self._table), self._row, self._gen))
+
+    @property
+    def user_id(self) -> str:
+        return self._table._ids[self._live()]
+
+    @property
+    def name(self) -> str:
+        return self._table._names[self._live()]
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self._table._names[self._live()] = value
+        self._touch("name")
+
+    def _touch(self, name: str) -> None:
+        self._table._dirty.setdefault(self._live(), set()).add(name)
+
+    def add_to_set(self, name: str, value: str) -> bool:
+        """Add to a set column, recording only the new element for persistence"""
+        row = self._live()
+        column = self._table._sets[name]
+        i = self._table._interns[name].intern(value)
+        items = column[row]
+        if items is None:
+            items = column[row] = array("I")
+        pos = bisect_left(items, i)
+        if pos < len(items) and items[pos] == i:
+            return False
+        items.insert(pos, i)
+        if name not in self._table._dirty.get(row, ()):
+            self._table._added.setdefault(row, {}).setdefault(name, []).append(value)
+        return True
+
+    def mark_dirty(self, *names: str) -> None:
+        """Flag columns mutated in place (e.g. counters) for the next persist"""
+        self._table._dirty.setdefault(self._live(), set()).update(names)
+
+    def mark_all_dirty(self) -> None:
+        row = self._live()
+        self._table._dirty[row] = set(ALL_FIELDS)
+        self._table._added.pop(row, None)
+
+    def _dump(self, name: str) -> Any:
+        value = getattr(self, name)
+        if isinstance(value, InternedSet):
+            return list(value)
+        if isinstance(value, InternedCounter):
+            return dict(value.items())
+        return value
+
+    def pop_changes(self, key: str) -> UpdateOp:
+        """Return the pending changes as an UpdateOp (conditional on the loaded version) and start tracking afresh"""
+        row = self._live()
+        dirty = self._table._dirty.pop(row, set())
+        added = self._table._added.pop(row, {})
+        expect_version = None
+        if dirty or added:
+            versions = self._table._ints["version"]
+            expect_version = versions[row]
+            versions[row] += 1
+            dirty.add("version")
+        return UpdateOp(
+            key=key,
+            set_fields={name: self._dump(name) for name in dirty},
+            add_to_set={name: values for name, values in added.items() if name not in dirty},
+            expect_version=expect_version,
+        )
+
+    def model_dump(self) -> dict:
+        return {name: self._dump(name) for name in ALL_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"CompactUser({self.model_dump()!r})"
+
+for _name in INT_FIELDS:
+    setattr(CompactUser, _name, _int_column(_name))
+for _name in SET_FIELDS:
+    setattr(CompactUser, _name, _set_column(_name))
+for _name in COUNTER_FIELDS:
+    setattr(CompactUser, _name, _counter_column(_name))
+del _name
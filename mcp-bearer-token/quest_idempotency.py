@@ -0,0 +1,93 @@
+# Idempotency keys for the Quest & Rewards MCP Server
+# Retried tool calls carrying the same key replay the first response instead of repeating work.
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+from quest_storage import LRUCache, QuestStore, WriteBehindBuffer
+
+class KeyReuseError(ValueError):
+    """An idempotency key was presented again with different arguments"""
+
+class IdempotencyCache:
+    """Remembers tool responses by idempotency key for `ttl` seconds
+
+    Recent keys live in a bounded in-memory LRU; every response is also written to the
+    `idempotency` collection (expired by a TTL index, or by the server's sweep on local stores)
+    so replays survive restarts and cache eviction. Concurrent duplicates wait for the first
+    call rather than running again.
+    Only successful responses are remembered, so a call that failed can be retried.
+    """
+
+    def __init__(self, store: QuestStore, write_buffer: WriteBehindBuffer, ttl: float = 3600, maxsize: int = 10000,
+                 clock: Callable[[], float] = time.time):
+        self.store = store
+        self.write_buffer = write_buffer
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = LRUCache(maxsize)  # key -> (expires_at, fingerprint, response)
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, fingerprint: str, call: Callable[[], Awaitable[list[str]]]) -> list[str]:
+        """Return the stored response for `key`, or run `call` once and store its response"""
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            stored_fingerprint, response = await asyncio.shield(pending)
+            return self._check(stored_fingerprint, fingerprint, response)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            stored = await self._lookup(key)
+            if stored is None:
+                response = await call()
+                stored = (fingerprint, response)
+                self._remember(key, fingerprint, response)
+            future.set_result(stored)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self._in_flight[key]
+        return self._check(stored[0], fingerprint, stored[1])
+
+    @staticmethod
+    def _check(stored_fingerprint: str, fingerprint: str, response: list[str]) -> list[str]:
+        if stored_fingerprint != fingerprint:
+            raise KeyReuseError("idempotency_key was already used with different arguments")
+        return response
+
+    async def _lookup(self, key: str) -> Optional[tuple[str, list[str]]]:
+        now = self.clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, fingerprint, response = entry
+            if expires_at > now:
+                return fingerprint, response
+            self._entries.pop(key)
+            return None
+        doc = await self.store.get("idempotency", key)
+        if doc is None:
+            return None
+        expires_at = doc["expires_at"]
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at.timestamp() <= now:
+            return None  # the TTL index removes it eventually
+        self._entries[key] = (expires_at.timestamp(), doc["fingerprint"], doc["response"])
+        return doc["fingerprint"], doc["response"]
+
+    def _remember(self, key: str, fingerprint: str, response: list[str]) -> None:
+        expires_at = self.clock() + self.ttl
+        self._entries[key] = (expires_at, fingerprint, response)
+        self.write_buffer.stage_fields("idempotency", key, set_fields={
+            "fingerprint": fingerprint,
+            "response": response,
+            "expires_at": datetime.fromtimestamp(expires_at, timezone.utc),
+        })
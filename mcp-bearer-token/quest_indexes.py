@@ -0,0 +1,483 @@
+# In-memory secondary indexes for the Quest & Rewards MCP Server
+# Each index is maintained incrementally by the tools that mutate the underlying data.
+
+import asyncio
+import bisect
+import heapq
+import math
+import re
+from typing import Any, AsyncIterator, Callable, Iterable, Mapping, Optional, Set
+
+from quest_storage import LRUCache
+
+# --- Submission Index ---
+class SubmissionIndex:
+    """(user_id, quest_id) -> {submission_id: status}, loaded per user on first lookup
+
+    `loader(user_id)` yields that user's submission documents, oldest state first;
+    later documents for the same submission_id override earlier ones.
+    """
+
+    def __init__(self, loader: Callable[[str], AsyncIterator[dict]], max_users: int = 10000):
+        self.loader = loader
+        self._users = LRUCache(max_users)
+        self._loading: dict[str, asyncio.Future] = {}
+
+    def record(self, user_id: str, quest_id: str, submission_id: str, status: str) -> None:
+        """Apply a submission create/review to an already-loaded user slice"""
+        by_quest = self._users.get(user_id)
+        if by_quest is not None:
+            by_quest.setdefault(quest_id, {})[submission_id] = status
+
+    async def statuses(self, user_id: str, quest_id: str) -> set[str]:
+        return set((await self.submissions(user_id, quest_id)).values())
+
+    async def submissions(self, user_id: str, quest_id: str) -> dict[str, str]:
+        """{submission_id: status} of one user's submissions for one quest"""
+        by_quest = self._users.get(user_id)
+        if by_quest is None or user_id in self._loading:  # a visible slice may still be filling
+            by_quest = await self._load(user_id)
+        return dict(by_quest.get(quest_id, {}))
+
+    async def _load(self, user_id: str) -> dict[str, dict[str, str]]:
+        pending = self._loading.get(user_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._loading[user_id] = future
+        # Slice is visible immediately so record() calls made during the load win over stale store data
+        by_quest: dict[str, dict[str, str]] = {}
+        self._users[user_id] = by_quest
+        try:
+            loaded: dict[str, tuple[str, str]] = {}
+            async for doc in self.loader(user_id):
+                loaded[doc["submission_id"]] = (doc["quest_id"], doc["status"])
+            for submission_id, (quest_id, status) in loaded.items():
+                by_quest.setdefault(quest_id, {}).setdefault(submission_id, status)
+            future.set_result(by_quest)
+        except asyncio.CancelledError:
+            self._users.pop(user_id)
+            future.cancel()
+            raise
+        except Exception as e:
+            self._users.pop(user_id)
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self._loading[user_id]
+        return by_quest
+
+# --- Pending Review Queue ---
+class PendingQueue:
+    """Oldest-first queue of pending submissions with O(log n) cursor seeks
+
+    Entries are appended in arrival order and removed lazily (tombstoned); a head
+    pointer skips the reviewed prefix, so a page costs a bisect plus the entries it
+    returns rather than a scan of all history. Cursors are sequence numbers and stay
+    valid while entries before them are reviewed.
+    """
+
+    def __init__(self):
+        self._seqs: list[int] = []
+        self._keys: list[str] = []
+        self._items: list[object] = []
+        self._live: dict[str, int] = {}
+        self._head = 0
+        self._next_seq = 1
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._live
+
+    def add(self, key: str, item: object) -> None:
+        if key in self._live:
+            return
+        seq = self._next_seq
+        self._next_seq += 1
+        self._seqs.append(seq)
+        self._keys.append(key)
+        self._items.append(item)
+        self._live[key] = seq
+
+    def remove(self, key: str) -> None:
+        if self._live.pop(key, None) is None:
+            return
+        while self._head < len(self._seqs) and not self._is_live(self._head):
+            self._head += 1
+        if len(self._seqs) > 1024 and len(self._live) < len(self._seqs) // 2:
+            self._compact()
+
+    def _is_live(self, i: int) -> bool:
+        return self._live.get(self._keys[i]) == self._seqs[i]
+
+    def _compact(self) -> None:
+        kept = [i for i in range(self._head, len(self._seqs)) if self._is_live(i)]
+        self._seqs = [self._seqs[i] for i in kept]
+        self._keys = [self._keys[i] for i in kept]
+        self._items = [self._items[i] for i in kept]
+        self._head = 0
+
+    def page(self, after: int = 0, limit: int = 20,
+             accept: Callable[[object], bool] = lambda item: True,
+             stop: Callable[[object], bool] = lambda item: False) -> tuple[list[object], int | None]:
+        """Return up to `limit` live items after cursor `after` and the cursor for the next page
+
+        `stop(item)` ends the scan early (e.g. once items are newer than an age cutoff).
+        """
+        results: list[object] = []
+        i = max(self._head, bisect.bisect_right(self._seqs, after))
+        while i < len(self._seqs):
+            if self._is_live(i):
+                item = self._items[i]
+                if stop(item):
+                    return results, None
+                if accept(item):
+                    results.append(item)
+                    if len(results) == limit:
+                        return results, self._seqs[i] if i + 1 < len(self._seqs) else None
+            i += 1
+        return results, None
+
+# --- Reward Threshold Ladder ---
+class RewardLadder:
+    """Reward IDs sorted by xp_required, so unlock checks bisect instead of scanning every reward"""
+
+    def __init__(self):
+        self._entries: list[tuple[int, str]] = []
+        self._thresholds: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, reward_id: str, xp_required: int) -> None:
+        self.remove(reward_id)
+        bisect.insort(self._entries, (xp_required, reward_id))
+        self._thresholds[reward_id] = xp_required
+
+    def remove(self, reward_id: str) -> None:
+        xp_required = self._thresholds.pop(reward_id, None)
+        if xp_required is not None:
+            i = bisect.bisect_left(self._entries, (xp_required, reward_id))
+            del self._entries[i]
+
+    def between(self, low: int, high: int) -> list[str]:
+        """Reward IDs with low < xp_required <= high (crossed going from `low` to `high` XP), cheapest first"""
+        lo = bisect.bisect_left(self._entries, (low + 1,))
+        hi = bisect.bisect_left(self._entries, (high + 1,))
+        return [reward_id for _, reward_id in self._entries[lo:hi]]
+
+    def split(self, xp: int) -> tuple[list[str], list[str]]:
+        """(reward IDs unlocked at `xp`, reward IDs still locked), cheapest first"""
+        i = bisect.bisect_left(self._entries, (xp + 1,))
+        return [r for _, r in self._entries[:i]], [r for _, r in self._entries[i:]]
+
+# --- Leaderboard ---
+class Leaderboard:
+    """Incrementally maintained ranking of users by an integer score
+
+    A Fenwick tree over score values counts users per score, so "my rank" is
+    O(log max_score). Users with equal scores share a rank and are listed in the
+    order they reached that score; top-N walks the distinct scores downward.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._scores: dict[str, int] = {}
+        self._buckets: dict[int, dict[str, None]] = {}
+        self._distinct: list[int] = []
+        self._tree = [0] * (capacity + 1)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, user_id: object) -> bool:
+        return user_id in self._scores
+
+    def score(self, user_id: str) -> int | None:
+        return self._scores.get(user_id)
+
+    def _tree_add(self, score: int, delta: int) -> None:
+        i = score + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _grow(self, needed: int) -> None:
+        size = len(self._tree) - 1
+        while size < needed:
+            size *= 2
+        self._tree = [0] * (size + 1)
+        for score, bucket in self._buckets.items():
+            i = score + 1
+            while i < len(self._tree):
+                self._tree[i] += len(bucket)
+                i += i & -i
+
+    def _count_at_most(self, score: int) -> int:
+        i = min(score + 1, len(self._tree) - 1)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def update(self, user_id: str, score: int) -> None:
+        """Set a user's score (scores must be >= 0)"""
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._discard(user_id, old)
+        if score + 1 >= len(self._tree):
+            self._grow(score + 1)
+        self._scores[user_id] = score
+        bucket = self._buckets.get(score)
+        if bucket is None:
+            bucket = self._buckets[score] = {}
+            bisect.insort(self._distinct, score)
+        bucket[user_id] = None
+        self._tree_add(score, 1)
+
+    def add_if_absent(self, user_id: str, score: int) -> None:
+        """Bulk-load helper that never overwrites a score set by a live update"""
+        if user_id not in self._scores:
+            self.update(user_id, score)
+
+    def remove(self, user_id: str) -> None:
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            self._discard(user_id, old)
+
+    def _discard(self, user_id: str, score: int) -> None:
+        bucket = self._buckets[score]
+        del bucket[user_id]
+        if not bucket:
+            del self._buckets[score]
+            del self._distinct[bisect.bisect_left(self._distinct, score)]
+        self._tree_add(score, -1)
+
+    def rank(self, user_id: str) -> int | None:
+        """1-based competition rank (ties share a rank), or None if the user is unranked"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return len(self._scores) - self._count_at_most(score) + 1
+
+    def top(self, n: int, offset: int = 0) -> list[tuple[str, int]]:
+        """(user_id, score) pairs for ranks offset+1 .. offset+n"""
+        results: list[tuple[str, int]] = []
+        skipped = 0
+        for score in reversed(self._distinct):
+            bucket = self._buckets[score]
+            if skipped + len(bucket) <= offset:
+                skipped += len(bucket)
+                continue
+            for user_id in bucket:
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                results.append((user_id, score))
+                if len(results) == n:
+                    return results
+        return results
+
+# --- Quest Search ---
+# Runs of letters/digits in any script; emoji, punctuation and underscores separate tokens
+_WORD = re.compile(r"[^\W_]+")
+
+def tokenize(text: str) -> list[str]:
+    return _WORD.findall(text.casefold())
+
+class SearchIndex:
+    """Incrementally maintained inverted index with BM25 ranking
+
+    Each document has a title and a body; title terms count `title_weight` times. A query
+    term also matches longer words it prefixes ("plant" finds "planting"), scored at
+    `prefix_weight`, using a sorted vocabulary so expansion is a bisect rather than a scan.
+    Adding a document again replaces it, so updates never need a rebuild.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, title_weight: int = 3, prefix_weight: float = 0.5, min_prefix: int = 3, max_expansions: int = 50):
+        self.title_weight = title_weight
+        self.prefix_weight = prefix_weight
+        self.min_prefix = min_prefix
+        self.max_expansions = max_expansions
+        self._postings: dict[str, dict[str, int]] = {}  # term -> {doc_id: weighted term frequency}
+        self._vocabulary: list[str] = []  # sorted terms, for prefix expansion
+        self._doc_terms: dict[str, tuple[str, ...]] = {}
+        self._doc_length: dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._doc_terms
+
+    def add(self, doc_id: str, title: str, body: str = "") -> None:
+        self.remove(doc_id)
+        frequencies: dict[str, int] = {}
+        for term in tokenize(title):
+            frequencies[term] = frequencies.get(term, 0) + self.title_weight
+        for term in tokenize(body):
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._vocabulary, term)
+            postings[doc_id] = frequency
+        length = sum(frequencies.values())
+        self._doc_terms[doc_id] = tuple(frequencies)
+        self._doc_length[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_length.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+
+    def _expand(self, term: str) -> list[tuple[str, float]]:
+        """The term itself plus up to `max_expansions` longer words it prefixes"""
+        matches = [(term, 1.0)] if term in self._postings else []
+        if len(term) >= self.min_prefix:
+            i = bisect.bisect_right(self._vocabulary, term)
+            while i < len(self._vocabulary) and len(matches) < self.max_expansions and self._vocabulary[i].startswith(term):
+                matches.append((self._vocabulary[i], self.prefix_weight))
+                i += 1
+        return matches
+
+    def search(self, query: str, limit: int = 10, accept: Optional[Callable[[str], bool]] = None) -> list[tuple[str, float]]:
+        """Best `limit` (doc_id, score) pairs for `query`, highest score first; `accept` filters doc_ids"""
+        if not self._doc_terms:
+            return []
+        n = len(self._doc_terms)
+        average_length = self._total_length / n
+        scores: dict[str, float] = {}
+        for query_term in dict.fromkeys(tokenize(query)):
+            # A document scores once per query term, through its best-matching expansion
+            best: dict[str, float] = {}
+            for term, weight in self._expand(query_term):
+                postings = self._postings[term]
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.K1 * (1 - self.B + self.B * self._doc_length[doc_id] / average_length)
+                    score = weight * idf * frequency * (self.K1 + 1) / (frequency + norm)
+                    if score > best.get(doc_id, 0.0):
+                        best[doc_id] = score
+            for doc_id, score in best.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+        candidates = scores.items() if accept is None else ((d, s) for d, s in scores.items() if accept(d))
+        return heapq.nlargest(limit, candidates, key=lambda item: item[1])
+
+# --- Rendered Catalogue Views ---
+class RenderedView:
+    """One group's rendered fragments in catalogue order, paged and joined into responses"""
+    __slots__ = ("position", "keys", "fragments", "entries")
+
+    def __init__(self, fragments: list[tuple[str, str]], entries: int):
+        self.position = {key: i for i, (key, _) in enumerate(fragments)}
+        self.keys = [key for key, _ in fragments]
+        self.fragments = [fragment for _, fragment in fragments]
+        self.entries = entries  # catalogue size when last synced, to notice changes made behind touch()
+
+    def __len__(self) -> int:
+        return len(self.fragments)
+
+    def append(self, key: str, fragment: str) -> None:
+        self.position[key] = len(self.fragments)
+        self.keys.append(key)
+        self.fragments.append(fragment)
+
+    def positions(self, keys: Iterable[str]) -> list[int]:
+        """Sorted positions of those `keys` that are in this view"""
+        return sorted({self.position[key] for key in keys if key in self.position})
+
+    def page(self, start: int, limit: int, skip: Set[int] = frozenset()) -> tuple[list[int], Optional[int]]:
+        """Up to `limit` positions from `start` on, leaving out `skip`, and where the next page starts"""
+        page, i = [], start
+        while i < len(self.fragments) and len(page) < limit:
+            if i not in skip:
+                page.append(i)
+            i += 1
+        while i in skip:
+            i += 1
+        return page, i if i < len(self.fragments) else None
+
+    def join(self, positions: Iterable[int], head: str = "", marked: Set[int] = frozenset(),
+             old: str = "", new: str = "") -> str:
+        """`head` and the fragments at `positions`, those in `marked` starting with `new` instead of `old`"""
+        parts = [head]
+        for i in positions:
+            fragment = self.fragments[i]
+            parts.append(new + fragment[len(old):] if i in marked else fragment)
+        return "".join(parts)
+
+class RenderCache:
+    """Per-entry rendered fragments and per-group RenderedViews over a live catalogue mapping
+
+    A fragment is rendered once per entry revision; `touch(key)` (called whenever an entry is
+    added or edited) bumps the revision. A new entry is appended to the views it belongs to;
+    an edit or removal drops the views, and rebuilding re-joins the other cached fragments.
+    """
+
+    def __init__(self, entries: Mapping[str, Any], group: Callable[[Any], str], render: Callable[[Any], str]):
+        self.entries = entries
+        self.group = group
+        self.render = render
+        self.renders = 0
+        self._revisions: dict[str, int] = {}
+        self._fragments: dict[str, tuple[int, str]] = {}
+        self._views: dict[Optional[str], RenderedView] = {}
+
+    def touch(self, key: str) -> None:
+        added = key not in self._fragments
+        self._revisions[key] = self._revisions.get(key, 0) + 1
+        entry = self.entries.get(key)
+        if entry is None:
+            self._fragments.pop(key, None)
+        # Mappings keep insertion order, so a new entry is the last one
+        if not (added and entry is not None and next(reversed(self.entries)) == key):
+            self._views.clear()  # the entry may have moved, changed group or left
+            return
+        group = self.group(entry)
+        for view_group, view in list(self._views.items()):
+            if view.entries != len(self.entries) - 1 or key in view.position:
+                del self._views[view_group]
+                continue
+            if view_group is None or view_group == group:
+                view.append(key, self._fragment(key, entry))
+            view.entries += 1
+
+    def view(self, group: Optional[str] = None) -> RenderedView:
+        """Fragments of the entries in `group` (None: every entry), in catalogue order"""
+        view = self._views.get(group)
+        if view is None or view.entries != len(self.entries):
+            if view is not None:
+                self._views.clear()
+            fragments = [(key, self._fragment(key, entry)) for key, entry in self.entries.items()
+                         if group is None or self.group(entry) == group]
+            view = self._views[group] = RenderedView(fragments, len(self.entries))
+        return view
+
+    def _fragment(self, key: str, entry: Any) -> str:
+        revision = self._revisions.get(key, 0)
+        cached = self._fragments.get(key)
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+        fragment = self.render(entry)
+        self.renders += 1
+        self._fragments[key] = (revision, fragment)
+        return fragment
@@ -0,0 +1,348 @@
+# Append-only journal persistence for the Quest & Rewards MCP Server
+# A durable local mode without MongoDB: the in-memory store, plus a write-ahead journal with
+# group-commit fsync and periodic snapshots that bound how much journal a restart replays.
+
+import asyncio
+import gc
+import logging
+import mmap
+import os
+import pickle
+import re
+import struct
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from quest_storage import TTL_INDEXES, MemoryQuestStore, UpdateOp
+
+if os.name != "nt":
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+# Each journal record is framed as (payload length, CRC32 of payload) then a pickled tuple
+_FRAME = struct.Struct("<II")
+_SEGMENT = re.compile(r"journal-(\d+)\.log$")
+_SNAPSHOT = re.compile(r"snapshot-(\d+)\.pickle$")
+# Held with flock while a store has the directory open, so two servers never share a journal
+_LOCK_FILE = "LOCK"
+
+def _fsync_directory(directory: str) -> None:
+    """Make renames and newly created files in `directory` durable"""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class Journal:
+    """Append-only log segments with group commit
+
+    Records appended while a write+fsync is in progress share the next one, so concurrent
+    writers pay for one fsync per batch rather than one each. A record's `apply` callback
+    runs only after it is durable, in journal order, and its result resolves the future
+    returned by append(); replaying the journal therefore reproduces the same state.
+    """
+
+    def __init__(self, directory: str, segment: int, sync: bool = True):
+        self.directory = directory
+        self.segment = segment
+        self.sync = sync
+        self.records = 0  # appended since the journal was opened
+        self.batches = 0  # write+fsync rounds, so records / batches is the mean group size
+        self._fd = self._open(segment)
+        self._pending: list[tuple[bytes, Callable[[], Any], asyncio.Future]] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self.after_batch: Optional[Callable[[], None]] = None
+
+    def path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"journal-{segment:08d}.log")
+
+    def _open(self, segment: int) -> int:
+        fd = os.open(self.path(segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0), 0o644)
+        _fsync_directory(self.directory)
+        return fd
+
+    def append(self, record: tuple, apply: Callable[[], Any]) -> asyncio.Future:
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((_FRAME.pack(len(payload), zlib.crc32(payload)) + payload, apply, future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush())
+        return future
+
+    async def _flush(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._write, b"".join(frame for frame, _, _ in batch))
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.records += len(batch)
+            self.batches += 1
+            for _, apply, future in batch:
+                # Applied even if the caller stopped waiting: the record is on disk either way
+                try:
+                    result = apply()
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            if self.after_batch is not None:
+                self.after_batch()
+
+    def _write(self, data: bytes) -> None:
+        offset = os.lseek(self._fd, 0, os.SEEK_END)
+        try:
+            os.write(self._fd, data)
+            if self.sync:
+                os.fsync(self._fd)
+        except OSError:
+            # Never leave a half-written batch for recovery to replay
+            os.ftruncate(self._fd, offset)
+            raise
+
+    async def drain(self) -> None:
+        """Wait until every appended record is durable and applied"""
+        while self._flusher is not None and not self._flusher.done():
+            await self._flusher
+
+    def rotate(self) -> int:
+        """Start a new segment (call between batches); returns the segment just closed"""
+        closed = self.segment
+        os.close(self._fd)
+        self.segment += 1
+        self._fd = self._open(self.segment)
+        return closed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+def read_segment(path: str) -> tuple[list[tuple], int]:
+    """Decode a segment's records; returns them and the offset where valid data ends"""
+    records: list[tuple] = []
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return records, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            while offset + _FRAME.size <= size:
+                length, crc = _FRAME.unpack_from(data, offset)
+                end = offset + _FRAME.size + length
+                if end > size:
+                    break
+                payload = data[offset + _FRAME.size:end]
+                if zlib.crc32(payload) != crc:
+                    break
+                records.append(pickle.loads(payload))
+                offset = end
+    return records, offset
+
+class JournalQuestStore(MemoryQuestStore):
+    """In-memory store made durable by a write-ahead journal and periodic snapshots
+
+    Every mutation is journaled and fsynced (grouped across concurrent writers) before it is
+    applied and acknowledged. After `snapshot_every` records the collections are copied between
+    journal batches and pickled to a snapshot in a worker thread, so the server keeps serving.
+    Recovery loads the newest snapshot and replays the journal segments written after it. An
+    exclusive flock on the directory's LOCK file keeps a second server process from opening
+    the same journal.
+    """
+
+    def __init__(self, directory: str, snapshot_every: int = 100_000, sync: bool = True):
+        super().__init__()
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.sync = sync
+        self.journal: Optional[Journal] = None
+        self.recovery: dict[str, float] = {}
+        self._since_snapshot = 0
+        self._seen_records = 0
+        self._snapshotting: Optional[asyncio.Task] = None
+        self._lock_fd: Optional[int] = None
+
+    # --- Directory Lock ---
+    def _lock(self) -> None:
+        """Claim the directory, failing fast if another process already has it open"""
+        if os.name == "nt":
+            return
+        fd = os.open(os.path.join(self.directory, _LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            raise RuntimeError(f"Journal directory {self.directory} is in use by another server process; "
+                               "stop it or set a different JOURNAL_DIR") from None
+        self._lock_fd = fd
+
+    def _unlock(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # closing the descriptor releases the flock
+            self._lock_fd = None
+
+    # --- Recovery ---
+    def _files(self, pattern: re.Pattern) -> list[tuple[int, str]]:
+        found = [(int(m.group(1)), os.path.join(self.directory, name))
+                 for name in os.listdir(self.directory) if (m := pattern.match(name))]
+        return sorted(found)
+
+    async def connect(self) -> None:
+        if self.journal is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock()
+        # Millions of new dicts would trigger collection after collection while nothing is garbage yet
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            next_segment = self._recover()
+        except BaseException:
+            self._unlock()
+            raise
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        self.journal = Journal(self.directory, next_segment, sync=self.sync)
+        self.journal.after_batch = self._maybe_snapshot
+
+    def _recover(self) -> int:
+        """Load the newest snapshot and replay the journal after it; returns the next segment number"""
+        start = time.perf_counter()
+        first_segment = 0
+        snapshots = self._files(_SNAPSHOT)
+        if snapshots:
+            first_segment, path = snapshots[-1]
+            with open(path, "rb") as f:
+                self.collections = pickle.load(f)
+        loaded = time.perf_counter()
+
+        segments = [(n, path) for n, path in self._files(_SEGMENT) if n >= first_segment]
+        replayed = 0
+        for i, (n, path) in enumerate(segments):
+            records, valid_to = read_segment(path)
+            for record in records:
+                self._replay(record)
+            replayed += len(records)
+            if valid_to < os.path.getsize(path):
+                if i != len(segments) - 1:
+                    raise RuntimeError(f"Journal segment {path} is corrupt at byte {valid_to}")
+                # A crash mid-append leaves a torn tail; it was never acknowledged
+                logger.warning("Truncating torn journal tail of %s at byte %d", path, valid_to)
+                os.truncate(path, valid_to)
+        self._since_snapshot, self._seen_records = replayed, 0
+        self.recovery = {"snapshot_s": loaded - start, "replay_s": time.perf_counter() - loaded,
+                         "replayed_records": replayed, "documents": sum(map(len, self.collections.values()))}
+        return max([first_segment] + [n + 1 for n, _ in segments])
+
+    def _replay(self, record: tuple) -> Any:
+        kind, collection, *args = record
+        if kind == "upsert":
+            return self._apply_upsert(collection, *args)
+        if kind == "update_many":
+            return self._apply_update_many(collection, *args)
+        if kind == "expire":
+            return self._apply_expire(collection, *args)
+        if kind == "bulk_write":
+            return self._apply_bulk_write(collection, [UpdateOp(key, set_fields, add_to_set, set(unset), expect_version)
+                                                       for key, set_fields, add_to_set, unset, expect_version in args[0]])
+        raise ValueError(f"Unknown journal record {kind!r}")
+
+    # --- Journaled Mutations ---
+    async def _journaled(self, record: tuple) -> Any:
+        await self.connect()
+        return await self.journal.append(record, lambda: self._replay(record))
+
+    async def upsert(self, collection: str, key: str, fields: dict[str, Any]) -> None:
+        await self._journaled(("upsert", collection, key, fields))
+
+    async def update_many(self, collection: str, query: dict, set_fields: Optional[dict] = None, inc: Optional[dict] = None) -> int:
+        return await self._journaled(("update_many", collection, query, set_fields, inc))
+
+    async def bulk_write(self, collection: str, ops: list[UpdateOp]) -> list[str]:
+        if not ops:
+            return []
+        rows = [(op.key, op.set_fields, op.add_to_set, sorted(op.unset), op.expect_version) for op in ops]
+        return await self._journaled(("bulk_write", collection, rows))
+
+    async def delete_expired(self, now: datetime) -> int:
+        # Journaled with its cutoff, so replay deletes exactly what was deleted live
+        await self.connect()
+        removed = 0
+        for collection, date_field in TTL_INDEXES.items():
+            if self._has_expired(collection, date_field, now):
+                removed += await self._journaled(("expire", collection, date_field, now))
+        return removed
+
+    # --- Snapshots ---
+    def _snapshot_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"snapshot-{segment:08d}.pickle")
+
+    def _write_snapshot(self, segment: int, collections: dict[str, dict[str, dict]]) -> None:
+        """Write `collections` as snapshot `segment`, covering every journal segment before it"""
+        path = self._snapshot_path(segment)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(collections, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        _fsync_directory(self.directory)
+
+    def _prune(self, segment: int) -> None:
+        """Delete snapshots and journal segments made redundant by snapshot `segment`"""
+        for pattern in (_SNAPSHOT, _SEGMENT):
+            for n, path in self._files(pattern):
+                if n < segment:
+                    os.remove(path)
+        for name in os.listdir(self.directory):
+            if name.endswith(".pickle.tmp"):  # left by a snapshot that crashed part-way
+                os.remove(os.path.join(self.directory, name))
+
+    def _maybe_snapshot(self) -> None:
+        # Runs between journal batches, so the collections match the end of the closed segment
+        self._since_snapshot += self.journal.records - self._seen_records
+        self._seen_records = self.journal.records
+        if self._since_snapshot < self.snapshot_every or (self._snapshotting and not self._snapshotting.done()):
+            return
+        self._since_snapshot = 0
+        segment = self.journal.rotate() + 1
+        # Documents are replaced, never edited, on write, so copying each collection's key -> document
+        # map is enough for a consistent image; later writes don't touch the documents it refers to
+        image = {name: dict(docs) for name, docs in self.collections.items()}
+        self._snapshotting = asyncio.get_running_loop().create_task(self._snapshot(segment, image))
+
+    async def _snapshot(self, segment: int, image: dict[str, dict[str, dict]]) -> None:
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._write_snapshot, segment, image)
+            await asyncio.to_thread(self._prune, segment)
+            logger.info("Wrote journal snapshot %d in %.2fs", segment, time.perf_counter() - start)
+        except Exception:
+            # The journal still holds everything, so a failed snapshot only delays compaction
+            logger.exception("Journal snapshot %d failed", segment)
+
+    async def close(self) -> None:
+        """Drain the journal and compact it into a final snapshot"""
+        if self.journal is None:
+            return
+        await self.journal.drain()
+        if self._snapshotting is not None:
+            await self._snapshotting
+        journal, self.journal = self.journal, None
+        journal.close()
+        try:
+            if self._since_snapshot + journal.records - self._seen_records:
+                # Written inline: nothing may change the collections while the final image is taken
+                self._write_snapshot(journal.segment + 1, self.collections)
+                self._prune(journal.segment + 1)
+        finally:
+            self._unlock()
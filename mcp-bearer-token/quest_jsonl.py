@@ -0,0 +1,88 @@
+# Streaming JSONL import/export for the Quest & Rewards MCP Server
+# Documents move in fixed-size chunks, so memory stays flat however large a collection is.
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional, TextIO
+
+from pydantic import BaseModel, ValidationError
+
+from quest_storage import KEY_FIELDS, QuestStore, UpdateOp
+
+# Rows per validation batch and bulk upsert
+CHUNK_SIZE = 1000
+# Invalid rows listed in an ImportReport; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    rejected: int = 0
+    errors: list[str] = field(default_factory=list)  # "line N: reason" for the first rejected rows
+
+    def reject(self, line_number: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line_number}: {reason}")
+
+async def export_jsonl(store: QuestStore, collection: str, out: TextIO, query: Optional[dict] = None,
+                       chunk_size: int = CHUNK_SIZE) -> int:
+    """Write every matching document to `out`, one JSON object per line; returns how many"""
+    count = 0
+    async for doc in store.find(collection, query):
+        out.write(json.dumps(doc, ensure_ascii=False, separators=(",", ":"), default=str))
+        out.write("\n")
+        count += 1
+        if count % chunk_size == 0:
+            await asyncio.sleep(0)  # in-memory finds never yield; let other requests run
+    return count
+
+def _validate(model: type[BaseModel], line: str) -> BaseModel:
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON ({e.msg})")
+    if not isinstance(data, dict):
+        raise ValueError("not a JSON object")
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        error = e.errors()[0]
+        raise ValueError(f"{'.'.join(map(str, error['loc'])) or 'document'}: {error['msg']}")
+
+async def import_jsonl(store: QuestStore, collection: str, lines: Iterable[str], model: type[BaseModel],
+                       chunk_size: int = CHUNK_SIZE,
+                       on_chunk: Optional[Callable[[list[BaseModel]], None]] = None) -> ImportReport:
+    """Validate JSONL documents against `model` and upsert them, one bulk_write per chunk
+
+    Invalid rows are reported and skipped rather than failing the import. Each written chunk
+    is passed to `on_chunk` so a running server can refresh its in-memory indexes.
+    """
+    key_field = KEY_FIELDS[collection]
+    report = ImportReport()
+    chunk: dict[str, BaseModel] = {}  # a key repeated within a chunk keeps its last row
+
+    async def write() -> None:
+        models = list(chunk.values())
+        chunk.clear()
+        ops = [UpdateOp(key=getattr(item, key_field), set_fields=item.model_dump(mode="json")) for item in models]
+        await store.bulk_write(collection, ops)
+        report.imported += len(models)
+        if on_chunk is not None:
+            on_chunk(models)
+
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = _validate(model, line)
+        except ValueError as e:
+            report.reject(line_number, str(e))
+            continue
+        chunk[getattr(item, key_field)] = item
+        if len(chunk) >= chunk_size:
+            await write()
+    if chunk:
+        await write()
+    return report
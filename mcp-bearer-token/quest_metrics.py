@@ -0,0 +1,188 @@
+# Runtime metrics for the Quest & Rewards MCP Server
+# Per-tool call/error counts and latency histograms plus per-operation store timings,
+# rendered in Prometheus text format. Recording is a counter bump and a bisect per call.
+
+import bisect
+import time
+from typing import Callable
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+from quest_storage import TTL_INDEXES, QuestStore
+
+# Latency bucket upper bounds in seconds (Prometheus `le` labels)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket (like histogram_quantile)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                low = self.bounds[i - 1] if i > 0 else 0.0
+                if i == len(self.bounds):
+                    return low  # +Inf bucket: the best bound we know
+                return low + (self.bounds[i] - low) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+class Metrics:
+    """Registry of tool and store measurements plus callback gauges"""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.tool_calls: dict[str, int] = {}
+        self.tool_errors: dict[str, int] = {}
+        self.tool_latency: dict[str, Histogram] = {}
+        self.store_errors: dict[tuple[str, str], int] = {}
+        self.store_latency: dict[tuple[str, str], Histogram] = {}
+        self._gauges: list[tuple[str, str, str, Callable[[], float]]] = []
+        self.started_at = time.time()
+
+    def observe_tool(self, tool: str, seconds: float, error: bool) -> None:
+        self.tool_calls[tool] = self.tool_calls.get(tool, 0) + 1
+        if error:
+            self.tool_errors[tool] = self.tool_errors.get(tool, 0) + 1
+        histogram = self.tool_latency.get(tool)
+        if histogram is None:
+            histogram = self.tool_latency[tool] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def observe_store(self, op: str, collection: str, seconds: float, error: bool) -> None:
+        key = (op, collection)
+        if error:
+            self.store_errors[key] = self.store_errors.get(key, 0) + 1
+        histogram = self.store_latency.get(key)
+        if histogram is None:
+            histogram = self.store_latency[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float], kind: str = "gauge") -> None:
+        """Register a value read at render time (queue depths, cache sizes, ...)"""
+        self._gauges.append((name, help_text, kind, read))
+
+    def gauge_values(self) -> dict[str, float]:
+        return {name: read() for name, _, _, read in self._gauges}
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = [
+            "# HELP quest_tool_calls_total Tool calls by tool",
+            "# TYPE quest_tool_calls_total counter",
+            *(f"quest_tool_calls_total{{{_labels(tool=tool)}}} {count}" for tool, count in sorted(self.tool_calls.items())),
+            "# HELP quest_tool_errors_total Tool calls that raised an error",
+            "# TYPE quest_tool_errors_total counter",
+            *(f"quest_tool_errors_total{{{_labels(tool=tool)}}} {count}" for tool, count in sorted(self.tool_errors.items())),
+        ]
+        lines += self._render_histograms("quest_tool_latency_seconds", "Tool call latency",
+                                         {_labels(tool=tool): h for tool, h in sorted(self.tool_latency.items())})
+        lines += [
+            "# HELP quest_store_errors_total Storage operations that raised an error",
+            "# TYPE quest_store_errors_total counter",
+            *(f"quest_store_errors_total{{{_labels(op=op, collection=collection)}}} {count}"
+              for (op, collection), count in sorted(self.store_errors.items())),
+        ]
+        lines += self._render_histograms("quest_store_latency_seconds", "Storage operation latency",
+                                         {_labels(op=op, collection=collection): h
+                                          for (op, collection), h in sorted(self.store_latency.items())})
+        for name, help_text, kind, read in self._gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {read()}"]
+        return "\n".join(lines) + "\n"
+
+    def _render_histograms(self, name: str, help_text: str, histograms: dict[str, Histogram]) -> list[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, histogram in histograms.items():
+            cumulative = 0
+            for bound, count in zip((*histogram.bounds, "+Inf"), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return lines
+
+class MetricsMiddleware(Middleware):
+    """Times every tool call; calls that raise (including rejected ones) count as errors"""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        start = time.perf_counter()
+        error = True
+        try:
+            result = await call_next(context)
+            error = bool(getattr(result, "isError", False))
+            return result
+        finally:
+            self.metrics.observe_tool(context.message.name, time.perf_counter() - start, error)
+
+def instrument_store(store: QuestStore, metrics: Metrics) -> QuestStore:
+    """Time every storage operation of `store` in place (the store keeps its identity and attributes)"""
+    def timed(op: str, method):
+        async def wrapper(collection: str, *args, **kwargs):
+            start = time.perf_counter()
+            error = True
+            try:
+                result = await method(collection, *args, **kwargs)
+                error = False
+                return result
+            finally:
+                metrics.observe_store(op, collection, time.perf_counter() - start, error)
+        return wrapper
+
+    def timed_find(method):
+        async def wrapper(collection: str, *args, **kwargs):
+            # Measured until the caller stops iterating, so it covers every batch fetched
+            start = time.perf_counter()
+            error = True
+            try:
+                async for doc in method(collection, *args, **kwargs):
+                    yield doc
+                error = False
+            except GeneratorExit:
+                error = False
+                raise
+            finally:
+                metrics.observe_store("find", collection, time.perf_counter() - start, error)
+        return wrapper
+
+    def timed_expiry(method):
+        # One sweep covers every TTL collection, so it is reported under all of them at once
+        collections = ",".join(TTL_INDEXES)
+
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            error = True
+            try:
+                result = await method(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                metrics.observe_store("delete_expired", collections, time.perf_counter() - start, error)
+        return wrapper
+
+    for op in ("get", "upsert", "update_many", "bulk_write"):
+        setattr(store, op, timed(op, getattr(store, op)))
+    store.find = timed_find(store.find)
+    store.delete_expired = timed_expiry(store.delete_expired)
+    return store
@@ -1,12 +1,15 @@
 # Quest & Rewards MCP Server for Puch AI
 # A gamified quest system with XP, rewards, and fun challenges!
 
+import argparse
 import asyncio
-from typing import Annotated, Optional, Literal, List
-import os, uuid, json
-from datetime import datetime, timedelta
+from typing import Annotated, Callable, Optional, Literal, List, Set
+import os, sys, uuid, json
+import functools
+import inspect
+import time
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from pymongo import MongoClient
 import random
 
 from fastmcp import FastMCP
@@ -14,7 +17,19 @@ from fastmcp.server.auth.providers.bearer import BearerAuthProvider, RSAKeyPair
 from mcp.server.auth.provider import AccessToken
 from mcp import ErrorData, McpError
 from mcp.types import TextContent, INVALID_PARAMS, INTERNAL_ERROR
-from pydantic import Field, BaseModel
+from pydantic import Field, BaseModel, model_validator
+
+from quest_storage import LRUCache, QuestStore, StripedLocks, TrackedModel, WriteBehindBuffer, make_store
+from quest_indexes import Leaderboard, PendingQueue, RenderCache, RewardLadder, SearchIndex, SubmissionIndex, tokenize
+from quest_columns import UserTable
+from quest_idempotency import IdempotencyCache, KeyReuseError
+from quest_admission import AdmissionMiddleware, TokenBucketLimiter, parse_rate_limits
+from quest_metrics import Metrics, MetricsMiddleware, instrument_store
+from quest_jsonl import export_jsonl, import_jsonl
+from quest_verifier import ImageHashIndex, ProofVerifier, VerificationPool, default_checks
+from mcp_profiler import install_profiler
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
 # --- Environment Setup ---
 load_dotenv()
@@ -23,6 +38,28 @@ MY_NUMBER = os.environ.get("MY_NUMBER", "919876543210")
 REVIEW_TOKEN = os.environ.get("REVIEW_TOKEN", TOKEN)
 MONGO_URI = os.environ.get("MONGO_URI")
 MONGO_DB = os.environ.get("MONGO_DB", "ecohero")
+# Without MONGO_URI, journal every write to this directory so data survives restarts
+JOURNAL_DIR = os.environ.get("JOURNAL_DIR")
+JOURNAL_SNAPSHOT_EVERY = int(os.environ.get("JOURNAL_SNAPSHOT_EVERY", "100000"))
+WRITE_BEHIND_MS = int(os.environ.get("WRITE_BEHIND_MS", "50"))
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "10000"))
+SUBMISSION_CACHE_SIZE = int(os.environ.get("SUBMISSION_CACHE_SIZE", "10000"))
+USER_BACKEND = os.environ.get("USER_BACKEND", "model")  # "model" or "compact"
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "3600"))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", "10000"))
+# Per-user limits as "tool:count/seconds"; "*" applies to every other tool
+RATE_LIMITS = os.environ.get("RATE_LIMITS", "submit_proof:10/60,create_quest:20/3600,*:120/60")
+MAX_CONCURRENT_CALLS = int(os.environ.get("MAX_CONCURRENT_CALLS", "256"))
+DAILY_RESET_SCHEDULER = os.environ.get("DAILY_RESET_SCHEDULER", "0") == "1"
+# Who may call import_collection/export_collection (comma-separated ids; unset disables them)
+ADMIN_IDS = {admin_id.strip() for admin_id in os.environ.get("ADMIN_IDS", "").split(",") if admin_id.strip()}
+# Directory the import/export tools read and write JSONL files in
+JSONL_DIR = os.environ.get("JSONL_DIR", "data")
+# Background checks of proof URLs submitted to "auto" quests
+VERIFY_WORKERS = int(os.environ.get("VERIFY_WORKERS", "4"))
+VERIFY_QUEUE_SIZE = int(os.environ.get("VERIFY_QUEUE_SIZE", "1000"))
+VERIFY_TIMEOUT_SECONDS = float(os.environ.get("VERIFY_TIMEOUT_SECONDS", "5"))
+VERIFY_ALLOW_PRIVATE_URLS = os.environ.get("VERIFY_ALLOW_PRIVATE_URLS", "0") == "1"
 
 # --- Auth Provider (matches starter kit behavior) ---
 class SimpleBearerAuthProvider(BearerAuthProvider):
@@ -46,20 +83,87 @@ mcp = FastMCP(
     "Quest & Rewards MCP Server",
     auth=SimpleBearerAuthProvider(TOKEN),
 )
+# Tool and storage latencies, served on /metrics and by server_stats
+METRICS = Metrics()
+mcp.add_middleware(MetricsMiddleware(METRICS))
+# Flooding clients get a clear MCP error instead of degrading everyone else
+ADMISSION = AdmissionMiddleware(TokenBucketLimiter(parse_rate_limits(RATE_LIMITS)), max_concurrent=MAX_CONCURRENT_CALLS)
+mcp.add_middleware(ADMISSION)
+# Opt-in sampled stack profiles of admitted calls (PROFILE_SAMPLE_RATE)
+PROFILER = install_profiler(mcp)
+
+# --- Time Model ---
+# User timestamps are UTC epoch seconds and day boundaries are epoch days (seconds // 86400),
+# so the per-call daily reset check is an integer comparison rather than ISO parsing.
+SECONDS_PER_DAY = 86400
+
+# Source of the current UTC epoch time for all quest logic; swapped by set_clock() so
+# simulations and tests can replay weeks of activity without waiting for them
+_clock: Callable[[], float] = time.time
+
+def set_clock(clock: Callable[[], float]) -> None:
+    global _clock
+    _clock = clock
+
+def _epoch_seconds() -> int:
+    return int(_clock())
+
+def _epoch_day(ts: Optional[int] = None) -> int:
+    return (_epoch_seconds() if ts is None else ts) // SECONDS_PER_DAY
+
+def _iso(ts: float) -> str:
+    """Naive UTC ISO timestamp, the format quests, submissions and claims are stored with"""
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat()
+
+def _parse_iso(value: str) -> int:
+    """Epoch seconds for a legacy ISO timestamp (naive values are UTC)"""
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+# Fields written by older versions of User, replaced by the epoch fields above
+LEGACY_USER_TIME_FIELDS = ["last_daily_reset", "last_quest_date"]
 
 # --- Data Models ---
-class User(BaseModel):
+class User(TrackedModel):
     user_id: str
     name: str
     total_xp: int = 0
     daily_xp: int = 0
-    last_daily_reset: str
+    last_reset_day: int  # epoch day daily_xp was last reset
     quests_completed: List[str] = []
     streak_days: int = 0
-    last_quest_date: Optional[str] = None
-    created_at: str
+    last_quest_at: Optional[int] = None  # epoch seconds
+    last_quest_day: Optional[int] = None  # epoch day
+    rewards_claimed: Set[str] = set()
+    xp_by_type: dict[str, int] = {}
+    xp_by_program: dict[str, int] = {}
+    quest_counts: dict[str, int] = {}  # completions per quest_type
+    created_at: int  # epoch seconds
+    version: int = 0  # bumped on every persisted change; writes are conditional on it
 
-class Quest(BaseModel):
+    @model_validator(mode="before")
+    @classmethod
+    def _migrate_iso_timestamps(cls, data):
+        """Accept documents stored with ISO-string timestamps"""
+        if not isinstance(data, dict):
+            return data
+        if not any(name in data for name in LEGACY_USER_TIME_FIELDS) and not isinstance(data.get("created_at"), str):
+            return data
+        data = dict(data)
+        last_reset = data.pop("last_daily_reset", None)
+        if last_reset and "last_reset_day" not in data:
+            data["last_reset_day"] = _epoch_day(_parse_iso(last_reset))
+        last_quest = data.pop("last_quest_date", None)
+        if last_quest and "last_quest_at" not in data:
+            data["last_quest_at"] = _parse_iso(last_quest)
+            data["last_quest_day"] = _epoch_day(data["last_quest_at"])
+        if isinstance(data.get("created_at"), str):
+            data["created_at"] = _parse_iso(data["created_at"])
+        return data
+
+class Quest(TrackedModel):
     quest_id: str
     title: str
     description: str
@@ -71,83 +175,172 @@ class Quest(BaseModel):
     program: Optional[str] = None  # e.g., "eco_hero"
     created_at: str
 
-class Reward(BaseModel):
+class Reward(TrackedModel):
     reward_id: str
     title: str
     xp_required: int
     reward_type: Literal["voucher", "tshirt", "sticker", "badge"]
-    given_to: List[str] = []
+    given_to: List[str] = []  # legacy claim list, migrated into `claims` on startup
     created_at: str
 
-class Submission(BaseModel):
+class Submission(TrackedModel):
     submission_id: str
     quest_id: str
     user_id: str
     proof_url: Optional[str] = None
     proof_text: Optional[str] = None
+    proof_hash: Optional[str] = None  # perceptual hash of an auto-verified proof image, hex
     status: Literal["pending", "approved", "rejected"] = "pending"
     reviewer_id: Optional[str] = None
     notes: Optional[str] = None
     created_at: str
     reviewed_at: Optional[str] = None
 
-# --- In-Memory Storage (replace with database in production) ---
-USERS: dict[str, User] = {}
+# --- Storage ---
+# Persistence goes through an async store so slow database calls never block other users
+store: QuestStore = instrument_store(make_store(MONGO_URI, MONGO_DB, JOURNAL_DIR, JOURNAL_SNAPSHOT_EVERY), METRICS)
+# Mutations are coalesced for a short window and flushed as minimal bulk updates
+write_buffer = WriteBehindBuffer(store, delay=WRITE_BEHIND_MS / 1000,
+                                 on_conflict=lambda collection, key: _on_write_conflict(collection, key))
+# Read-modify-write of a user (XP awards, reviews, claims) holds that user's lock across its awaits
+USER_LOCKS = StripedLocks()
+# Responses of mutating tools called with an idempotency_key, replayed for client retries
+IDEMPOTENCY = IdempotencyCache(store, write_buffer, ttl=IDEMPOTENCY_TTL_SECONDS, maxsize=IDEMPOTENCY_CACHE_SIZE,
+                               clock=lambda: _clock())
+
+# Quests and rewards are small and hot: loaded eagerly at startup.
+# Users and submissions are loaded lazily into bounded LRUs; entries with unflushed
+# writes are pinned so eviction always happens after the data reached the store.
 QUESTS: dict[str, Quest] = {}
 REWARDS: dict[str, Reward] = {}
-SUBMISSIONS: dict[str, Submission] = {}
-
-mongo_client: MongoClient | None = None
-db = None
+# USER_BACKEND=compact keeps them in a columnar UserTable instead, with the same bound. Its rows
+# are reused after eviction, so users whose lock is held (a handler may still be using them) stay too.
+USERS: LRUCache | UserTable = (
+    UserTable(USER_CACHE_SIZE, pinned=lambda key: write_buffer.is_pending("users", key) or USER_LOCKS(key).locked())
+    if USER_BACKEND == "compact"
+    else LRUCache(USER_CACHE_SIZE, pinned=lambda key: write_buffer.is_pending("users", key))
+)
+SUBMISSIONS: LRUCache = LRUCache(SUBMISSION_CACHE_SIZE, pinned=lambda key: write_buffer.is_pending("submissions", key))
+# Rewards ordered by xp_required for unlock detection and earned/locked rendering
+REWARD_LADDER = RewardLadder()
+# Quest titles and descriptions for search_quests, updated as quests are registered
+QUEST_SEARCH = SearchIndex()
+# list_quests entries rendered once per quest revision, joined per quest type
+QUEST_LIST = RenderCache(QUESTS, group=lambda quest: quest.quest_type, render=lambda quest: _render_quest_listing(quest))
+QUEST_TYPE_EMOJI = {"climate": "🌱", "social": "🤝", "personal": "📚"}
+# Ranked boards keyed "global", "type:<quest_type>", "program:<program>" and "daily:<epoch day>",
+# updated whenever XP is awarded and bulk-loaded in the background at startup
+LEADERBOARDS: dict[str, Leaderboard] = {}
 
 # --- Utility Functions ---
 def _now() -> str:
-    return datetime.utcnow().isoformat()
+    return _iso(_clock())
+
+def _persist(collection: str, model: TrackedModel, new: bool = False) -> None:
+    """Queue a model's changed fields for the next write-behind flush"""
+    write_buffer.stage(collection, model, new=new)
+
+def _on_write_conflict(collection: str, key: str) -> None:
+    """Another writer (e.g. a second server instance) updated the user first: reload it on next use"""
+    if collection == "users":
+        USERS.pop(key, None)
 
-def _get_user(puch_user_id: str) -> User:
+async def _get_user(puch_user_id: str) -> User:
     if not puch_user_id:
         raise McpError(ErrorData(code=INVALID_PARAMS, message="puch_user_id is required"))
     
-    if puch_user_id not in USERS:
-        # Create new user with fun onboarding
-        user = User(
-            user_id=puch_user_id,
-            name=f"Adventurer_{puch_user_id[:8]}",
-            total_xp=0,
-            daily_xp=0,
-            last_daily_reset=_now(),
-            quests_completed=[],
-            streak_days=0,
-            created_at=_now()
-        )
-        USERS[puch_user_id] = user
-        if db:
-            db.users.update_one({"user_id": puch_user_id}, {"$set": user.model_dump()}, upsert=True)
-    
-    return USERS[puch_user_id]
+    user = USERS.get(puch_user_id)
+    if user is not None:
+        return user
 
-def _has_approved_submission(user_id: str, quest_id: str) -> bool:
-    for submission in SUBMISSIONS.values():
-        if submission.user_id == user_id and submission.quest_id == quest_id and submission.status == "approved":
-            return True
-    return False
+    doc = await store.get("users", puch_user_id)
+    # Another request may have loaded the same user while we were waiting
+    user = USERS.get(puch_user_id)
+    if user is not None:
+        return user
+
+    if doc is not None and "created_at" in doc:
+        user = User.model_validate(doc)
+        is_new = False
+        # Rewrite documents stored with ISO timestamps in the epoch format the first time they load
+        needs_rewrite = any(name in doc for name in LEGACY_USER_TIME_FIELDS) or isinstance(doc["created_at"], str)
+    else:
+        # Create new user with fun onboarding (keeping anything a partial write already stored)
+        user = User(**{
+            "user_id": puch_user_id,
+            "name": f"Adventurer_{puch_user_id[:8]}",
+            "total_xp": 0,
+            "daily_xp": 0,
+            "last_reset_day": _epoch_day(),
+            "quests_completed": [],
+            "streak_days": 0,
+            "created_at": _epoch_seconds(),
+            **(doc or {}),
+        })
+        is_new = needs_rewrite = True
+    USERS[puch_user_id] = user
+    # The compact backend copies the model into its columns and hands back a view
+    user = USERS[puch_user_id]
+    if needs_rewrite:
+        _persist("users", user, new=True)
+        if not is_new:
+            write_buffer.stage_fields("users", puch_user_id, unset=LEGACY_USER_TIME_FIELDS)
+    if is_new:
+        _board("global").add_if_absent(user.user_id, user.total_xp)
+    return user
+
+async def _get_submission(submission_id: str) -> Optional[Submission]:
+    submission = SUBMISSIONS.get(submission_id)
+    if submission is not None:
+        return submission
+    doc = await store.get("submissions", submission_id)
+    if doc is None:
+        return None
+    submission = SUBMISSIONS.get(submission_id)
+    if submission is None:
+        submission = Submission.model_validate(doc)
+        SUBMISSIONS[submission_id] = submission
+    return submission
+
+async def _load_user_submissions(user_id: str):
+    """Feed SUBMISSION_INDEX: stored submissions first, then newer unflushed ones"""
+    async for doc in store.find("submissions", {"user_id": user_id}, fields=["submission_id", "quest_id", "status"]):
+        yield doc
+    for submission in list(write_buffer.pending_models("submissions")):
+        if submission.user_id == user_id:
+            yield {"submission_id": submission.submission_id, "quest_id": submission.quest_id, "status": submission.status}
+
+# (user_id, quest_id) -> submission statuses, kept current by submit_proof/review_submission
+SUBMISSION_INDEX = SubmissionIndex(_load_user_submissions, max_users=USER_CACHE_SIZE)
+
+# Oldest-first queue of submissions awaiting review, for list_pending_submissions
+PENDING_QUEUE = PendingQueue()
+
+def _index_submission(submission: Submission) -> None:
+    SUBMISSION_INDEX.record(submission.user_id, submission.quest_id, submission.submission_id, submission.status)
+    if submission.status == "pending":
+        PENDING_QUEUE.add(submission.submission_id, submission)
+    else:
+        PENDING_QUEUE.remove(submission.submission_id)
+
+async def _has_approved_submission(user_id: str, quest_id: str) -> bool:
+    return "approved" in await SUBMISSION_INDEX.statuses(user_id, quest_id)
 
 def _reset_daily_xp_if_needed(user: User):
-    """Reset daily XP if it's a new day"""
-    last_reset = datetime.fromisoformat(user.last_daily_reset.replace('Z', '+00:00'))
-    now = datetime.utcnow()
-    
-    if (now - last_reset).days >= 1:
-        user.daily_xp = 0
-        user.last_daily_reset = _now()
-        
-        # Check streak
-        if user.last_quest_date:
-            last_quest = datetime.fromisoformat(user.last_quest_date.replace('Z', '+00:00'))
-            if (now - last_quest).days == 1:
-                user.streak_days += 1
-            elif (now - last_quest).days > 1:
-                user.streak_days = 0
+    """Reset daily XP if it's a new UTC day (same rules as the bulk midnight reset)"""
+    today = _epoch_day()
+    if user.last_reset_day >= today:
+        return
+    user.daily_xp = 0
+    user.last_reset_day = today
+
+    # Check streak
+    if user.last_quest_day is not None:
+        if user.last_quest_day == today - 1:
+            user.streak_days += 1
+        elif user.last_quest_day < today - 1:
+            user.streak_days = 0
+    _persist("users", user)
 
 def _calculate_xp_gain(user: User, quest_xp: int) -> int:
     """Calculate actual XP gain considering daily limit"""
@@ -161,6 +354,128 @@ def _calculate_xp_gain(user: User, quest_xp: int) -> int:
     total_gain = min(quest_xp + streak_bonus, remaining_daily)
     return total_gain
 
+def _apply_review(submission: Submission, user: User, reviewer_id: str, approve: bool, notes: Optional[str]) -> Optional[int]:
+    """Record a review decision and award XP on approval; returns the XP awarded, if any"""
+    submission.status = "approved" if approve else "rejected"
+    submission.reviewer_id = reviewer_id
+    submission.notes = notes
+    submission.reviewed_at = _now()
+    _index_submission(submission)
+    _persist("submissions", submission)
+
+    quest = QUESTS.get(submission.quest_id)
+    if not approve or not quest or quest.quest_id in user.quests_completed:
+        return None  # a second approved proof for the same quest never pays twice
+    _reset_daily_xp_if_needed(user)
+    xp_gain = _calculate_xp_gain(user, quest.xp_reward)
+    _award_xp(user, quest, xp_gain)
+    return xp_gain
+
+def _award_xp(user: User, quest: Quest, xp_gain: int) -> None:
+    """Credit a completed quest to the user and keep the leaderboards in step"""
+    user.daily_xp += xp_gain
+    user.total_xp += xp_gain
+    if user.add_to_set("quests_completed", quest.quest_id):
+        user.quest_counts[quest.quest_type] = user.quest_counts.get(quest.quest_type, 0) + 1
+        user.mark_dirty("quest_counts")
+    user.last_quest_at = _epoch_seconds()
+    user.last_quest_day = _epoch_day(user.last_quest_at)
+    user.xp_by_type[quest.quest_type] = user.xp_by_type.get(quest.quest_type, 0) + xp_gain
+    user.mark_dirty("xp_by_type")
+    if quest.program:
+        user.xp_by_program[quest.program] = user.xp_by_program.get(quest.program, 0) + xp_gain
+        user.mark_dirty("xp_by_program")
+    _persist("users", user)
+
+    _board("global").update(user.user_id, user.total_xp)
+    _board(f"type:{quest.quest_type}").update(user.user_id, user.xp_by_type[quest.quest_type])
+    if quest.program:
+        _board(f"program:{quest.program}").update(user.user_id, user.xp_by_program[quest.program])
+    _daily_board().update(user.user_id, user.daily_xp)
+
+def _board(key: str) -> Leaderboard:
+    board = LEADERBOARDS.get(key)
+    if board is None:
+        board = LEADERBOARDS[key] = Leaderboard()
+    return board
+
+def _daily_board() -> Leaderboard:
+    """Today's board; yesterday's is dropped the first time a new UTC day is seen"""
+    key = f"daily:{_epoch_day()}"
+    if key not in LEADERBOARDS:
+        for stale in [k for k in LEADERBOARDS if k.startswith("daily:")]:
+            del LEADERBOARDS[stale]
+    return _board(key)
+
+def _register_quest(quest: Quest) -> None:
+    """Add or replace a catalogue quest (create_quest, admin edits) and refresh its indexes"""
+    QUESTS[quest.quest_id] = quest
+    QUEST_SEARCH.add(quest.quest_id, quest.title, quest.description)
+    QUEST_LIST.touch(quest.quest_id)
+
+def _render_quest_listing(quest: Quest) -> str:
+    """A quest's list_quests entry for a user who hasn't completed it (completed ones swap in ✅)"""
+    golden_emoji = "🌟" if quest.is_golden else ""
+    return (
+        f"🎯 **{quest.title}** {golden_emoji}\n"
+        f"   📖 {quest.description}\n"
+        f"   🏆 {quest.xp_reward} XP | {QUEST_TYPE_EMOJI[quest.quest_type]} {quest.quest_type.title()}\n"
+        f"   🆔 `{quest.quest_id}`\n\n"
+    )
+
+def _register_reward(reward: Reward) -> None:
+    REWARDS[reward.reward_id] = reward
+    REWARD_LADDER.add(reward.reward_id, reward.xp_required)
+
+# --- Paging ---
+def _parse_cursor(cursor: Optional[str]) -> int:
+    """Cursors are opaque to clients; here they're non-negative offsets into the listing"""
+    try:
+        after = int(cursor) if cursor else 0
+    except ValueError:
+        after = -1
+    if after < 0:
+        raise McpError(ErrorData(code=INVALID_PARAMS, message="Invalid cursor"))
+    return after
+
+def _next_page_hint(label: str, tool: str, next_cursor: Optional[int], **arguments) -> str:
+    """Markdown line telling the client how to fetch the next page (empty on the last page)"""
+    if next_cursor is None:
+        return ""
+    args = "".join(f"{name}={str(value).lower() if isinstance(value, bool) else value} "
+                   for name, value in arguments.items() if value not in (None, False))
+    return f"➡️ {label}: /{tool} {args}cursor={next_cursor}\n"
+
+def _compact_page(items: list[dict], next_cursor: Optional[int], **fields) -> list[TextContent]:
+    """compact=True output: one JSON document with only the listed fields, no markdown"""
+    payload = {**fields, "items": items, "next_cursor": None if next_cursor is None else str(next_cursor)}
+    return [TextContent(type="text", text=json.dumps(payload, ensure_ascii=False, separators=(",", ":")))]
+
+def _idempotent(scope_arg: str):
+    """Replay the first response for calls repeating an idempotency_key (scoped per tool and `scope_arg`)"""
+    def decorate(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs).arguments
+            key = arguments.pop("idempotency_key", None)
+            if not key:
+                return await fn(*args, **kwargs)
+
+            async def call() -> list[str]:
+                return [content.text for content in await fn(*args, **kwargs)]
+
+            cache_key = f"{fn.__name__}:{arguments[scope_arg]}:{key}"
+            fingerprint = json.dumps(arguments, sort_keys=True, default=str)
+            try:
+                response = await IDEMPOTENCY.run(cache_key, fingerprint, call)
+            except KeyReuseError as e:
+                raise McpError(ErrorData(code=INVALID_PARAMS, message=str(e)))
+            return [TextContent(type="text", text=text) for text in response]
+        return wrapper
+    return decorate
+
 def _get_fun_response(emoji: str, message: str) -> str:
     """Add fun elements to responses"""
     fun_prefixes = [
@@ -168,8 +483,215 @@ def _get_fun_response(emoji: str, message: str) -> str:
     ]
     return f"{random.choice(fun_prefixes)} {emoji} {message}"
 
+# --- Startup Hydration ---
+async def _hydrate():
+    """Bulk-load the quest and reward catalogues; users and submissions load lazily"""
+    async for doc in store.find("quests"):
+        _register_quest(Quest.model_validate(doc))
+    async for doc in store.find("rewards"):
+        _register_reward(Reward.model_validate(doc))
+    await _migrate_legacy_claims()
+    # The review queue only holds pending work, so it stays small however much history exists
+    pending = [Submission.model_validate(doc) async for doc in store.find("submissions", {"status": "pending"})]
+    for submission in sorted(pending, key=lambda s: s.created_at):
+        PENDING_QUEUE.add(submission.submission_id, submission)
+
+async def _migrate_legacy_claims():
+    """Move old Reward.given_to arrays into per-user claim sets and the claims collection"""
+    for reward in REWARDS.values():
+        if not reward.given_to:
+            continue
+        for user_id in reward.given_to:
+            _record_claim(user_id, reward.reward_id)
+        reward.given_to = []
+        _persist("rewards", reward)
+    await write_buffer.flush()
+
+def _record_claim(user_id: str, reward_id: str) -> None:
+    """Persist a claim as one small insert plus an $addToSet on the user"""
+    write_buffer.stage_fields(
+        "claims", f"{reward_id}:{user_id}",
+        set_fields={"user_id": user_id, "reward_id": reward_id, "claimed_at": _now()},
+    )
+    cached = USERS.get(user_id)
+    if cached is not None:
+        cached.add_to_set("rewards_claimed", reward_id)
+        _persist("users", cached)
+    else:
+        write_buffer.stage_fields("users", user_id, add_to_set={"rewards_claimed": [reward_id]})
+
+async def _hydrate_leaderboards():
+    """Stream every user's scores (projected, not full documents) into the leaderboards"""
+    today = _epoch_day()
+    daily = _daily_board()
+    fields = ["user_id", "total_xp", "daily_xp", "xp_by_type", "xp_by_program", "last_quest_day", "last_quest_date"]
+    async for doc in store.find("users", fields=fields):
+        _rank_user(doc, today, daily)
+
+def _rank_user(doc: dict, today: int, daily: Leaderboard, replace: bool = False) -> None:
+    """Place one user document's scores on the leaderboards; `replace` overwrites live scores"""
+    place = Leaderboard.update if replace else Leaderboard.add_if_absent
+    user_id = doc["user_id"]
+    place(_board("global"), user_id, doc.get("total_xp", 0))
+    for quest_type, xp in (doc.get("xp_by_type") or {}).items():
+        place(_board(f"type:{quest_type}"), user_id, xp)
+    for program, xp in (doc.get("xp_by_program") or {}).items():
+        place(_board(f"program:{program}"), user_id, xp)
+    last_quest_day = doc.get("last_quest_day")
+    if last_quest_day is None and doc.get("last_quest_date"):
+        last_quest_day = _epoch_day(_parse_iso(doc["last_quest_date"]))
+    if last_quest_day == today:
+        place(daily, user_id, doc.get("daily_xp", 0))
+
+# --- Bulk Import/Export ---
+# Collections that import_jsonl validates and upserts; "claims" can only be exported
+IMPORT_MODELS: dict[str, type[TrackedModel]] = {"quests": Quest, "rewards": Reward, "users": User, "submissions": Submission}
+EXPORT_COLLECTIONS = [*IMPORT_MODELS, "claims"]
+
+def _apply_import(collection: str, models: list[TrackedModel]) -> None:
+    """Bring the live catalogues, caches and indexes in step with a just-written import chunk"""
+    if collection == "quests":
+        for quest in models:
+            _register_quest(quest)
+    elif collection == "rewards":
+        for reward in models:
+            _register_reward(reward)
+    elif collection == "users":
+        today, daily = _epoch_day(), _daily_board()
+        for user in models:
+            USERS.pop(user.user_id, None)  # reloaded from the imported document on next use
+            _rank_user(user.model_dump(), today, daily, replace=True)
+    elif collection == "submissions":
+        for submission in models:
+            SUBMISSIONS.pop(submission.submission_id, None)
+            SUBMISSION_INDEX.record(submission.user_id, submission.quest_id, submission.submission_id, submission.status)
+            PENDING_QUEUE.remove(submission.submission_id)
+            if submission.status == "pending":
+                PENDING_QUEUE.add(submission.submission_id, submission)
+
+# --- Proof Verification ---
+AUTO_REVIEWER_ID = "auto_verifier"
+# Perceptual hashes of approved proof images, so a picture can't be reused for another submission
+PROOF_IMAGES = ImageHashIndex()
+VERIFIER = ProofVerifier(default_checks(PROOF_IMAGES), timeout=VERIFY_TIMEOUT_SECONDS,
+                         max_connections=VERIFY_WORKERS, allow_private=VERIFY_ALLOW_PRIVATE_URLS)
+
+def _needs_auto_verification(submission: Submission) -> bool:
+    """Pending proof links for "auto" quests that the checks haven't flagged yet"""
+    quest = QUESTS.get(submission.quest_id)
+    return (quest is not None and quest.verification_method == "auto" and submission.status == "pending"
+            and bool(submission.proof_url) and submission.notes is None)
+
+async def _verify_submission(submission_id: str) -> str:
+    """Fetch and check one proof, then approve it (awarding XP) or flag it for a human reviewer"""
+    submission = await _get_submission(submission_id)
+    if submission is None or not _needs_auto_verification(submission):
+        return "skipped"
+    verdict = await VERIFIER.verify(submission_id, submission.proof_url)
+    async with USER_LOCKS(submission.user_id):
+        submission = await _get_submission(submission_id)
+        if submission is None or submission.status != "pending":
+            return "skipped"  # a reviewer decided while the proof was being fetched
+        if verdict.image_hash is not None:
+            submission.proof_hash = f"{verdict.image_hash:016x}"
+        user = await _get_user(submission.user_id)
+        reasons = verdict.reasons if not verdict.approved else await _repeat_proof_reasons(submission, user)
+        if reasons:
+            # Stays in the review queue; the note tells the reviewer what to look at
+            submission.notes = f"🚩 Flagged by automatic checks: {'; '.join(reasons)}"
+            _persist("submissions", submission)
+            return "flagged"
+        _apply_review(submission, user, AUTO_REVIEWER_ID, True, "🤖 Passed automatic checks")
+        return "approved"
+
+async def _repeat_proof_reasons(submission: Submission, user: User) -> list[str]:
+    """Why a proof that passed the checks still needs a human: the quest is done, or the link was used for it before"""
+    if submission.quest_id in user.quests_completed:
+        return ["quest already completed"]
+    for other_id in await SUBMISSION_INDEX.submissions(submission.user_id, submission.quest_id):
+        if other_id != submission.submission_id:
+            other = await _get_submission(other_id)
+            if other is not None and other.proof_url == submission.proof_url:
+                return [f"same proof link as submission {other_id}"]
+    return []
+
+VERIFICATION_POOL = VerificationPool(_verify_submission, workers=VERIFY_WORKERS, queue_size=VERIFY_QUEUE_SIZE)
+
+async def _resume_verification():
+    """Load the hashes of approved proof images, then queue auto-quest proofs the last run left unchecked"""
+    async for doc in store.find("submissions", {"status": "approved"}, fields=["submission_id", "proof_hash"]):
+        if doc.get("proof_hash"):
+            PROOF_IMAGES.add(int(doc["proof_hash"], 16), doc["submission_id"])
+    unchecked, _ = PENDING_QUEUE.page(limit=len(PENDING_QUEUE) + 1, accept=_needs_auto_verification)
+    for submission in unchecked:
+        VERIFICATION_POOL.submit(submission.submission_id)
+
+# --- Daily Reset ---
+async def _bulk_daily_reset(today: int) -> int:
+    """Reset daily_xp and streaks for every stored user in three server-side updates
+
+    Mirrors _reset_daily_xp_if_needed, so cached users that reset lazily later write the
+    same values the bulk pass already stored.
+    """
+    await write_buffer.flush()
+    stale = {"$lt": today}
+    reset = {"daily_xp": 0, "last_reset_day": today}
+    # Quested yesterday: the streak continues
+    total = await store.update_many("users", {"last_reset_day": stale, "last_quest_day": today - 1},
+                                    set_fields=reset, inc={"streak_days": 1})
+    # Missed at least a day: the streak breaks
+    total += await store.update_many("users", {"last_reset_day": stale, "last_quest_day": {"$lt": today - 1}},
+                                     set_fields={**reset, "streak_days": 0})
+    # Never completed a quest
+    total += await store.update_many("users", {"last_reset_day": stale}, set_fields=reset)
+    return total
+
+async def _rebuild_quest_counts() -> int:
+    """Recount User.quest_counts from quests_completed for every stored user; returns users updated"""
+    await write_buffer.flush()
+    updated = 0
+    async for doc in store.find("users", fields=["user_id", "quests_completed"]):
+        # A cached user is recounted in place, or its next award would write the stale counts back
+        user = USERS.get(doc["user_id"])
+        counts: dict[str, int] = {}
+        for quest_id in (doc.get("quests_completed") or []) if user is None else user.quests_completed:
+            quest = QUESTS.get(quest_id)
+            if quest:
+                counts[quest.quest_type] = counts.get(quest.quest_type, 0) + 1
+        if user is None:
+            # Staged writes are flushed in bulk batches by the write-behind buffer
+            write_buffer.stage_fields("users", doc["user_id"], set_fields={"quest_counts": counts})
+        else:
+            user.quest_counts = counts
+            _persist("users", user)
+        updated += 1
+    return updated
+
+async def _daily_reset_loop():
+    """Run the bulk reset just after every UTC midnight"""
+    while True:
+        await asyncio.sleep(SECONDS_PER_DAY - _epoch_seconds() % SECONDS_PER_DAY + 1)
+        try:
+            reset = await _bulk_daily_reset(_epoch_day())
+            print(f"🌅 Daily reset applied to {reset} users")
+        except Exception as e:
+            print(f"⚠️ Daily reset failed, users will reset lazily: {e}")
+
+# --- Expiry ---
+# How often local stores delete expired idempotency records (Mongo's TTL monitor runs every 60s too)
+EXPIRY_SWEEP_SECONDS = 60
+
+async def _expiry_loop():
+    """Delete documents past their TTL date; Mongo's TTL index makes this a no-op there"""
+    while True:
+        try:
+            await store.delete_expired(datetime.now(timezone.utc))
+        except Exception as e:
+            print(f"⚠️ Expiry sweep failed, will retry: {e}")
+        await asyncio.sleep(EXPIRY_SWEEP_SECONDS)
+
 # --- Initialize Default Content ---
-def _initialize_default_content():
+async def _initialize_default_content():
     """Create default quests and rewards"""
     if not QUESTS:
         default_quests = [
@@ -223,9 +745,8 @@ def _initialize_default_content():
         ]
         
         for quest in default_quests:
-            QUESTS[quest.quest_id] = quest
-            if db:
-                db.quests.update_one({"quest_id": quest.quest_id}, {"$set": quest.model_dump()}, upsert=True)
+            _register_quest(quest)
+            _persist("quests", quest, new=True)
     
     if not REWARDS:
         default_rewards = [
@@ -260,9 +781,8 @@ def _initialize_default_content():
         ]
         
         for reward in default_rewards:
-            REWARDS[reward.reward_id] = reward
-            if db:
-                db.rewards.update_one({"reward_id": reward.reward_id}, {"$set": reward.model_dump()}, upsert=True)
+            _register_reward(reward)
+            _persist("rewards", reward, new=True)
 
 # --- Rich Tool Description model ---
 class RichToolDescription(BaseModel):
@@ -284,11 +804,17 @@ CREATE_QUEST_DESCRIPTION = RichToolDescription(
 )
 
 LIST_QUESTS_DESCRIPTION = RichToolDescription(
-    description="List available quests with filters",
+    description="List available quests with filters, a page at a time (optionally as compact JSON)",
     use_when="User wants to see available challenges",
     side_effects="None"
 )
 
+SEARCH_QUESTS_DESCRIPTION = RichToolDescription(
+    description="Search quests by words in their title or description, best matches first, paged (optionally as compact JSON)",
+    use_when="User is looking for a quest about something specific, e.g. 'trees' or 'recycling'",
+    side_effects="None"
+)
+
 COMPLETE_QUEST_DESCRIPTION = RichToolDescription(
     description="Complete a quest and earn XP",
     use_when="User has finished a challenge and wants to claim rewards",
@@ -302,7 +828,7 @@ USER_PROFILE_DESCRIPTION = RichToolDescription(
 )
 
 LIST_REWARDS_DESCRIPTION = RichToolDescription(
-    description="List available rewards and user's earned rewards",
+    description="List the user's earned rewards, then the locked ones nearest first, paged (optionally as compact JSON)",
     use_when="User wants to see what rewards they can unlock",
     side_effects="None"
 )
@@ -316,7 +842,7 @@ CLAIM_REWARD_DESCRIPTION = RichToolDescription(
 ECO_SUBMIT_DESCRIPTION = RichToolDescription(
     description="Submit proof for a quest (Eco Hero program)",
     use_when="User uploads a link/text as proof of completing an eco/social task",
-    side_effects="Creates a pending submission for review"
+    side_effects="Creates a pending submission for review; proof links for auto-verified quests are checked in the background and approved (awarding XP) or flagged for a reviewer"
 )
 
 ECO_REVIEW_DESCRIPTION = RichToolDescription(
@@ -325,6 +851,24 @@ ECO_REVIEW_DESCRIPTION = RichToolDescription(
     side_effects="Awards XP on approval and updates streak"
 )
 
+LEADERBOARD_DESCRIPTION = RichToolDescription(
+    description="Show the top adventurers (overall, today, per quest type or per program) and the user's own rank, paged (optionally as compact JSON)",
+    use_when="User wants to see how they compare with others",
+    side_effects="None"
+)
+
+ECO_REVIEW_BATCH_DESCRIPTION = RichToolDescription(
+    description="Approve/reject many submissions at once and award XP",
+    use_when="Reviewer has a batch of proofs to moderate in one go",
+    side_effects="Awards XP on approvals and persists all decisions in one bulk write"
+)
+
+LIST_PENDING_DESCRIPTION = RichToolDescription(
+    description="List submissions waiting for review, oldest first, with filters and pagination (optionally as compact JSON)",
+    use_when="Reviewer wants to find the next proofs to approve or reject",
+    side_effects="None"
+)
+
 # --- Tools ---
 
 @mcp.tool
@@ -343,21 +887,155 @@ async def validate() -> str:
 
 @mcp.tool
 async def health_check() -> str:
+    if write_buffer.conflicts:
+        return (f"⚠️ Quest & Rewards MCP Server is degraded: {write_buffer.conflicts} acknowledged writes were "
+                "dropped by version conflicts (see the server log and quest_write_conflicts_total)")
     return "🎮 Quest & Rewards MCP Server is running! All systems operational! ⚡"
 
+# --- Metrics ---
+METRICS.gauge("quest_write_buffer_pending", "Documents with unflushed writes", lambda: len(write_buffer))
+METRICS.gauge("quest_write_conflicts_total", "Acknowledged writes dropped because another writer updated the document first",
+              lambda: write_buffer.conflicts, kind="counter")
+METRICS.gauge("quest_users_cached", "Users held in memory", lambda: len(USERS))
+METRICS.gauge("quest_submissions_cached", "Submissions held in memory", lambda: len(SUBMISSIONS))
+METRICS.gauge("quest_pending_reviews", "Submissions waiting for review", lambda: len(PENDING_QUEUE))
+METRICS.gauge("quest_verifications_queued", "Auto-quest proofs waiting for a verification worker", lambda: len(VERIFICATION_POOL))
+for outcome in ("approved", "flagged", "failed"):
+    METRICS.gauge(f"quest_verifications_{outcome}_total", f"Auto-quest proofs {outcome} by the verification workers",
+                  lambda outcome=outcome: VERIFICATION_POOL.outcomes[outcome], kind="counter")
+METRICS.gauge("quest_calls_in_flight", "Tool calls currently running", lambda: ADMISSION.active)
+METRICS.gauge("quest_calls_rejected_total", "Calls shed or rate limited", lambda: ADMISSION.rejected, kind="counter")
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Custom routes bypass the MCP auth middleware, so the bearer token is checked here"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or await mcp.auth.load_access_token(token) is None:
+        return PlainTextResponse("Unauthorized\n", status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health_endpoint(request: Request) -> PlainTextResponse:
+    """503 once any acknowledged write has been lost, so monitoring notices"""
+    return PlainTextResponse(await health_check.fn(), status_code=503 if write_buffer.conflicts else 200)
+
+def _format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f} ms"
+
+SERVER_STATS_DESCRIPTION = RichToolDescription(
+    description="Admin: per-tool call counts, errors and latency percentiles plus storage timings",
+    use_when="An operator wants to see which tools or database operations are slow",
+    side_effects="None"
+)
+
+EXPORT_COLLECTION_DESCRIPTION = RichToolDescription(
+    description="Admin: stream a whole collection (quests, rewards, users, submissions or claims) to a JSONL file on the server",
+    use_when="An operator wants a backup or a copy of the data to load elsewhere",
+    side_effects="Writes the file in JSONL_DIR, replacing any file with that name"
+)
+
+IMPORT_COLLECTION_DESCRIPTION = RichToolDescription(
+    description="Admin: bulk-load quests, rewards, users or submissions from a JSONL file on the server, validated in chunks",
+    use_when="An operator is seeding a campaign or restoring a backup",
+    side_effects="Creates or replaces every valid document in the file; invalid lines are skipped and reported"
+)
+
+@mcp.tool(description=SERVER_STATS_DESCRIPTION.model_dump_json())
+async def server_stats(
+    admin_id: Annotated[str, Field(description="Admin ID (must be listed in ADMIN_IDS)")],
+) -> list[TextContent]:
+    _require_admin(admin_id)
+    uptime = int(time.time() - METRICS.started_at)
+    lines = [f"📈 **Server Stats** (up {uptime // 3600}h {uptime % 3600 // 60}m)\n",
+             "🛠️ **Tools** (calls | errors | p50 | p95 | p99), slowest total time first:"]
+    for tool, histogram in sorted(METRICS.tool_latency.items(), key=lambda item: -item[1].total):
+        lines.append(
+            f"   • {tool}: {histogram.count} | {METRICS.tool_errors.get(tool, 0)} | "
+            f"{_format_ms(histogram.quantile(0.5))} | {_format_ms(histogram.quantile(0.95))} | {_format_ms(histogram.quantile(0.99))}"
+        )
+    lines.append("\n🗄️ **Storage** (ops | errors | p50 | p95 | p99):")
+    for (op, collection), histogram in sorted(METRICS.store_latency.items(), key=lambda item: -item[1].total):
+        lines.append(
+            f"   • {op} {collection}: {histogram.count} | {METRICS.store_errors.get((op, collection), 0)} | "
+            f"{_format_ms(histogram.quantile(0.5))} | {_format_ms(histogram.quantile(0.95))} | {_format_ms(histogram.quantile(0.99))}"
+        )
+    lines.append("\n📊 **Gauges:**")
+    lines += [f"   • {name}: {value}" for name, value in METRICS.gauge_values().items()]
+    return [TextContent(type="text", text="\n".join(lines))]
+
+def _require_admin(admin_id: str) -> None:
+    if admin_id not in ADMIN_IDS:
+        raise McpError(ErrorData(code=INVALID_PARAMS, message="Only ids listed in ADMIN_IDS can use admin tools"))
+
+def _jsonl_path(file_name: str) -> str:
+    """Files are confined to JSONL_DIR: a plain name, no directories"""
+    if os.path.basename(file_name) != file_name or not file_name.endswith(".jsonl") or file_name.startswith("."):
+        raise McpError(ErrorData(code=INVALID_PARAMS, message="file_name must be a plain file name ending in .jsonl"))
+    return os.path.join(JSONL_DIR, file_name)
+
+@mcp.tool(description=EXPORT_COLLECTION_DESCRIPTION.model_dump_json())
+async def export_collection(
+    admin_id: Annotated[str, Field(description="Admin ID (must be listed in ADMIN_IDS)")],
+    collection: Annotated[Literal["quests", "rewards", "users", "submissions", "claims"], Field(description="What to export")],
+    file_name: Annotated[str, Field(description="File to write in JSONL_DIR, e.g. users-2025-01-01.jsonl")],
+) -> list[TextContent]:
+    try:
+        _require_admin(admin_id)
+        path = _jsonl_path(file_name)
+        # Staged writes go out first so the file reflects every acknowledged change
+        await write_buffer.flush()
+        os.makedirs(JSONL_DIR, exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as out:
+            count = await export_jsonl(store, collection, out)
+        os.replace(path + ".tmp", path)
+        return [TextContent(type="text", text=f"📦 **Exported {count} {collection}** to `{path}`")]
+    except McpError:
+        raise
+    except Exception as e:
+        raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
+
+@mcp.tool(description=IMPORT_COLLECTION_DESCRIPTION.model_dump_json())
+async def import_collection(
+    admin_id: Annotated[str, Field(description="Admin ID (must be listed in ADMIN_IDS)")],
+    collection: Annotated[Literal["quests", "rewards", "users", "submissions"], Field(description="What to import")],
+    file_name: Annotated[str, Field(description="JSONL file in JSONL_DIR, one document per line")],
+) -> list[TextContent]:
+    try:
+        _require_admin(admin_id)
+        path = _jsonl_path(file_name)
+        if not os.path.isfile(path):
+            raise McpError(ErrorData(code=INVALID_PARAMS, message=f"No file {file_name} in {JSONL_DIR}"))
+        # Pending writes land before the import so they can't overwrite imported documents afterwards
+        await write_buffer.flush()
+        with open(path, encoding="utf-8") as lines:
+            report = await import_jsonl(store, collection, lines, IMPORT_MODELS[collection],
+                                        on_chunk=lambda models: _apply_import(collection, models))
+        response = f"📥 **Imported {report.imported} {collection}** from `{path}`"
+        if report.rejected:
+            response += f"\n\n⚠️ {report.rejected} invalid lines skipped:\n" + "\n".join(f"   • {error}" for error in report.errors)
+            if report.rejected > len(report.errors):
+                response += f"\n   …and {report.rejected - len(report.errors)} more"
+        return [TextContent(type="text", text=response)]
+    except McpError:
+        raise
+    except Exception as e:
+        raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
+
 @mcp.tool(description=ECO_SUBMIT_DESCRIPTION.model_dump_json())
+@_idempotent("puch_user_id")
 async def submit_proof(
     puch_user_id: Annotated[str, Field(description="User ID")],
     quest_id: Annotated[str, Field(description="Quest ID")],
     proof_url: Annotated[Optional[str], Field(description="URL to image/video/article")]=None,
     proof_text: Annotated[Optional[str], Field(description="Short description of the proof")]=None,
+    idempotency_key: Annotated[Optional[str], Field(description="Optional key; retrying with the same key returns the original response")]=None,
 ) -> list[TextContent]:
     try:
         if quest_id not in QUESTS:
             raise McpError(ErrorData(code=INVALID_PARAMS, message="Quest not found"))
         if not proof_url and not proof_text:
             raise McpError(ErrorData(code=INVALID_PARAMS, message="Provide proof_url or proof_text"))
-        _get_user(puch_user_id)
+        await _get_user(puch_user_id)
         submission = Submission(
             submission_id=str(uuid.uuid4()),
             quest_id=quest_id,
@@ -368,8 +1046,13 @@ async def submit_proof(
             created_at=_now()
         )
         SUBMISSIONS[submission.submission_id] = submission
-        if db:
-            db.submissions.update_one({"submission_id": submission.submission_id}, {"$set": submission.model_dump()}, upsert=True)
+        _index_submission(submission)
+        _persist("submissions", submission, new=True)
+        if _needs_auto_verification(submission) and VERIFICATION_POOL.submit(submission.submission_id):
+            return [TextContent(type="text", text=(
+                f"📥 Submission received! ID: `{submission.submission_id}`. 🤖 Your proof is being checked automatically; "
+                "XP is awarded as soon as it passes."
+            ))]
         return [TextContent(type="text", text=f"📥 Submission received! ID: `{submission.submission_id}`. A reviewer will validate it soon.")]
     except McpError:
         raise
@@ -377,40 +1060,30 @@ async def submit_proof(
         raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
 
 @mcp.tool(description=ECO_REVIEW_DESCRIPTION.model_dump_json())
+@_idempotent("reviewer_id")
 async def review_submission(
     reviewer_id: Annotated[str, Field(description="Reviewer/Admin ID")],
     submission_id: Annotated[str, Field(description="Submission ID")],
     approve: Annotated[bool, Field(description="Approve or reject")],
     notes: Annotated[Optional[str], Field(description="Optional notes")]=None,
+    idempotency_key: Annotated[Optional[str], Field(description="Optional key; retrying with the same key returns the original response")]=None,
 ) -> list[TextContent]:
     try:
-        if submission_id not in SUBMISSIONS:
+        submission = await _get_submission(submission_id)
+        if submission is None:
             raise McpError(ErrorData(code=INVALID_PARAMS, message="Submission not found"))
-        submission = SUBMISSIONS[submission_id]
-        if submission.status != "pending":
-            raise McpError(ErrorData(code=INVALID_PARAMS, message="Submission already reviewed"))
-        submission.status = "approved" if approve else "rejected"
-        submission.reviewer_id = reviewer_id
-        submission.notes = notes
-        submission.reviewed_at = _now()
-        if db:
-            db.submissions.update_one({"submission_id": submission.submission_id}, {"$set": submission.model_dump()}, upsert=True)
-
-        quest = QUESTS.get(submission.quest_id)
-        user = _get_user(submission.user_id)
+        async with USER_LOCKS(submission.user_id):
+            # Re-read and checked under the lock so two concurrent reviews cannot both award XP, even
+            # if the copy above was evicted from the cache and another review loaded a fresh one
+            submission = await _get_submission(submission_id)
+            if submission is None or submission.status != "pending":
+                raise McpError(ErrorData(code=INVALID_PARAMS, message="Submission already reviewed"))
+            user = await _get_user(submission.user_id)
+            xp_gain = _apply_review(submission, user, reviewer_id, approve, notes)
 
         awarded_text = ""
-        if approve and quest:
-            _reset_daily_xp_if_needed(user)
-            xp_gain = _calculate_xp_gain(user, quest.xp_reward)
-            user.daily_xp += xp_gain
-            user.total_xp += xp_gain
-            if quest.quest_id not in user.quests_completed:
-                user.quests_completed.append(quest.quest_id)
-            user.last_quest_date = _now()
-            if db:
-                db.users.update_one({"user_id": user.user_id}, {"$set": user.model_dump()}, upsert=True)
-            awarded_text = f" ✅ Awarded {xp_gain} XP for '{quest.title}'."
+        if xp_gain is not None:
+            awarded_text = f" ✅ Awarded {xp_gain} XP for '{QUESTS[submission.quest_id].title}'."
 
         return [TextContent(type="text", text=f"🧪 Review: {submission.status.upper()} for submission `{submission_id}`.{awarded_text}")]
     except McpError:
@@ -418,14 +1091,133 @@ async def review_submission(
     except Exception as e:
         raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
 
+class ReviewDecision(BaseModel):
+    submission_id: str
+    approve: bool
+    notes: Optional[str] = None
+
+@mcp.tool(description=ECO_REVIEW_BATCH_DESCRIPTION.model_dump_json())
+async def review_submissions_batch(
+    reviewer_id: Annotated[str, Field(description="Reviewer/Admin ID")],
+    decisions: Annotated[list[ReviewDecision], Field(description="Decisions, applied in order", min_length=1, max_length=500)],
+) -> list[TextContent]:
+    try:
+        # A first read only finds whose locks to take (a submission's user never changes). Submissions and
+        # users are then fetched concurrently under the locks, so decisions apply to the current cached copies
+        submission_ids = list(dict.fromkeys(d.submission_id for d in decisions))
+        owners = await asyncio.gather(*(_get_submission(sid) for sid in submission_ids))
+        found = [sid for sid, submission in zip(submission_ids, owners) if submission is not None]
+        user_ids = list(dict.fromkeys(s.user_id for s in owners if s is not None))
+
+        async with USER_LOCKS.many(user_ids):
+            submissions = dict(zip(found, await asyncio.gather(*(_get_submission(sid) for sid in found))))
+            users = dict(zip(user_ids, await asyncio.gather(*(_get_user(uid) for uid in user_ids))))
+            approved = rejected = failed = 0
+            lines = []
+            for decision in decisions:
+                submission = submissions.get(decision.submission_id)
+                if submission is None:
+                    failed += 1
+                    lines.append(f"⚠️ `{decision.submission_id}` not found")
+                    continue
+                if submission.status != "pending":
+                    failed += 1
+                    lines.append(f"⚠️ `{decision.submission_id}` already {submission.status}")
+                    continue
+                xp_gain = _apply_review(submission, users[submission.user_id], reviewer_id, decision.approve, decision.notes)
+                if decision.approve:
+                    approved += 1
+                    lines.append(f"✅ `{decision.submission_id}` +{xp_gain or 0} XP")
+                else:
+                    rejected += 1
+                    lines.append(f"❌ `{decision.submission_id}` rejected")
+
+        # One bulk write per collection for the whole batch instead of two writes per item
+        await write_buffer.flush()
+
+        response = f"🧪 **Batch Review:** {approved} approved, {rejected} rejected, {failed} skipped\n\n" + "\n".join(lines)
+        return [TextContent(type="text", text=response)]
+    except McpError:
+        raise
+    except Exception as e:
+        raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
+
+@mcp.tool(description=LIST_PENDING_DESCRIPTION.model_dump_json())
+async def list_pending_submissions(
+    reviewer_id: Annotated[str, Field(description="Reviewer/Admin ID")],
+    quest_id: Annotated[Optional[str], Field(description="Only submissions for this quest")] = None,
+    program: Annotated[Optional[str], Field(description="Only submissions for quests in this program, e.g. eco_hero")] = None,
+    min_age_minutes: Annotated[Optional[int], Field(description="Only submissions waiting at least this long")] = None,
+    limit: Annotated[int, Field(description="Page size (1-100)")] = 20,
+    cursor: Annotated[Optional[str], Field(description="Cursor from the previous page")] = None,
+    compact: Annotated[bool, Field(description="Return compact JSON with only the key fields instead of markdown")] = False,
+) -> list[TextContent]:
+    try:
+        if limit < 1 or limit > 100:
+            raise McpError(ErrorData(code=INVALID_PARAMS, message="limit must be between 1 and 100"))
+        after = _parse_cursor(cursor)
+
+        def accept(submission: Submission) -> bool:
+            if quest_id and submission.quest_id != quest_id:
+                return False
+            if program:
+                quest = QUESTS.get(submission.quest_id)
+                return quest is not None and quest.program == program
+            return True
+
+        # The queue is oldest-first, so everything after the age cutoff can be skipped at once
+        stop = lambda submission: False
+        if min_age_minutes:
+            cutoff = _iso(_clock() - min_age_minutes * 60)
+            stop = lambda submission: submission.created_at > cutoff
+
+        page, next_cursor = PENDING_QUEUE.page(after=after, limit=limit, accept=accept, stop=stop)
+
+        if compact:
+            return _compact_page([
+                {key: value for key, value in submission.model_dump(
+                    include={"submission_id", "quest_id", "user_id", "created_at", "proof_url", "proof_text"}).items()
+                 if value is not None}
+                for submission in page
+            ], next_cursor, in_queue=len(PENDING_QUEUE))
+
+        if not page:
+            if not PENDING_QUEUE:
+                return [TextContent(type="text", text="📭 **No pending submissions!** The review queue is clear. 🎉")]
+            return [TextContent(type="text", text=f"🔍 **No pending submissions match these filters** ({len(PENDING_QUEUE)} in queue).")]
+
+        response = f"🧾 **Pending Submissions** ({len(PENDING_QUEUE)} in queue, showing {len(page)})\n\n"
+        for submission in page:
+            quest = QUESTS.get(submission.quest_id)
+            quest_title = quest.title if quest else submission.quest_id
+            response += (
+                f"⏳ `{submission.submission_id}`\n"
+                f"   🎯 {quest_title}\n"
+                f"   👤 {submission.user_id} | 🕒 {submission.created_at}\n"
+            )
+            if submission.proof_url:
+                response += f"   🔗 {submission.proof_url}\n"
+            if submission.proof_text:
+                response += f"   📝 {submission.proof_text}\n"
+            response += "\n"
+        response += _next_page_hint("More waiting", "list_pending_submissions", next_cursor, reviewer_id=reviewer_id,
+                                    quest_id=quest_id, program=program, min_age_minutes=min_age_minutes, limit=limit)
+
+        return [TextContent(type="text", text=response)]
+    except McpError:
+        raise
+    except Exception as e:
+        raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
+
 @mcp.tool(description=REGISTER_USER_DESCRIPTION.model_dump_json())
 async def register_user(
     puch_user_id: Annotated[str, Field(description="Puch User Unique Identifier")],
     name: Annotated[str, Field(description="User's display name")],
 ) -> list[TextContent]:
     try:
-        user = _get_user(puch_user_id)
+        user = await _get_user(puch_user_id)
         user.name = name
+        _persist("users", user)
         
         welcome_message = (
             f"🎉 **Welcome to Eco Hero, {name}!** 🌍\n\n"
@@ -473,9 +1265,8 @@ async def create_quest(
             created_at=_now()
         )
         
-        QUESTS[quest_id] = quest
-        if db:
-            db.quests.update_one({"quest_id": quest_id}, {"$set": quest.model_dump()}, upsert=True)
+        _register_quest(quest)
+        _persist("quests", quest, new=True)
         
         golden_text = "🌟 **GOLDEN QUEST** 🌟" if is_golden else ""
         response = (
@@ -500,129 +1291,179 @@ async def list_quests(
     puch_user_id: Annotated[str, Field(description="Puch User Unique Identifier")],
     quest_type: Annotated[Optional[Literal["climate", "social", "personal"]], Field(description="Filter by quest type")] = None,
     show_completed: Annotated[bool, Field(description="Show completed quests")] = False,
+    limit: Annotated[int, Field(description="Page size (1-100)")] = 20,
+    cursor: Annotated[Optional[str], Field(description="Cursor from the previous page")] = None,
+    compact: Annotated[bool, Field(description="Return compact JSON with only the key fields instead of markdown")] = False,
 ) -> list[TextContent]:
     try:
-        user = _get_user(puch_user_id)
+        if limit < 1 or limit > 100:
+            raise McpError(ErrorData(code=INVALID_PARAMS, message="limit must be between 1 and 100"))
+        after = _parse_cursor(cursor)
+
+        user = await _get_user(puch_user_id)
         _reset_daily_xp_if_needed(user)
-        
-        available_quests = []
-        for quest in QUESTS.values():
-            if quest_type and quest.quest_type != quest_type:
-                continue
-            
-            is_completed = quest.quest_id in user.quests_completed
-            if is_completed and not show_completed:
-                continue
-            
-            quest_info = {
-                "quest_id": quest.quest_id,
-                "title": quest.title,
-                "description": quest.description,
-                "xp_reward": quest.xp_reward,
-                "quest_type": quest.quest_type,
-                "is_golden": quest.is_golden,
-                "is_completed": is_completed,
-                "created_by": quest.created_by
-            }
-            available_quests.append(quest_info)
-        
-        if not available_quests:
+
+        # Pre-rendered entries for this filter; the user's completions are skipped or marked ✅
+        view = QUEST_LIST.view(quest_type)
+        completed = set(view.positions(user.quests_completed))
+        found = len(view) if show_completed else len(view) - len(completed)
+        page, next_cursor = view.page(after, limit, skip=frozenset() if show_completed else completed)
+
+        if compact:
+            return _compact_page([
+                {**QUESTS[view.keys[i]].model_dump(
+                    include={"quest_id", "title", "description", "xp_reward", "quest_type", "is_golden"}),
+                 "completed": i in completed}
+                for i in page
+            ], next_cursor, found=found)
+
+        if not found:
             response = "📭 **No quests found!** Create your first quest to get started! 🎯"
         else:
-            response = f"📋 **Available Quests** ({len(available_quests)} found)\n\n"
-            
-            for quest in available_quests:
-                status_emoji = "✅" if quest["is_completed"] else "🎯"
-                golden_emoji = "🌟" if quest["is_golden"] else ""
-                type_emoji = {"climate": "🌱", "social": "🤝", "personal": "📚"}[quest["quest_type"]]
-                
-                response += (
-                    f"{status_emoji} **{quest['title']}** {golden_emoji}\n"
-                    f"   📖 {quest['description']}\n"
-                    f"   🏆 {quest['xp_reward']} XP | {type_emoji} {quest['quest_type'].title()}\n"
-                    f"   🆔 `{quest['quest_id']}`\n\n"
-                )
-        
+            head = f"📋 **Available Quests** ({found} found"
+            head += f", showing {len(page)})\n\n" if len(page) < found else ")\n\n"
+            response = view.join(page, head=head, marked=completed, old="🎯", new="✅")
+            response += _next_page_hint("More quests", "list_quests", next_cursor, puch_user_id=puch_user_id,
+                                        quest_type=quest_type, show_completed=show_completed, limit=limit)
+
+        return [TextContent(type="text", text=response)]
+    except McpError:
+        raise
+    except Exception as e:
+        raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
+
+@mcp.tool(description=SEARCH_QUESTS_DESCRIPTION.model_dump_json())
+async def search_quests(
+    puch_user_id: Annotated[str, Field(description="Puch User Unique Identifier")],
+    query: Annotated[str, Field(description="Words to look for, e.g. 'plant trees'")],
+    quest_type: Annotated[Optional[Literal["climate", "social", "personal"]], Field(description="Only quests of this type")] = None,
+    show_completed: Annotated[bool, Field(description="Include quests the user already completed")] = False,
+    limit: Annotated[int, Field(description="How many results to show (1-50)")] = 10,
+    cursor: Annotated[Optional[str], Field(description="Cursor from the previous page")] = None,
+    compact: Annotated[bool, Field(description="Return compact JSON with only the key fields instead of markdown")] = False,
+) -> list[TextContent]:
+    try:
+        if limit < 1 or limit > 50:
+            raise McpError(ErrorData(code=INVALID_PARAMS, message="limit must be between 1 and 50"))
+        if not tokenize(query):
+            raise McpError(ErrorData(code=INVALID_PARAMS, message="query must contain at least one word"))
+        after = _parse_cursor(cursor)
+
+        user = await _get_user(puch_user_id)
+        completed = set(user.quests_completed)
+
+        def accept(quest_id: str) -> bool:
+            quest = QUESTS.get(quest_id)
+            if quest is None:
+                return False
+            if quest_type and quest.quest_type != quest_type:
+                return False
+            return show_completed or quest_id not in completed
+
+        # Ranking one result past the page tells whether another page exists
+        ranked = QUEST_SEARCH.search(query, limit=after + limit + 1, accept=accept)
+        results = ranked[after:after + limit]
+        next_cursor = after + limit if len(ranked) > after + limit else None
+
+        if compact:
+            return _compact_page([
+                {**QUESTS[quest_id].model_dump(include={"quest_id", "title", "description", "xp_reward", "quest_type", "is_golden"}),
+                 "completed": quest_id in completed, "score": round(score, 3)}
+                for quest_id, score in results
+            ], next_cursor, query=query)
+
+        if not results:
+            return [TextContent(type="text", text=f"🔍 **No quests match** \"{query}\". Try other words or `list_quests`! 🧭")]
+
+        heading = f"top {len(results)}" if not after else f"results {after + 1}-{after + len(results)}"
+        response = f"🔍 **Quests matching \"{query}\"** ({heading})\n\n"
+        for quest_id, _ in results:
+            listing = _render_quest_listing(QUESTS[quest_id])
+            response += "✅" + listing[len("🎯"):] if quest_id in completed else listing
+        response += _next_page_hint("More matches", "search_quests", next_cursor, puch_user_id=puch_user_id, query=f'"{query}"',
+                                    quest_type=quest_type, show_completed=show_completed, limit=limit)
         return [TextContent(type="text", text=response)]
+    except McpError:
+        raise
     except Exception as e:
         raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
 
 @mcp.tool(description=COMPLETE_QUEST_DESCRIPTION.model_dump_json())
+@_idempotent("puch_user_id")
 async def complete_quest(
     puch_user_id: Annotated[str, Field(description="Puch User Unique Identifier")],
     quest_id: Annotated[str, Field(description="Quest ID to complete")],
+    idempotency_key: Annotated[Optional[str], Field(description="Optional key; retrying with the same key returns the original response")]=None,
 ) -> list[TextContent]:
     try:
-        user = _get_user(puch_user_id)
-        _reset_daily_xp_if_needed(user)
+        async with USER_LOCKS(puch_user_id):
+            user = await _get_user(puch_user_id)
+            _reset_daily_xp_if_needed(user)
         
-        if quest_id not in QUESTS:
-            raise McpError(ErrorData(code=INVALID_PARAMS, message=f"Quest {quest_id} not found"))
+            if quest_id not in QUESTS:
+                raise McpError(ErrorData(code=INVALID_PARAMS, message=f"Quest {quest_id} not found"))
         
-        if quest_id in user.quests_completed:
-            raise McpError(ErrorData(code=INVALID_PARAMS, message="Quest already completed"))
+            if quest_id in user.quests_completed:
+                raise McpError(ErrorData(code=INVALID_PARAMS, message="Quest already completed"))
         
-        quest = QUESTS[quest_id]
-        # Require approved proof for manual-verification quests
-        if getattr(quest, "verification_method", "manual") == "manual":
-            if not _has_approved_submission(puch_user_id, quest_id):
-                return [TextContent(
-                    type="text",
-                    text=(
-                        "📝 This quest requires manual verification.\n\n"
-                        "📥 Submit proof first using:\n"
-                        f"   /submit_proof puch_user_id={puch_user_id} quest_id={quest_id} proof_url=<link> (or) proof_text=\"what you did\"\n\n"
-                        "✅ A reviewer will approve it and XP will be awarded automatically."
-                    ),
-                )]
-        xp_gain = _calculate_xp_gain(user, quest.xp_reward)
+            quest = QUESTS[quest_id]
+            # Require approved proof for manual-verification quests
+            if getattr(quest, "verification_method", "manual") == "manual":
+                if not await _has_approved_submission(puch_user_id, quest_id):
+                    return [TextContent(
+                        type="text",
+                        text=(
+                            "📝 This quest requires manual verification.\n\n"
+                            "📥 Submit proof first using:\n"
+                            f"   /submit_proof puch_user_id={puch_user_id} quest_id={quest_id} proof_url=<link> (or) proof_text=\"what you did\"\n\n"
+                            "✅ A reviewer will approve it and XP will be awarded automatically."
+                        ),
+                    )]
+            xp_gain = _calculate_xp_gain(user, quest.xp_reward)
         
-        if xp_gain == 0:
-            response = (
-                f"⚠️ **Daily XP Limit Reached!**\n\n"
-                f"📊 **Your Stats:**\n"
-                f"   • Daily XP: {user.daily_xp}/15 ⚡\n"
-                f"   • Total XP: {user.total_xp} 🏆\n\n"
-                f"💡 **Come back tomorrow to earn more XP!**"
-            )
-        else:
-            # Award XP
-            user.daily_xp += xp_gain
-            user.total_xp += xp_gain
-            user.quests_completed.append(quest_id)
-            user.last_quest_date = _now()
-            if db:
-                db.users.update_one({"user_id": user.user_id}, {"$set": user.model_dump()}, upsert=True)
+            if xp_gain == 0:
+                response = (
+                    f"⚠️ **Daily XP Limit Reached!**\n\n"
+                    f"📊 **Your Stats:**\n"
+                    f"   • Daily XP: {user.daily_xp}/15 ⚡\n"
+                    f"   • Total XP: {user.total_xp} 🏆\n\n"
+                    f"💡 **Come back tomorrow to earn more XP!**"
+                )
+            else:
+                # Award XP
+                old_xp = user.total_xp
+                _award_xp(user, quest, xp_gain)
             
-            # Check for new rewards
-            new_rewards = []
-            for reward in REWARDS.values():
-                if (user.total_xp >= reward.xp_required and 
-                    puch_user_id not in reward.given_to):
-                    new_rewards.append(reward)
+                # Check for new rewards: only thresholds crossed on the way from the old to the new XP.
+                # A first award also announces the 0-XP rewards, which no threshold crossing reaches.
+                new_rewards = [
+                    REWARDS[reward_id]
+                    for reward_id in REWARD_LADDER.between(old_xp if old_xp else -1, user.total_xp)
+                    if reward_id not in user.rewards_claimed
+                ]
             
-            # Build response
-            golden_text = "🌟 **GOLDEN QUEST COMPLETED!** 🌟" if quest.is_golden else ""
-            streak_bonus = min(user.streak_days // 7, 3)
+                # Build response
+                golden_text = "🌟 **GOLDEN QUEST COMPLETED!** 🌟" if quest.is_golden else ""
+                streak_bonus = min(user.streak_days // 7, 3)
             
-            response = (
-                f"{golden_text}\n"
-                f"🎉 **Quest Completed Successfully!**\n\n"
-                f"🏆 **Quest:** {quest.title}\n"
-                f"📖 **Description:** {quest.description}\n"
-                f"⚡ **XP Earned:** {xp_gain} XP\n"
-                f"   • Base XP: {quest.xp_reward}\n"
-                f"   • Streak Bonus: +{streak_bonus} XP\n\n"
-                f"📊 **Updated Stats:**\n"
-                f"   • Daily XP: {user.daily_xp}/15 ⚡\n"
-                f"   • Total XP: {user.total_xp} 🏆\n"
-                f"   • Streak: {user.streak_days} days 🔥\n"
-            )
+                response = (
+                    f"{golden_text}\n"
+                    f"🎉 **Quest Completed Successfully!**\n\n"
+                    f"🏆 **Quest:** {quest.title}\n"
+                    f"📖 **Description:** {quest.description}\n"
+                    f"⚡ **XP Earned:** {xp_gain} XP\n"
+                    f"   • Base XP: {quest.xp_reward}\n"
+                    f"   • Streak Bonus: +{streak_bonus} XP\n\n"
+                    f"📊 **Updated Stats:**\n"
+                    f"   • Daily XP: {user.daily_xp}/15 ⚡\n"
+                    f"   • Total XP: {user.total_xp} 🏆\n"
+                    f"   • Streak: {user.streak_days} days 🔥\n"
+                )
             
-            if new_rewards:
-                response += f"\n🎁 **New Rewards Unlocked!**\n"
-                for reward in new_rewards:
-                    response += f"   • {reward.title} 🎯\n"
+                if new_rewards:
+                    response += f"\n🎁 **New Rewards Unlocked!**\n"
+                    for reward in new_rewards:
+                        response += f"   • {reward.title} 🎯\n"
         
         return [TextContent(type="text", text=response)]
     except McpError:
@@ -635,14 +1476,14 @@ async def user_profile(
     puch_user_id: Annotated[str, Field(description="Puch User Unique Identifier")],
 ) -> list[TextContent]:
     try:
-        user = _get_user(puch_user_id)
+        user = await _get_user(puch_user_id)
         _reset_daily_xp_if_needed(user)
         
-        # Calculate achievements
+        # Calculate achievements from the incrementally maintained counters
         total_quests = len(user.quests_completed)
-        climate_quests = len([q for q in user.quests_completed if QUESTS.get(q, {}).get('quest_type') == 'climate'])
-        social_quests = len([q for q in user.quests_completed if QUESTS.get(q, {}).get('quest_type') == 'social'])
-        personal_quests = len([q for q in user.quests_completed if QUESTS.get(q, {}).get('quest_type') == 'personal'])
+        climate_quests = user.quest_counts.get("climate", 0)
+        social_quests = user.quest_counts.get("social", 0)
+        personal_quests = user.quest_counts.get("personal", 0)
         
         # Calculate level (every 50 XP = 1 level)
         level = (user.total_xp // 50) + 1
@@ -672,84 +1513,183 @@ async def user_profile(
     except Exception as e:
         raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
 
+@mcp.tool(description=LEADERBOARD_DESCRIPTION.model_dump_json())
+async def leaderboard(
+    puch_user_id: Annotated[str, Field(description="Puch User Unique Identifier")],
+    scope: Annotated[Literal["global", "daily", "quest_type", "program"], Field(description="Which leaderboard to show")] = "global",
+    quest_type: Annotated[Optional[Literal["climate", "social", "personal"]], Field(description="Quest type, for scope=quest_type")] = None,
+    program: Annotated[Optional[str], Field(description="Program, e.g. eco_hero, for scope=program")] = None,
+    limit: Annotated[int, Field(description="How many top entries to show (1-50)")] = 10,
+    cursor: Annotated[Optional[str], Field(description="Cursor from the previous page")] = None,
+    compact: Annotated[bool, Field(description="Return compact JSON with only the key fields instead of markdown")] = False,
+) -> list[TextContent]:
+    try:
+        if limit < 1 or limit > 50:
+            raise McpError(ErrorData(code=INVALID_PARAMS, message="limit must be between 1 and 50"))
+        after = _parse_cursor(cursor)
+        if scope == "quest_type" and not quest_type:
+            raise McpError(ErrorData(code=INVALID_PARAMS, message="quest_type is required for scope=quest_type"))
+        if scope == "program" and not program:
+            raise McpError(ErrorData(code=INVALID_PARAMS, message="program is required for scope=program"))
+
+        user = await _get_user(puch_user_id)
+        _reset_daily_xp_if_needed(user)
+        if scope == "global":
+            board, title = _board("global"), "🌍 **Global Leaderboard**"
+        elif scope == "daily":
+            board, title = _daily_board(), "📅 **Today's Leaderboard**"
+        elif scope == "quest_type":
+            board, title = _board(f"type:{quest_type}"), f"🏷️ **{quest_type.title()} Leaderboard**"
+        else:
+            board, title = _board(f"program:{program}"), f"🎪 **{program} Leaderboard**"
+
+        top = board.top(limit, offset=after)
+        next_cursor = after + limit if after + limit < len(board) else None
+        names = await asyncio.gather(*(_get_user(user_id) for user_id, _ in top))
+        my_rank = board.rank(puch_user_id)
+
+        if compact:
+            return _compact_page([
+                {"rank": board.rank(user_id), "user_id": user_id, "name": entry.name, "xp": score}
+                for (user_id, score), entry in zip(top, names)
+            ], next_cursor, total=len(board), my_rank=my_rank,
+               my_xp=board.score(puch_user_id) if my_rank is not None else None)
+
+        medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+        response = f"{title} ({len(board)} adventurers)\n\n"
+        if not top:
+            response += "📭 Nobody has earned XP here yet. Be the first! 🚀\n"
+        for (user_id, score), entry in zip(top, names):
+            position = board.rank(user_id)
+            marker = " 👈" if user_id == puch_user_id else ""
+            response += f"{medals.get(position, f'#{position}')} {entry.name} — {score} XP{marker}\n"
+
+        hint = _next_page_hint("More adventurers", "leaderboard", next_cursor, puch_user_id=puch_user_id, scope=scope,
+                               quest_type=quest_type, program=program, limit=limit)
+        if hint:
+            response += "\n" + hint
+        if my_rank is None:
+            response += "\n🎯 Complete a quest to join this leaderboard!"
+        else:
+            response += f"\n📊 **Your rank:** #{my_rank} of {len(board)} with {board.score(puch_user_id)} XP"
+
+        return [TextContent(type="text", text=response)]
+    except McpError:
+        raise
+    except Exception as e:
+        raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
+
 @mcp.tool(description=LIST_REWARDS_DESCRIPTION.model_dump_json())
 async def list_rewards(
     puch_user_id: Annotated[str, Field(description="Puch User Unique Identifier")],
+    limit: Annotated[int, Field(description="Page size (1-100)")] = 20,
+    cursor: Annotated[Optional[str], Field(description="Cursor from the previous page")] = None,
+    compact: Annotated[bool, Field(description="Return compact JSON with only the key fields instead of markdown")] = False,
 ) -> list[TextContent]:
     try:
-        user = _get_user(puch_user_id)
-        
-        response = "🎁 **Available Rewards**\n\n"
-        
-        for reward in REWARDS.values():
+        if limit < 1 or limit > 100:
+            raise McpError(ErrorData(code=INVALID_PARAMS, message="limit must be between 1 and 100"))
+        after = _parse_cursor(cursor)
+
+        user = await _get_user(puch_user_id)
+        earned, locked = REWARD_LADDER.split(user.total_xp)
+        # Pages run through the earned rewards, then the locked ones nearest first
+        page_earned = earned[after:after + limit]
+        page_locked = locked[max(0, after - len(earned)):max(0, after + limit - len(earned))]
+        next_cursor = after + limit if after + limit < len(earned) + len(locked) else None
+
+        if compact:
+            def status(reward: Reward) -> str:
+                if reward.reward_id in user.rewards_claimed:
+                    return "claimed"
+                return "claimable" if user.total_xp >= reward.xp_required else "locked"
+            return _compact_page([
+                {**REWARDS[reward_id].model_dump(include={"reward_id", "title", "reward_type", "xp_required"}),
+                 "status": status(REWARDS[reward_id])}
+                for reward_id in page_earned + page_locked
+            ], next_cursor, total_xp=user.total_xp, earned=len(earned), locked=len(locked))
+
+        def render(reward: Reward) -> str:
             is_earned = user.total_xp >= reward.xp_required
-            is_claimed = puch_user_id in reward.given_to
+            is_claimed = reward.reward_id in user.rewards_claimed
             status_emoji = "✅" if is_claimed else "🎯" if is_earned else "🔒"
             type_emoji = {"voucher": "🎫", "tshirt": "👕", "sticker": "🏷️", "badge": "🏆"}[reward.reward_type]
             
-            response += (
+            text = (
                 f"{status_emoji} **{reward.title}** {type_emoji}\n"
                 f"   📊 Required XP: {reward.xp_required}\n"
                 f"   🏷️ Type: {reward.reward_type.title()}\n"
             )
             
             if is_claimed:
-                response += "   ✅ **Claimed!**\n"
+                text += "   ✅ **Claimed!**\n"
             elif is_earned:
-                response += "   🎯 **Ready to claim!**\n"
+                text += "   🎯 **Ready to claim!**\n"
             else:
                 remaining = reward.xp_required - user.total_xp
-                response += f"   🔒 **{remaining} XP needed**\n"
+                text += f"   🔒 **{remaining} XP needed**\n"
             
-            response += "\n"
+            return text + "\n"
+        
+        response = "🎁 **Available Rewards**\n\n"
+        if page_earned:
+            response += f"🏆 **Earned** ({len(earned)})\n\n"
+            response += "".join(render(REWARDS[reward_id]) for reward_id in page_earned)
+        if page_locked:
+            response += f"🔒 **Up Next** ({len(locked)} locked)\n\n"
+            response += "".join(render(REWARDS[reward_id]) for reward_id in page_locked)
+        response += _next_page_hint("More rewards", "list_rewards", next_cursor, puch_user_id=puch_user_id, limit=limit)
         
         return [TextContent(type="text", text=response)]
+    except McpError:
+        raise
     except Exception as e:
         raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
 
 @mcp.tool(description=CLAIM_REWARD_DESCRIPTION.model_dump_json())
+@_idempotent("puch_user_id")
 async def claim_reward(
     puch_user_id: Annotated[str, Field(description="Puch User Unique Identifier")],
     reward_id: Annotated[str, Field(description="Reward ID to claim")],
+    idempotency_key: Annotated[Optional[str], Field(description="Optional key; retrying with the same key returns the original response")]=None,
 ) -> list[TextContent]:
     try:
-        user = _get_user(puch_user_id)
+        async with USER_LOCKS(puch_user_id):
+            user = await _get_user(puch_user_id)
         
-        if reward_id not in REWARDS:
-            raise McpError(ErrorData(code=INVALID_PARAMS, message=f"Reward {reward_id} not found"))
+            if reward_id not in REWARDS:
+                raise McpError(ErrorData(code=INVALID_PARAMS, message=f"Reward {reward_id} not found"))
         
-        reward = REWARDS[reward_id]
+            reward = REWARDS[reward_id]
         
-        if user.total_xp < reward.xp_required:
-            remaining = reward.xp_required - user.total_xp
-            raise McpError(ErrorData(code=INVALID_PARAMS, message=f"Need {remaining} more XP to claim this reward"))
+            if user.total_xp < reward.xp_required:
+                remaining = reward.xp_required - user.total_xp
+                raise McpError(ErrorData(code=INVALID_PARAMS, message=f"Need {remaining} more XP to claim this reward"))
         
-        if puch_user_id in reward.given_to:
-            raise McpError(ErrorData(code=INVALID_PARAMS, message="Reward already claimed"))
+            if reward_id in user.rewards_claimed:
+                raise McpError(ErrorData(code=INVALID_PARAMS, message="Reward already claimed"))
         
-        # Claim the reward
-        reward.given_to.append(puch_user_id)
-        if db:
-            db.rewards.update_one({"reward_id": reward.reward_id}, {"$set": {"given_to": reward.given_to}}, upsert=True)
+            # Claim the reward
+            _record_claim(puch_user_id, reward_id)
         
-        type_emoji = {"voucher": "🎫", "tshirt": "👕", "sticker": "🏷️", "badge": "🏆"}[reward.reward_type]
+            type_emoji = {"voucher": "🎫", "tshirt": "👕", "sticker": "🏷️", "badge": "🏆"}[reward.reward_type]
         
-        response = (
-            f"🎉 **Reward Claimed Successfully!**\n\n"
-            f"{type_emoji} **{reward.title}**\n"
-            f"🏷️ **Type:** {reward.reward_type.title()}\n"
-            f"📊 **Required XP:** {reward.xp_required}\n\n"
-            f"🌟 **Congratulations!** You've earned this reward through your dedication!\n\n"
-        )
+            response = (
+                f"🎉 **Reward Claimed Successfully!**\n\n"
+                f"{type_emoji} **{reward.title}**\n"
+                f"🏷️ **Type:** {reward.reward_type.title()}\n"
+                f"📊 **Required XP:** {reward.xp_required}\n\n"
+                f"🌟 **Congratulations!** You've earned this reward through your dedication!\n\n"
+            )
         
-        if reward.reward_type == "voucher":
-            response += "💳 **Voucher Code:** QUEST2024-{user.user_id[:8]}\n"
-        elif reward.reward_type == "tshirt":
-            response += "👕 **T-Shirt Size:** Please contact support with your size preference\n"
-        elif reward.reward_type == "sticker":
-            response += "🏷️ **Sticker:** Will be mailed to your registered address\n"
-        elif reward.reward_type == "badge":
-            response += "🏆 **Badge:** Added to your profile! Check your achievements!\n"
+            if reward.reward_type == "voucher":
+                response += "💳 **Voucher Code:** QUEST2024-{user.user_id[:8]}\n"
+            elif reward.reward_type == "tshirt":
+                response += "👕 **T-Shirt Size:** Please contact support with your size preference\n"
+            elif reward.reward_type == "sticker":
+                response += "🏷️ **Sticker:** Will be mailed to your registered address\n"
+            elif reward.reward_type == "badge":
+                response += "🏆 **Badge:** Added to your profile! Check your achievements!\n"
         
         return [TextContent(type="text", text=response)]
     except McpError:
@@ -758,11 +1698,131 @@ async def claim_reward(
         raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e)))
 
 # --- Run MCP Server ---
+# Long-running startup work that must not delay serving requests
+_background_tasks: set[asyncio.Task] = set()
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def _startup():
+    await store.connect()
+    await store.ensure_indexes()
+    await _hydrate()
+    await _initialize_default_content()
+    _spawn(_hydrate_leaderboards())
+    _spawn(_resume_verification())
+    _spawn(_expiry_loop())
+    if DAILY_RESET_SCHEDULER:
+        _spawn(_daily_reset_loop())
+
+async def _shutdown():
+    for task in list(_background_tasks):
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    # Unfinished verifications stay pending and are queued again on the next startup
+    await VERIFICATION_POOL.close()
+    await VERIFIER.close()
+    # Flush-on-shutdown: nothing staged in the write-behind buffer is lost
+    await write_buffer.close()
+    await store.close()
+
 async def main():
     host = os.environ.get("HOST", "0.0.0.0")
     port = int(os.environ.get("PORT", "8086"))
-    _initialize_default_content()
-    await mcp.run_async("streamable-http", host=host, port=port)
+    await _startup()
+    try:
+        await mcp.run_async("streamable-http", host=host, port=port)
+    finally:
+        await _shutdown()
+
+# --- Maintenance Commands ---
+async def backfill_quest_counts():
+    """Rebuild User.quest_counts from quests_completed for every stored user"""
+    await store.connect()
+    await _hydrate()
+    updated = await _rebuild_quest_counts()
+    await _shutdown()
+    print(f"✅ Backfilled quest counters for {updated} users")
+
+async def migrate_time_fields():
+    """Rewrite ISO-string user timestamps as epoch fields for every stored user"""
+    await store.connect()
+    migrated = 0
+    fields = ["user_id", "created_at", *LEGACY_USER_TIME_FIELDS]
+    async for doc in store.find("users", fields=fields):
+        if not any(name in doc for name in LEGACY_USER_TIME_FIELDS) and not isinstance(doc.get("created_at"), str):
+            continue
+        set_fields = {}
+        if doc.get("last_daily_reset"):
+            set_fields["last_reset_day"] = _epoch_day(_parse_iso(doc["last_daily_reset"]))
+        if doc.get("last_quest_date"):
+            set_fields["last_quest_at"] = _parse_iso(doc["last_quest_date"])
+            set_fields["last_quest_day"] = _epoch_day(set_fields["last_quest_at"])
+        if isinstance(doc.get("created_at"), str):
+            set_fields["created_at"] = _parse_iso(doc["created_at"])
+        write_buffer.stage_fields("users", doc["user_id"], set_fields=set_fields, unset=LEGACY_USER_TIME_FIELDS)
+        migrated += 1
+    await _shutdown()
+    print(f"✅ Migrated timestamps for {migrated} users")
+
+async def daily_reset():
+    """Apply today's bulk daily reset once (for cron instead of the in-process scheduler)"""
+    await store.connect()
+    reset = await _bulk_daily_reset(_epoch_day())
+    await _shutdown()
+    print(f"✅ Daily reset applied to {reset} users")
+
+async def export_command(collection: str, path: str = "-"):
+    """Stream a collection to a JSONL file ("-": stdout)"""
+    if collection not in EXPORT_COLLECTIONS:
+        sys.exit(f"❌ Can't export {collection!r}; choose from {', '.join(EXPORT_COLLECTIONS)}")
+    await store.connect()
+    out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+    try:
+        count = await export_jsonl(store, collection, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    await _shutdown()
+    print(f"✅ Exported {count} {collection} to {path}", file=sys.stderr)
+
+async def import_command(collection: str, path: str = "-"):
+    """Validate and bulk-upsert a JSONL file ("-": stdin) into a collection"""
+    if collection not in IMPORT_MODELS:
+        sys.exit(f"❌ Can't import {collection!r}; choose from {', '.join(IMPORT_MODELS)}")
+    await store.connect()
+    await store.ensure_indexes()
+    lines = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        report = await import_jsonl(store, collection, lines, IMPORT_MODELS[collection])
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+    await _shutdown()
+    for error in report.errors:
+        print(f"   ⚠️ {error}", file=sys.stderr)
+    print(f"✅ Imported {report.imported} {collection} ({report.rejected} invalid lines skipped)", file=sys.stderr)
+
+COMMANDS = {
+    "serve": main,
+    "backfill-quest-counts": backfill_quest_counts,
+    "migrate-time-fields": migrate_time_fields,
+    "daily-reset": daily_reset,
+    "export": export_command,
+    "import": import_command,
+}
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Quest & Rewards MCP Server")
+    parser.add_argument("command", nargs="?", default="serve", choices=COMMANDS, help="What to run (default: serve)")
+    parser.add_argument("arguments", nargs="*", help="Command arguments, e.g. export users users.jsonl")
+    args = parser.parse_args()
+    command = COMMANDS[args.command]
+    try:
+        inspect.signature(command).bind(*args.arguments)
+    except TypeError:
+        parser.error(f"wrong arguments for {args.command}")
+    asyncio.run(command(*args.arguments))
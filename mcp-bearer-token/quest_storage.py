@@ -0,0 +1,620 @@
+# Storage backends for the Quest & Rewards MCP Server
+# Tool handlers only ever talk to a QuestStore, so persistence never blocks the event loop.
+
+import asyncio
+import copy
+import logging
+from collections import OrderedDict, deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from pydantic import BaseModel, PrivateAttr
+from pymongo import AsyncMongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Primary key field of every collection the quest server persists
+KEY_FIELDS: dict[str, str] = {
+    "users": "user_id",
+    "quests": "quest_id",
+    "rewards": "reward_id",
+    "submissions": "submission_id",
+    "claims": "claim_id",
+    "idempotency": "idempotency_key",
+}
+
+# Secondary indexes created on startup, as lists of (field, direction) keys
+INDEXES: dict[str, list[list[tuple[str, int]]]] = {
+    "users": [
+        [("last_reset_day", 1), ("last_quest_day", 1)],
+    ],
+    "submissions": [
+        [("user_id", 1), ("quest_id", 1), ("status", 1)],
+        [("status", 1), ("created_at", 1)],
+    ],
+    "claims": [
+        [("user_id", 1)],
+        [("reward_id", 1)],
+    ],
+}
+
+# Date fields that expire their document once the stored time has passed (Mongo TTL indexes)
+TTL_INDEXES: dict[str, str] = {
+    "idempotency": "expires_at",
+}
+
+@dataclass
+class UpdateOp:
+    """Minimal partial update for one document: `$set` fields plus `$addToSet` values
+
+    `expect_version` makes the write conditional on the stored document's `version`
+    (optimistic concurrency); stores report mismatches as conflicts instead of writing.
+    """
+    key: str
+    set_fields: dict[str, Any] = field(default_factory=dict)
+    add_to_set: dict[str, list] = field(default_factory=dict)
+    unset: set[str] = field(default_factory=set)
+    expect_version: Optional[int] = None
+
+    def merge(self, other: "UpdateOp") -> None:
+        """Fold a later update for the same document into this one"""
+        # The combined write is checked against the oldest expected version and sets the newest
+        versions = [v for v in (self.expect_version, other.expect_version) if v is not None]
+        self.expect_version = min(versions, default=None)
+        new_version = max(self.set_fields.get("version", 0), other.set_fields.get("version", 0))
+        for name in other.unset:
+            self.set_fields.pop(name, None)
+            self.add_to_set.pop(name, None)
+        self.unset |= other.unset
+        for name, values in other.add_to_set.items():
+            if name in self.set_fields:
+                self.set_fields[name] = self.set_fields[name] + [v for v in values if v not in self.set_fields[name]]
+            else:
+                pending = self.add_to_set.setdefault(name, [])
+                pending.extend(v for v in values if v not in pending)
+        for name, value in other.set_fields.items():
+            self.add_to_set.pop(name, None)
+            self.unset.discard(name)
+            self.set_fields[name] = value
+        if new_version:
+            self.set_fields["version"] = new_version
+
+    def __bool__(self) -> bool:
+        return bool(self.set_fields or self.add_to_set or self.unset)
+
+def _version_query(op: UpdateOp) -> dict:
+    """Filter matching the version an UpdateOp expects (documents from before versioning count as 0)"""
+    if op.expect_version is None:
+        return {}
+    if op.expect_version == 0:
+        return {"version": {"$in": [0, None]}}
+    return {"version": op.expect_version}
+
+def _is_expired(value: Any, now: datetime) -> bool:
+    """Whether a TTL date field has passed (naive datetimes are UTC, as pymongo returns them)"""
+    if not isinstance(value, datetime):
+        return False
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value <= now
+
+def _matches(doc: dict, query: dict) -> bool:
+    """Evaluate the subset of Mongo query syntax the quest server uses"""
+    for name, condition in query.items():
+        value = doc.get(name)
+        if isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+            for op, operand in condition.items():
+                if op == "$exists":
+                    ok = (name in doc) == bool(operand)
+                elif op == "$ne":
+                    ok = value != operand
+                elif op == "$in":
+                    ok = value in operand
+                elif value is None:
+                    ok = False
+                elif op == "$lt":
+                    ok = value < operand
+                elif op == "$lte":
+                    ok = value <= operand
+                elif op == "$gt":
+                    ok = value > operand
+                elif op == "$gte":
+                    ok = value >= operand
+                else:
+                    raise ValueError(f"Unsupported query operator {op}")
+                if not ok:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+# --- Store Interface ---
+class QuestStore:
+    """Async document store used by every quest tool"""
+
+    async def connect(self) -> None:
+        """Open connections (no-op for local stores)"""
+
+    async def close(self) -> None:
+        """Release connections (no-op for local stores)"""
+
+    async def ensure_indexes(self) -> None:
+        """Create primary-key, INDEXES secondary and TTL_INDEXES expiry indexes (no-op for local stores)"""
+
+    async def get(self, collection: str, key: str) -> Optional[dict]:
+        """Fetch one document by its primary key"""
+        raise NotImplementedError
+
+    async def upsert(self, collection: str, key: str, fields: dict[str, Any]) -> None:
+        """Set `fields` on the document with this key, creating it if needed"""
+        raise NotImplementedError
+
+    def find(self, collection: str, query: Optional[dict] = None, fields: Optional[list[str]] = None) -> AsyncIterator[dict]:
+        """Stream documents matching a query (equality, $lt/$lte/$gt/$gte/$ne/$in/$exists), optionally projected to `fields`"""
+        raise NotImplementedError
+
+    async def update_many(self, collection: str, query: dict, set_fields: Optional[dict] = None, inc: Optional[dict] = None) -> int:
+        """Apply one `$set`/`$inc` to every matching document server-side; returns how many matched"""
+        raise NotImplementedError
+
+    async def bulk_write(self, collection: str, ops: list[UpdateOp]) -> list[str]:
+        """Apply many partial updates (upserting) in a single round-trip
+
+        Returns the keys of ops skipped because their `expect_version` no longer matched.
+        """
+        raise NotImplementedError
+
+    async def delete_expired(self, now: datetime) -> int:
+        """Delete documents whose TTL_INDEXES date is at or before `now`; returns how many
+
+        A no-op where the database expires them itself (Mongo's TTL monitor).
+        """
+        return 0
+
+# --- In-Memory Store (tests, local development) ---
+class MemoryQuestStore(QuestStore):
+    """Dict-backed store; `latency` simulates a slow database round-trip"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.collections: dict[str, dict[str, dict]] = {name: {} for name in KEY_FIELDS}
+
+    async def _round_trip(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def get(self, collection: str, key: str) -> Optional[dict]:
+        await self._round_trip()
+        doc = self.collections.setdefault(collection, {}).get(key)
+        return copy.deepcopy(doc) if doc is not None else None
+
+    async def upsert(self, collection: str, key: str, fields: dict[str, Any]) -> None:
+        await self._round_trip()
+        self._apply_upsert(collection, key, fields)
+
+    async def find(self, collection: str, query: Optional[dict] = None, fields: Optional[list[str]] = None) -> AsyncIterator[dict]:
+        await self._round_trip()
+        query = query or {}
+        for doc in list(self.collections.setdefault(collection, {}).values()):
+            if _matches(doc, query):
+                if fields is not None:
+                    doc = {name: doc[name] for name in fields if name in doc}
+                yield copy.deepcopy(doc)
+
+    async def update_many(self, collection: str, query: dict, set_fields: Optional[dict] = None, inc: Optional[dict] = None) -> int:
+        await self._round_trip()
+        return self._apply_update_many(collection, query, set_fields, inc)
+
+    async def bulk_write(self, collection: str, ops: list[UpdateOp]) -> list[str]:
+        await self._round_trip()
+        return self._apply_bulk_write(collection, ops)
+
+    async def delete_expired(self, now: datetime) -> int:
+        await self._round_trip()
+        return sum(self._apply_expire(collection, date_field, now) for collection, date_field in TTL_INDEXES.items())
+
+    # Mutations proper, synchronous so a journal can replay them in order. Documents are
+    # copy-on-write: a change replaces the stored dict rather than editing it, so a shallow
+    # copy of a collection is a consistent image (see JournalQuestStore snapshots).
+    def _apply_upsert(self, collection: str, key: str, fields: dict[str, Any]) -> None:
+        docs = self.collections.setdefault(collection, {})
+        docs[key] = {**docs.get(key, {KEY_FIELDS[collection]: key}), **copy.deepcopy(fields)}
+
+    def _apply_update_many(self, collection: str, query: dict, set_fields: Optional[dict], inc: Optional[dict]) -> int:
+        docs = self.collections.setdefault(collection, {})
+        matched = [key for key, doc in docs.items() if _matches(doc, query)]
+        for key in matched:
+            doc = {**docs[key], **copy.deepcopy(set_fields or {})}
+            for name, delta in (inc or {}).items():
+                doc[name] = doc.get(name, 0) + delta
+            docs[key] = doc
+        return len(matched)
+
+    def _apply_bulk_write(self, collection: str, ops: list[UpdateOp]) -> list[str]:
+        docs = self.collections.setdefault(collection, {})
+        conflicts = []
+        for op in ops:
+            doc = docs.get(op.key)
+            if doc is not None and not _matches(doc, _version_query(op)):
+                conflicts.append(op.key)
+                continue
+            doc = dict(doc) if doc is not None else {KEY_FIELDS[collection]: op.key}
+            for name in op.unset:
+                doc.pop(name, None)
+            doc.update(copy.deepcopy(op.set_fields))
+            for name, values in op.add_to_set.items():
+                items = doc.get(name, [])
+                doc[name] = items + [v for v in dict.fromkeys(values) if v not in items]
+            docs[op.key] = doc
+        return conflicts
+
+    def _has_expired(self, collection: str, date_field: str, now: datetime) -> bool:
+        return any(_is_expired(doc.get(date_field), now) for doc in self.collections.setdefault(collection, {}).values())
+
+    def _apply_expire(self, collection: str, date_field: str, now: datetime) -> int:
+        docs = self.collections.setdefault(collection, {})
+        expired = [key for key, doc in docs.items() if _is_expired(doc.get(date_field), now)]
+        for key in expired:
+            del docs[key]
+        return len(expired)
+
+# --- MongoDB Store ---
+class MongoQuestStore(QuestStore):
+    """MongoDB store using PyMongo's native asyncio client"""
+
+    def __init__(self, uri: str, db_name: str):
+        self.uri = uri
+        self.db_name = db_name
+        self.client: AsyncMongoClient | None = None
+        self.db = None
+
+    async def connect(self) -> None:
+        if self.client is None:
+            self.client = AsyncMongoClient(self.uri)
+            self.db = self.client[self.db_name]
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+            self.db = None
+
+    async def ensure_indexes(self) -> None:
+        await self.connect()
+        for collection, key_field in KEY_FIELDS.items():
+            await self.db[collection].create_index(key_field, unique=True)
+        for collection, indexes in INDEXES.items():
+            for keys in indexes:
+                await self.db[collection].create_index(keys)
+        for collection, date_field in TTL_INDEXES.items():
+            await self.db[collection].create_index(date_field, expireAfterSeconds=0)
+
+    async def get(self, collection: str, key: str) -> Optional[dict]:
+        await self.connect()
+        return await self.db[collection].find_one({KEY_FIELDS[collection]: key}, {"_id": 0})
+
+    async def upsert(self, collection: str, key: str, fields: dict[str, Any]) -> None:
+        await self.connect()
+        await self.db[collection].update_one({KEY_FIELDS[collection]: key}, {"$set": fields}, upsert=True)
+
+    async def find(self, collection: str, query: Optional[dict] = None, fields: Optional[list[str]] = None) -> AsyncIterator[dict]:
+        await self.connect()
+        projection = {"_id": 0, **{name: 1 for name in fields}} if fields is not None else {"_id": 0}
+        async for doc in self.db[collection].find(query or {}, projection):
+            yield doc
+
+    async def update_many(self, collection: str, query: dict, set_fields: Optional[dict] = None, inc: Optional[dict] = None) -> int:
+        await self.connect()
+        update: dict[str, Any] = {}
+        if set_fields:
+            update["$set"] = set_fields
+        if inc:
+            update["$inc"] = inc
+        result = await self.db[collection].update_many(query, update)
+        return result.matched_count
+
+    async def bulk_write(self, collection: str, ops: list[UpdateOp]) -> list[str]:
+        await self.connect()
+        key_field = KEY_FIELDS[collection]
+        requests = []
+        keys = []
+        for op in ops:
+            update: dict[str, Any] = {}
+            if op.set_fields:
+                update["$set"] = op.set_fields
+            if op.add_to_set:
+                update["$addToSet"] = {name: {"$each": values} for name, values in op.add_to_set.items()}
+            if op.unset:
+                update["$unset"] = {name: "" for name in op.unset}
+            if update:
+                requests.append(UpdateOne({key_field: op.key, **_version_query(op)}, update, upsert=True))
+                keys.append(op.key)
+        if not requests:
+            return []
+        try:
+            await self.db[collection].bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            # A version-filtered upsert that misses an existing document collides with the unique key index
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != 11000 for error in errors):
+                raise
+            return [keys[error["index"]] for error in errors]
+        return []
+
+# --- Dirty-Field Tracking ---
+class TrackedModel(BaseModel):
+    """Pydantic model that remembers which fields changed since it was last persisted"""
+    _dirty: set[str] = PrivateAttr(default_factory=set)
+    _added: dict[str, list] = PrivateAttr(default_factory=dict)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._dirty.add(name)
+
+    def add_to_set(self, name: str, value: Any) -> bool:
+        """Add to a list/set field, recording only the new element for persistence"""
+        items = getattr(self, name)
+        if value in items:
+            return False
+        if isinstance(items, set):
+            items.add(value)
+        else:
+            items.append(value)
+        if name not in self._dirty:
+            self._added.setdefault(name, []).append(value)
+        return True
+
+    def mark_dirty(self, *names: str) -> None:
+        """Flag fields mutated in place (e.g. dict counters) for the next persist"""
+        self._dirty.update(names)
+
+    def mark_all_dirty(self) -> None:
+        self._dirty.update(type(self).model_fields)
+        self._added.clear()
+
+    def pop_changes(self, key: str) -> UpdateOp:
+        """Return the pending changes as an UpdateOp and start tracking afresh
+
+        Models with a `version` field write conditionally on the version they were loaded at.
+        """
+        op = UpdateOp(key=key)
+        if (self._dirty or self._added) and "version" in type(self).model_fields:
+            op.expect_version = self.version
+            super().__setattr__("version", self.version + 1)
+            self._dirty.add("version")
+        if self._dirty:
+            op.set_fields = self.model_dump(mode="json", include=self._dirty)
+        op.add_to_set = {name: values for name, values in self._added.items() if name not in self._dirty}
+        self._dirty = set()
+        self._added = {}
+        return op
+
+# --- Write-Behind Buffer ---
+class _PendingWrite:
+    __slots__ = ("model", "op")
+
+    def __init__(self, key: str):
+        self.model: Optional[TrackedModel] = None
+        self.op = UpdateOp(key=key)
+
+    def to_op(self) -> UpdateOp:
+        if self.model is not None:
+            self.op.merge(self.model.pop_changes(self.op.key))
+        return self.op
+
+class WriteBehindBuffer:
+    """Coalesces document updates for `delay` seconds and flushes them as one bulk_write per collection
+
+    A versioned update that loses to another writer can't be re-applied safely: its fields were
+    computed from the stale copy. It is dropped, but never silently: `conflicts` counts every
+    such acknowledged write and `lost` keeps the most recent ones for an operator to inspect.
+    """
+
+    def __init__(self, store: QuestStore, delay: float = 0.05, max_pending: int = 1000,
+                 on_conflict: Optional[Callable[[str, str], None]] = None):
+        self.store = store
+        self.delay = delay
+        self.max_pending = max_pending
+        self.on_conflict = on_conflict
+        self.conflicts = 0
+        self.lost: deque[tuple[str, UpdateOp]] = deque(maxlen=100)
+        self._pending: dict[str, dict[str, _PendingWrite]] = {}
+        self._in_flight: dict[str, dict[str, _PendingWrite]] = {}
+        self._count = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+
+    def _entry(self, collection: str, key: str) -> _PendingWrite:
+        entries = self._pending.setdefault(collection, {})
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = _PendingWrite(key)
+            self._count += 1
+        return entry
+
+    def __len__(self) -> int:
+        """Documents with writes staged or in flight"""
+        return self._count + sum(len(entries) for entries in self._in_flight.values())
+
+    def is_pending(self, collection: str, key: str) -> bool:
+        """True while a document still has writes staged or in flight"""
+        return key in self._pending.get(collection, ()) or key in self._in_flight.get(collection, ())
+
+    def pending_models(self, collection: str) -> Iterator[TrackedModel]:
+        """Models whose writes have not reached the store yet"""
+        for entries in (self._in_flight.get(collection, {}), self._pending.get(collection, {})):
+            for entry in entries.values():
+                if entry.model is not None:
+                    yield entry.model
+
+    def stage(self, collection: str, model: TrackedModel, new: bool = False) -> None:
+        """Queue a model's changed fields; `new` writes the whole document"""
+        if new:
+            model.mark_all_dirty()
+        self._entry(collection, getattr(model, KEY_FIELDS[collection])).model = model
+        self._schedule()
+
+    def stage_fields(self, collection: str, key: str, set_fields: Optional[dict] = None,
+                     add_to_set: Optional[dict] = None, unset: Optional[list[str]] = None) -> None:
+        """Queue a raw partial update for a document that has no tracked model"""
+        op = UpdateOp(key=key, set_fields=dict(set_fields or {}), add_to_set=dict(add_to_set or {}), unset=set(unset or ()))
+        self._entry(collection, key).op.merge(op)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._count >= self.max_pending:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.delay, self._start_flush)
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        """Write everything staged so far"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            pending, self._pending, self._count = self._pending, {}, 0
+            self._in_flight = pending
+            try:
+                await self._write(pending)
+            finally:
+                self._in_flight = {}
+
+    async def _write(self, pending: dict[str, dict[str, _PendingWrite]]) -> None:
+        for collection, entries in pending.items():
+            ops = [op for op in (entry.to_op() for entry in entries.values()) if op]
+            if not ops:
+                continue
+            try:
+                conflicts = await self.store.bulk_write(collection, ops)
+            except Exception:
+                logger.exception("Write-behind flush of %d %s updates failed; requeueing", len(ops), collection)
+                for op in ops:
+                    self._entry(collection, op.key).op.merge(op)
+                self._schedule()
+                continue
+            by_key = {op.key: op for op in ops}
+            for key in conflicts:
+                # Another writer got there first; its version wins and our stale copy is discarded
+                op = by_key[key]
+                self.conflicts += 1
+                self.lost.append((collection, op))
+                logger.error("Version conflict writing %s %s; dropped acknowledged update set=%s add_to_set=%s unset=%s",
+                             collection, key, op.set_fields, op.add_to_set, sorted(op.unset))
+                if self.on_conflict is not None:
+                    self.on_conflict(collection, key)
+
+    async def close(self) -> None:
+        """Flush-on-shutdown: drain in-flight and staged writes"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+
+# --- Striped Locks ---
+class StripedLocks:
+    """Fixed pool of asyncio locks picked by key hash: per-key mutual exclusion without a lock per key"""
+
+    def __init__(self, stripes: int = 1024):
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
+
+    def _index(self, key: str) -> int:
+        return hash(key) % len(self._locks)
+
+    def __call__(self, key: str) -> asyncio.Lock:
+        return self._locks[self._index(key)]
+
+    @asynccontextmanager
+    async def many(self, keys):
+        """Hold the locks for several keys, taken in stripe order so concurrent callers cannot deadlock"""
+        async with AsyncExitStack() as stack:
+            for i in sorted({self._index(key) for key in keys}):
+                await stack.enter_async_context(self._locks[i])
+            yield
+
+# --- Bounded Cache ---
+class LRUCache:
+    """Size-bounded mapping that evicts least-recently-used entries not pinned by `pinned(key)`"""
+
+    def __init__(self, maxsize: int, pinned: Optional[Callable[[str], bool]] = None):
+        self.maxsize = maxsize
+        self.pinned = pinned
+        self._data: OrderedDict[str, Any] = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def __getitem__(self, key: str) -> Any:
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._evict(keep=key)
+
+    def __delitem__(self, key: str) -> None:
+        del self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        return self._data.pop(key, default)
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        # Entries with unflushed writes are skipped so eviction never drops data, and the entry
+        # being inserted is kept even when everything older is pinned
+        attempts = len(self._data)
+        while len(self._data) > self.maxsize and attempts > 0:
+            attempts -= 1
+            key = next(iter(self._data))
+            if key == keep or (self.pinned is not None and self.pinned(key)):
+                self._data.move_to_end(key)
+                continue
+            del self._data[key]
+
+def make_store(mongo_uri: Optional[str], mongo_db: str, journal_dir: Optional[str] = None,
+               snapshot_every: int = 100_000) -> QuestStore:
+    """Pick the Mongo backend when MONGO_URI is configured, a local journal when JOURNAL_DIR is,
+    otherwise keep data in memory"""
+    if mongo_uri:
+        return MongoQuestStore(mongo_uri, mongo_db)
+    if journal_dir:
+        from quest_journal import JournalQuestStore
+        return JournalQuestStore(journal_dir, snapshot_every=snapshot_every)
+    return MemoryQuestStore()
@@ -0,0 +1,310 @@
+# Proof verification for the Quest & Rewards MCP Server
+# Submissions to "auto" quests are fetched and checked by a bounded pool of background workers,
+# so submit_proof returns immediately and a slow proof host only ever occupies one worker.
+
+import asyncio
+import importlib.util
+import io
+import ipaddress
+import logging
+import socket
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+import httpcore
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Largest image body downloaded for content checks
+MAX_PROOF_BYTES = 5 * 2**20
+# Content types accepted as proof: pictures, clips, or a page about the deed
+ALLOWED_CONTENT_TYPES = ("image/", "video/", "text/html")
+# Perceptual hashes at most this many bits apart (of 64) are treated as the same picture
+IMAGE_HASH_DISTANCE = 3
+
+@dataclass
+class FetchedProof:
+    submission_id: str
+    url: str
+    status_code: Optional[int] = None
+    content_type: str = ""
+    content: Optional[bytes] = None  # downloaded for images only
+    error: Optional[str] = None
+    image_hash: Optional[int] = None  # set by DuplicateImageCheck
+
+@dataclass
+class Verdict:
+    approved: bool
+    reasons: list[str] = field(default_factory=list)
+    image_hash: Optional[int] = None
+
+# A check returns why a proof should go to a human reviewer, or None when it passes
+ProofCheck = Callable[[FetchedProof], Awaitable[Optional[str]]]
+
+# --- Checks ---
+async def check_reachable(proof: FetchedProof) -> Optional[str]:
+    if proof.error:
+        return proof.error
+    if proof.status_code is None or proof.status_code >= 400:
+        return f"proof URL returned HTTP {proof.status_code}"
+    return None
+
+async def check_content_type(proof: FetchedProof) -> Optional[str]:
+    if not proof.content_type.startswith(ALLOWED_CONTENT_TYPES):
+        return f"unexpected content type {proof.content_type or 'unknown'}"
+    return None
+
+def dhash(content: bytes) -> int:
+    """64-bit difference hash: whether each pixel of a 9x8 grayscale thumbnail is brighter than its right neighbour"""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(content))
+    image.draft("L", (64, 64))  # JPEGs decode straight to a small grayscale image
+    pixels = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS).tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = value << 1 | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+class ImageHashIndex:
+    """Finds a stored hash within IMAGE_HASH_DISTANCE bits of a query without scanning them all
+
+    Hashes are split into IMAGE_HASH_DISTANCE + 1 bands; two hashes that close must agree
+    exactly on at least one band, so only hashes sharing a band are compared.
+    """
+
+    def __init__(self, distance: int = IMAGE_HASH_DISTANCE):
+        self.distance = distance
+        self.bands = distance + 1
+        self.width = 64 // self.bands
+        self._buckets: list[dict[int, list[tuple[int, str]]]] = [{} for _ in range(self.bands)]
+        self._owners: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def _band_values(self, value: int):
+        mask = (1 << self.width) - 1
+        return ((value >> (band * self.width)) & mask for band in range(self.bands))
+
+    def add(self, value: int, owner: str) -> None:
+        if owner in self._owners:
+            return
+        self._owners[owner] = value
+        for band, key in enumerate(self._band_values(value)):
+            self._buckets[band].setdefault(key, []).append((value, owner))
+
+    def find(self, value: int, exclude: Optional[str] = None) -> Optional[str]:
+        """Owner of a stored hash close to `value`, if any"""
+        for band, key in enumerate(self._band_values(value)):
+            for candidate, owner in self._buckets[band].get(key, ()):
+                if owner != exclude and (candidate ^ value).bit_count() <= self.distance:
+                    return owner
+        return None
+
+class DuplicateImageCheck:
+    """Flags a picture already used as proof, even re-encoded or resized
+
+    A picture that passes is claimed for its submission straight away, so two copies
+    checked at the same time cannot both get through.
+    """
+
+    def __init__(self, index: ImageHashIndex):
+        self.index = index
+
+    async def __call__(self, proof: FetchedProof) -> Optional[str]:
+        if proof.content is None:
+            return None
+        try:
+            proof.image_hash = await asyncio.to_thread(dhash, proof.content)
+        except Exception:
+            return "image could not be decoded"
+        original = self.index.find(proof.image_hash, exclude=proof.submission_id)
+        if original is not None:
+            return f"same picture as submission {original}"
+        self.index.add(proof.image_hash, proof.submission_id)
+        return None
+
+def default_checks(index: ImageHashIndex) -> list[ProofCheck]:
+    """Reachability and content type, plus image dedupe when Pillow is installed"""
+    checks: list[ProofCheck] = [check_reachable, check_content_type]
+    if importlib.util.find_spec("PIL") is not None:
+        checks.append(DuplicateImageCheck(index))
+    else:
+        logger.warning("Pillow is not installed; duplicate proof images will not be detected")
+    return checks
+
+# --- Verifier ---
+class PublicAddressBackend(httpcore.AsyncNetworkBackend):
+    """Resolves every host itself and connects only to the addresses it checked
+
+    Each new connection, including one opened for a redirect, is refused unless every
+    address the name resolves to is global: shorthand IPs like 127.1, names that map to
+    loopback, private networks and link-local metadata endpoints all fail here, and DNS
+    can't answer differently between the check and the connect.
+    """
+
+    def __init__(self, resolve_timeout: float = 5.0):
+        self.resolve_timeout = resolve_timeout
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            infos = await asyncio.wait_for(
+                asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM),
+                timeout or self.resolve_timeout)
+        except asyncio.TimeoutError:
+            raise httpcore.ConnectTimeout(f"resolving {host} timed out")
+        except OSError as e:
+            raise httpcore.ConnectError(f"could not resolve {host} ({e})")
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        for address in addresses:
+            if not ipaddress.ip_address(address.split("%")[0]).is_global:
+                raise httpcore.ConnectError(f"refusing to fetch private address {host} ({address})")
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError as e:
+                error = e
+        raise error or httpcore.ConnectError(f"no addresses for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise httpcore.ConnectError("unix sockets are not allowed")
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+class _PublicAddressTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, limits: httpx.Limits, resolve_timeout: float):
+        super().__init__(limits=limits, trust_env=False)
+        # httpx has no public hook for the network backend, so rebuild its connection pool with ours
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(trust_env=False),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=PublicAddressBackend(resolve_timeout),
+        )
+
+class ProofVerifier:
+    """Fetches proof URLs through one pooled HTTP client and runs the checks in order
+
+    The first failing check decides the verdict. Unless `allow_private` is set, hosts (and
+    redirect targets) that resolve to loopback or private addresses are refused.
+    """
+
+    def __init__(self, checks: list[ProofCheck], timeout: float = 5.0, max_bytes: int = MAX_PROOF_BYTES,
+                 max_connections: int = 20, allow_private: bool = False):
+        self.checks = checks
+        self.max_bytes = max_bytes
+        self.allow_private = allow_private
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout),
+            limits=limits,
+            # Environment proxies would connect on our behalf, past the address check
+            trust_env=False,
+            transport=None if allow_private else _PublicAddressTransport(limits, timeout),
+            follow_redirects=True,
+            max_redirects=3,
+            headers={"User-Agent": "quest-proof-verifier/1.0"},
+        )
+
+    async def fetch(self, submission_id: str, url: str) -> FetchedProof:
+        proof = FetchedProof(submission_id=submission_id, url=url)
+        if not url.lower().startswith(("http://", "https://")):
+            proof.error = "proof is not an http(s) URL"
+            return proof
+        try:
+            async with self.client.stream("GET", url) as response:
+                proof.status_code = response.status_code
+                proof.content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+                if response.status_code >= 400 or not proof.content_type.startswith("image/"):
+                    return proof  # headers are enough; skip the body
+                if int(response.headers.get("content-length") or 0) > self.max_bytes:
+                    proof.error = f"image larger than {self.max_bytes:,} bytes"
+                    return proof
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) > self.max_bytes:
+                        proof.error = f"image larger than {self.max_bytes:,} bytes"
+                        return proof
+                proof.content = bytes(body)
+        except httpx.TimeoutException:
+            proof.error = "proof URL timed out"
+        except httpx.HTTPError as e:
+            proof.error = f"proof URL could not be fetched ({e})"
+        return proof
+
+    async def verify(self, submission_id: str, url: str) -> Verdict:
+        proof = await self.fetch(submission_id, url)
+        for check in self.checks:
+            reason = await check(proof)
+            if reason is not None:
+                return Verdict(approved=False, reasons=[reason], image_hash=proof.image_hash)
+        return Verdict(approved=True, image_hash=proof.image_hash)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+# --- Worker Pool ---
+class VerificationPool:
+    """Bounded queue of submission ids drained by at most `workers` concurrent tasks
+
+    Workers start on demand on the running loop and exit once the queue is empty. When the
+    queue is full, submit() refuses and the submission simply waits for a human reviewer.
+    """
+
+    def __init__(self, handle: Callable[[str], Awaitable[str]], workers: int = 4, queue_size: int = 1000):
+        self.handle = handle
+        self.workers = workers
+        self.queue_size = queue_size
+        self.outcomes: Counter[str] = Counter()  # handler results, e.g. "approved" / "flagged"
+        self._queue: deque[str] = deque()
+        self._queued: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def submit(self, item: str) -> bool:
+        if item in self._queued:
+            return True
+        if len(self._queue) >= self.queue_size:
+            return False
+        self._queue.append(item)
+        self._queued.add(item)
+        if len(self._tasks) < self.workers:
+            task = asyncio.get_running_loop().create_task(self._work())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _work(self) -> None:
+        while self._queue:
+            item = self._queue.popleft()
+            try:
+                self.outcomes[await self.handle(item)] += 1
+            except Exception:
+                self.outcomes["failed"] += 1
+                logger.exception("Verification of %s failed", item)
+            finally:
+                self._queued.discard(item)
+
+    async def join(self) -> None:
+        """Wait until the queue is empty and every worker is idle"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Stop the workers; anything still queued stays pending for the next start"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._queue.clear()
+        self._queued.clear()
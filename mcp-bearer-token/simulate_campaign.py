@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Simulated-clock campaign driver for the Quest & Rewards MCP Server
+Replays users over simulated days at CPU speed through the real complete_quest tool, checks
+streaks, streak bonuses and the daily cap against an independent model, and times the daily reset
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+# Offline: the in-memory store, and the reset is driven here rather than by the scheduler
+os.environ["MONGO_URI"] = ""
+os.environ["DAILY_RESET_SCHEDULER"] = "0"
+
+import quest_rewards_mcp as server
+from quest_rewards_mcp import Quest, SECONDS_PER_DAY
+
+DAILY_XP_CAP = 15
+# Campaign day 0 starts at this UTC midnight (2025-01-01)
+START_EPOCH_DAY = 20089
+
+class SimulatedClock:
+    """Epoch-seconds clock that only moves when advanced"""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+class ExpectedUser:
+    """Reference model of the XP rules, written from the rules rather than from the server code
+
+    The streak on a day is the number of consecutive days, ending yesterday, on which the user
+    earned XP; it adds a bonus of streak // 7 (at most 3) per quest, and XP per UTC day is capped.
+    """
+    __slots__ = ("total_xp", "daily_xp", "run", "last_active_day")
+
+    def __init__(self):
+        self.total_xp = 0
+        self.daily_xp = 0
+        self.run = 0  # consecutive active days ending at last_active_day
+        self.last_active_day = None
+
+    def streak(self, day: int) -> int:
+        if self.last_active_day == day:
+            return self.run - 1
+        return self.run if self.last_active_day == day - 1 else 0
+
+    def complete(self, day: int, quest_xp: int) -> int:
+        if self.last_active_day != day:
+            self.daily_xp = 0
+        remaining = DAILY_XP_CAP - self.daily_xp
+        if remaining <= 0:
+            return 0
+        gain = min(quest_xp + min(self.streak(day) // 7, 3), remaining)
+        if self.last_active_day != day:
+            self.run = self.run + 1 if self.last_active_day == day - 1 else 1
+            self.last_active_day = day
+        self.daily_xp += gain
+        self.total_xp += gain
+        return gain
+
+def _seed_quests(days: int, per_day: int, rng: random.Random) -> dict[str, int]:
+    """A fresh set of auto-verified quests per day, so no quest is ever completed twice"""
+    quest_xp = {}
+    for day in range(days):
+        for j in range(per_day):
+            quest = Quest(
+                quest_id=f"sim_{day}_{j}",
+                title=f"📅 Day {day} quest {j}",
+                description="Simulated campaign quest",
+                xp_reward=rng.randint(1, 5),
+                quest_type=rng.choice(["climate", "social", "personal"]),
+                verification_method="auto",
+                created_by="admin",
+                created_at=server._now(),
+            )
+            server._register_quest(quest)
+            quest_xp[quest.quest_id] = quest.xp_reward
+    return quest_xp
+
+async def simulate(users: int, days: int, max_quests_per_day: int, reset: str, seed: int) -> dict:
+    rng = random.Random(seed)
+    clock = SimulatedClock(START_EPOCH_DAY * SECONDS_PER_DAY)
+    server.set_clock(clock)
+    await server._startup()
+    quest_xp = _seed_quests(days, max_quests_per_day, rng)
+
+    user_ids = [f"sim_user_{i}" for i in range(users)]
+    # Habits: from occasional visitors to daily regulars, so long streaks really occur
+    activity = [rng.uniform(0.3, 1.0) for _ in user_ids]
+    expected: dict[str, ExpectedUser] = {}
+
+    calls = 0
+    activity_s = 0.0
+    flush_s = []
+    reset_s = []
+    reset_users = 0
+    try:
+        for day in range(days + 1):
+            clock.now = (START_EPOCH_DAY + day) * SECONDS_PER_DAY
+            if reset == "bulk" and day > 0:
+                # The reset flushes the day's pending writes first; timed separately
+                start = time.perf_counter()
+                await server.write_buffer.flush()
+                flush_s.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                reset_users += await server._bulk_daily_reset(server._epoch_day())
+                reset_s.append(time.perf_counter() - start)
+            if day == days:
+                break  # the final midnight only settles streaks for verification
+
+            clock.advance(SECONDS_PER_DAY // 2)
+            start = time.perf_counter()
+            for user_id, chance in zip(user_ids, activity):
+                if rng.random() >= chance:
+                    continue
+                model = expected.setdefault(user_id, ExpectedUser())
+                for j in range(rng.randint(1, max_quests_per_day)):
+                    quest_id = f"sim_{day}_{j}"
+                    await server.complete_quest.fn(puch_user_id=user_id, quest_id=quest_id)
+                    model.complete(START_EPOCH_DAY + day, quest_xp[quest_id])
+                    calls += 1
+                    if calls % 1000 == 0:
+                        await asyncio.sleep(0)  # let the write-behind buffer flush
+            activity_s += time.perf_counter() - start
+
+        # Verify against the server's view on the day after the campaign
+        today = START_EPOCH_DAY + days
+        await server.write_buffer.flush()
+        streak_mismatches, xp_mismatches, stored_mismatches = [], [], []
+        bonus_users = [0, 0, 0, 0]
+        for user_id, model in expected.items():
+            user = await server._get_user(user_id)
+            server._reset_daily_xp_if_needed(user)
+            if user.streak_days != model.streak(today):
+                streak_mismatches.append((user_id, user.streak_days, model.streak(today)))
+            if user.total_xp != model.total_xp:
+                xp_mismatches.append((user_id, user.total_xp, model.total_xp))
+            bonus_users[min(model.streak(today) // 7, 3)] += 1
+        await server.write_buffer.flush()
+        for user_id, model in expected.items():
+            doc = await server.store.get("users", user_id)
+            if doc["total_xp"] != model.total_xp or doc["streak_days"] != model.streak(today):
+                stored_mismatches.append(user_id)
+    finally:
+        await server._shutdown()
+        server.set_clock(time.time)
+
+    return {
+        "users": users,
+        "active_users": len(expected),
+        "days": days,
+        "calls": calls,
+        "calls_per_s": calls / activity_s if activity_s else 0.0,
+        "reset_runs": len(reset_s),
+        "reset_users": reset_users,
+        "reset_ms_mean": sum(reset_s) / len(reset_s) * 1000 if reset_s else 0.0,
+        "reset_ms_max": max(reset_s, default=0.0) * 1000,
+        "reset_users_per_s": reset_users / sum(reset_s) if reset_s else 0.0,
+        "flush_ms_mean": sum(flush_s) / len(flush_s) * 1000 if flush_s else 0.0,
+        "longest_streak": max((model.run for model in expected.values()), default=0),
+        "bonus_users": bonus_users,
+        "streak_mismatches": streak_mismatches,
+        "xp_mismatches": xp_mismatches,
+        "stored_mismatches": stored_mismatches,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--quests-per-day", type=int, default=3, help="Most quests an active user completes per day")
+    parser.add_argument("--reset", choices=["bulk", "lazy"], default="bulk",
+                        help="bulk: reset every user at each midnight; lazy: users reset on their next call")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"⏩ Simulating {args.users:,} users over {args.days} days ({args.reset} daily reset)...\n")
+    result = asyncio.run(simulate(args.users, args.days, args.quests_per_day, args.reset, args.seed))
+
+    print(f"   • Quest completions: {result['calls']:,} by {result['active_users']:,} users "
+          f"({result['calls_per_s']:,.0f} calls/s)")
+    if result["reset_runs"]:
+        print(f"   • Daily reset: {result['reset_users'] / result['reset_runs']:,.0f} users per midnight, "
+              f"mean {result['reset_ms_mean']:.1f} ms | max {result['reset_ms_max']:.1f} ms "
+              f"({result['reset_users_per_s']:,.0f} users/s)")
+        print(f"   • Pending-write flush before each reset: mean {result['flush_ms_mean']:.1f} ms")
+    print(f"   • Longest streak: {result['longest_streak']} days")
+    print(f"   • Users by final streak bonus (+0/+1/+2/+3 XP): {' / '.join(f'{n:,}' for n in result['bonus_users'])}")
+
+    mismatches = result["streak_mismatches"] + result["xp_mismatches"]
+    for user_id, actual, wanted in mismatches[:10]:
+        print(f"   ❌ {user_id}: server {actual}, expected {wanted}")
+    if mismatches or result["stored_mismatches"]:
+        print(f"\n⚠️ {len(result['streak_mismatches'])} streak, {len(result['xp_mismatches'])} XP and "
+              f"{len(result['stored_mismatches'])} stored-document mismatches")
+        sys.exit(1)
+    print("\n✅ Streaks, streak bonuses and daily caps match the expected rules for every user")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Admission control tests for the Quest & Rewards MCP Server
+Checks token-bucket refill, idle-bucket eviction and load shedding
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from mcp import McpError
+
+from quest_admission import AdmissionMiddleware, TokenBucketLimiter, parse_rate_limits
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(parse_rate_limits("submit_proof:3/60"), clock=clock)
+    assert [limiter.acquire("submit_proof", "u1") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("submit_proof", "u1") == 20.0  # one token every 20 s
+    assert limiter.acquire("submit_proof", "u2") == 0.0  # other users have their own bucket
+    assert limiter.acquire("list_quests", "u1") == 0.0  # unlimited without a "*" entry
+    clock.now = 20.0
+    assert limiter.acquire("submit_proof", "u1") == 0.0
+
+def test_idle_buckets_are_evicted():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(parse_rate_limits("*:10/10"), clock=clock)
+    for i in range(1000):
+        limiter.acquire("complete_quest", f"user_{i}")
+    assert len(limiter) == 1000
+    clock.now = 10.0  # long enough for every bucket to refill completely
+    limiter.acquire("complete_quest", "late_user")
+    assert len(limiter) == 1
+
+def test_middleware_sheds_beyond_concurrency_cap():
+    async def scenario():
+        middleware = AdmissionMiddleware(TokenBucketLimiter({}), max_concurrent=2)
+        release = asyncio.Event()
+
+        async def slow_tool(context):
+            await release.wait()
+            return "ok"
+
+        def call(user_id: str):
+            context = SimpleNamespace(message=SimpleNamespace(name="complete_quest", arguments={"puch_user_id": user_id}))
+            return asyncio.ensure_future(middleware.on_call_tool(context, slow_tool))
+
+        running = [call("u1"), call("u2")]
+        await asyncio.sleep(0)
+        shed = call("u3")
+        try:
+            await shed
+            raise AssertionError("third concurrent call was admitted")
+        except McpError as e:
+            assert e.error.data == {"retry_after": 1.0}
+        release.set()
+        assert await asyncio.gather(*running) == ["ok", "ok"]
+        assert middleware.active == 0 and middleware.rejected == 1
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    print("🧪 Testing admission control...\n")
+    for test in (test_bucket_allows_burst_then_refills, test_idle_buckets_are_evicted,
+                 test_middleware_sheds_beyond_concurrency_cap):
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 Admission control works!")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compact user table tests for the Quest & Rewards MCP Server
+Checks CompactUser views track changes like User models, set columns answer membership,
+and the table stays within its bound by reusing the rows of evicted users
+"""
+
+from quest_columns import ALL_FIELDS, UserTable
+from quest_rewards_mcp import User
+
+def _user(user_id: str, **fields) -> User:
+    return User(**{"user_id": user_id, "name": f"Adventurer_{user_id}", "last_reset_day": 20000, "created_at": 1, **fields})
+
+def test_pop_changes_reports_only_what_changed():
+    table = UserTable()
+    table["u1"] = _user("u1", quests_completed=["q2", "q1"], version=3)
+    user = table["u1"]
+    assert not user.pop_changes("u1") and user.pop_changes("u1").expect_version is None  # storing is not a change
+
+    user.total_xp += 5
+    assert user.add_to_set("quests_completed", "q3") and not user.add_to_set("quests_completed", "q1")
+    user.add_to_set("rewards_claimed", "badge")
+    op = user.pop_changes("u1")
+    assert op.set_fields == {"total_xp": 5, "version": 4} and op.expect_version == 3
+    assert op.add_to_set == {"quests_completed": ["q3"], "rewards_claimed": ["badge"]}
+    assert not user.pop_changes("u1")
+
+    # Once a set column is rewritten whole, later additions ride along in set_fields
+    user.quests_completed = ["q9"]
+    user.add_to_set("quests_completed", "q8")
+    user.quest_counts["climate"] = 2
+    user.mark_dirty("quest_counts")
+    op = user.pop_changes("u1")
+    assert sorted(op.set_fields["quests_completed"]) == ["q8", "q9"] and not op.add_to_set
+    assert op.set_fields["quest_counts"] == {"climate": 2} and op.expect_version == 4
+
+    user.mark_all_dirty()
+    assert set(table["u1"].pop_changes("u1").set_fields) == set(ALL_FIELDS)
+
+def test_set_columns_answer_membership():
+    table = UserTable()
+    table["u1"] = _user("u1", quests_completed=[f"q{i}" for i in range(50, 0, -1)], rewards_claimed={"badge"})
+    user = table["u1"]
+    assert all(f"q{i}" in user.quests_completed for i in range(1, 51))
+    assert "q0" not in user.quests_completed and "q51" not in user.quests_completed and 7 not in user.quests_completed
+    assert user.add_to_set("quests_completed", "q0") and "q0" in user.quests_completed
+    assert len(user.quests_completed) == 51 and len(set(user.quests_completed)) == 51
+    assert "badge" in user.rewards_claimed and "q1" not in user.rewards_claimed
+
+def test_popped_rows_are_reused():
+    table = UserTable()
+    for user_id in ("u1", "u2"):
+        table[user_id] = _user(user_id, quests_completed=["q1"], xp_by_type={"climate": 5})
+    stale = table["u1"]
+    popped = table.pop("u1")
+    assert popped["user_id"] == "u1" and popped["quests_completed"] == ["q1"] and table.pop("u1") is None
+    table["u3"] = _user("u3")
+    assert len(table._ids) == 2 and table["u3"]._row == stale._row
+    fresh = table["u3"]
+    assert list(fresh.quests_completed) == [] and dict(fresh.xp_by_type.items()) == {} and fresh.name == "Adventurer_u3"
+    for use in (lambda: stale.total_xp, lambda: stale.add_to_set("quests_completed", "q2"), lambda: "q1" in stale.quests_completed):
+        try:
+            use()
+        except LookupError:
+            continue
+        raise AssertionError("a view outlived its row")
+    assert table["u2"].xp_by_type["climate"] == 5
+
+def test_table_stays_within_its_bound():
+    pinned = {"u0"}
+    table = UserTable(maxsize=3, pinned=pinned.__contains__)
+    for i in range(10):
+        table[f"u{i}"] = _user(f"u{i}", total_xp=i)
+        table.get("u1")  # recently used, so never the one evicted
+    assert set(table) == {"u0", "u1", "u9"}
+    assert len(table._ids) == 4  # one row over the bound while inserting; the rest were recycled
+    assert [table[user_id].total_xp for user_id in ("u0", "u1", "u9")] == [0, 1, 9]
+
+if __name__ == "__main__":
+    print("🧪 Testing the compact user table...\n")
+    for test in (test_pop_changes_reports_only_what_changed, test_set_columns_answer_membership,
+                 test_popped_rows_are_reused, test_table_stays_within_its_bound):
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 Compact users track changes and stay bounded!")
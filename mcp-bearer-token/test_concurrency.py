@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for the Quest & Rewards MCP Server
+Hammers one user and many users in parallel and checks the XP invariants still hold
+"""
+
+import asyncio
+import time
+
+from mcp import McpError
+
+from conftest import run
+import quest_rewards_mcp as server
+from quest_rewards_mcp import Quest
+
+AUTO_QUESTS = [f"stress_auto_{i}" for i in range(8)]
+
+async def _setup():
+    if not server.QUESTS:
+        await server._startup()
+    if hasattr(server.store, "latency"):
+        server.store.latency = 0.001  # simulated database round-trip so handlers really interleave
+    for quest_id in AUTO_QUESTS:
+        if quest_id not in server.QUESTS:
+            server._register_quest(Quest(
+                quest_id=quest_id,
+                title=f"⚡ {quest_id}",
+                description="Auto-verified stress quest",
+                xp_reward=5,
+                quest_type="climate",
+                verification_method="auto",
+                created_by="admin",
+                created_at=server._now(),
+            ))
+
+async def _call(tool, **kwargs) -> bool:
+    """True if the tool succeeded, False if it refused with an McpError"""
+    try:
+        await tool.fn(**kwargs)
+        return True
+    except McpError:
+        return False
+
+async def _evict(user_id: str):
+    """Flush and drop a cached user so the next calls all race on loading it"""
+    await server.write_buffer.flush()
+    server.USERS.pop(user_id, None)
+
+async def _stored_user(user_id: str) -> dict:
+    await server.write_buffer.flush()
+    return await server.store.get("users", user_id)
+
+def test_same_quest_completed_once():
+    async def scenario():
+        await _setup()
+        user_id = "stress_same_quest"
+        await server._get_user(user_id)
+        await _evict(user_id)
+        results = await asyncio.gather(*(
+            _call(server.complete_quest, puch_user_id=user_id, quest_id=AUTO_QUESTS[0]) for _ in range(50)
+        ))
+        user = await server._get_user(user_id)
+        assert sum(results) == 1, f"{sum(results)} completions of one quest"
+        assert user.total_xp == 5
+        assert (await _stored_user(user_id))["total_xp"] == 5
+    run(scenario())
+
+def test_daily_cap_under_concurrency():
+    async def scenario():
+        await _setup()
+        user_id = "stress_daily_cap"
+        await server._get_user(user_id)
+        await _evict(user_id)
+        await asyncio.gather(*(
+            _call(server.complete_quest, puch_user_id=user_id, quest_id=quest_id) for quest_id in AUTO_QUESTS
+        ))
+        user = await server._get_user(user_id)
+        assert user.daily_xp == 15, f"daily_xp {user.daily_xp} != 15 cap"
+        assert user.total_xp == 15
+        assert (await _stored_user(user_id))["daily_xp"] == 15
+    run(scenario())
+
+def test_submission_reviewed_once():
+    async def scenario():
+        await _setup()
+        user_id = "stress_review"
+        await server.submit_proof.fn(puch_user_id=user_id, quest_id="plant_tree", proof_text="planted")
+        submission_id = next(iter(server.PENDING_QUEUE.page(limit=1000, accept=lambda s: s.user_id == user_id)[0])).submission_id
+        await _evict(user_id)
+        results = await asyncio.gather(*(
+            _call(server.review_submission, reviewer_id="admin", submission_id=submission_id, approve=True)
+            for _ in range(20)
+        ))
+        user = await server._get_user(user_id)
+        assert sum(results) == 1, f"{sum(results)} approvals of one submission"
+        assert user.total_xp == server.QUESTS["plant_tree"].xp_reward
+    run(scenario())
+
+def test_review_after_eviction_approves_once():
+    async def scenario():
+        await _setup()
+        user_id = "stress_review_evicted"
+        await server.submit_proof.fn(puch_user_id=user_id, quest_id="plant_tree", proof_text="planted")
+        submission_id = server.PENDING_QUEUE.page(limit=1000, accept=lambda s: s.user_id == user_id)[0][0].submission_id
+        review = lambda: _call(server.review_submission, reviewer_id="admin", submission_id=submission_id, approve=True)
+        async with server.USER_LOCKS(user_id):
+            first = asyncio.ensure_future(review())
+            await asyncio.sleep(0.05)  # holds its copy of the submission, waiting for the lock
+            await server.write_buffer.flush()
+            server.SUBMISSIONS.pop(submission_id)  # evicted from the LRU meanwhile
+            second = asyncio.ensure_future(review())  # loads a fresh, still pending copy
+            await asyncio.sleep(0.05)
+        results = await asyncio.gather(first, second)
+        assert sum(results) == 1, f"{sum(results)} approvals of one evicted submission"
+        assert (await _stored_user(user_id))["total_xp"] == server.QUESTS["plant_tree"].xp_reward
+    run(scenario())
+
+def test_batch_review_after_eviction_approves_once():
+    async def scenario():
+        await _setup()
+        user_id = "stress_batch_evicted"
+        await server.submit_proof.fn(puch_user_id=user_id, quest_id="plant_tree", proof_text="planted")
+        submission_id = server.PENDING_QUEUE.page(limit=1000, accept=lambda s: s.user_id == user_id)[0][0].submission_id
+        decision = server.ReviewDecision(submission_id=submission_id, approve=True)
+        async with server.USER_LOCKS(user_id):
+            batch = asyncio.ensure_future(server.review_submissions_batch.fn(reviewer_id="admin", decisions=[decision]))
+            await asyncio.sleep(0.05)  # has read the submission, waiting for the lock
+            await server.write_buffer.flush()
+            server.SUBMISSIONS.pop(submission_id)
+            server.USERS.pop(user_id, None)
+            single = asyncio.ensure_future(_call(server.review_submission, reviewer_id="admin",
+                                                 submission_id=submission_id, approve=True))
+            await asyncio.sleep(0.05)
+        batch_result, single_result = await asyncio.gather(batch, single)
+        approvals = batch_result[0].text.count("✅") + single_result
+        assert approvals == 1, f"{approvals} approvals of one evicted submission"
+        assert (await _stored_user(user_id))["total_xp"] == server.QUESTS["plant_tree"].xp_reward
+    run(scenario())
+
+def test_reward_claimed_once():
+    async def scenario():
+        await _setup()
+        user_id = "stress_claim"
+        await server._get_user(user_id)
+        await _evict(user_id)
+        results = await asyncio.gather(*(
+            _call(server.claim_reward, puch_user_id=user_id, reward_id="first_quest") for _ in range(20)
+        ))
+        assert sum(results) == 1, f"{sum(results)} claims of one reward"
+        assert (await _stored_user(user_id))["rewards_claimed"] == ["first_quest"]
+    run(scenario())
+
+def test_idempotent_retries():
+    async def scenario():
+        await _setup()
+        user_id = "stress_retry"
+        retries = await asyncio.gather(*(
+            server.submit_proof.fn(puch_user_id=user_id, quest_id="plant_tree", proof_text="planted", idempotency_key="retry-1")
+            for _ in range(10)
+        ))
+        assert len({response[0].text for response in retries}) == 1, "retries got different responses"
+        pending = server.PENDING_QUEUE.page(limit=1000, accept=lambda s: s.user_id == user_id)[0]
+        assert len(pending) == 1, f"{len(pending)} submissions created by retries"
+        # Reusing the key for a different request is refused
+        assert not await _call(server.submit_proof, puch_user_id=user_id, quest_id="plant_tree",
+                               proof_text="something else", idempotency_key="retry-1")
+        # Replays survive losing the in-memory cache
+        await server.write_buffer.flush()
+        server.IDEMPOTENCY._entries.clear()
+        replay = await server.submit_proof.fn(puch_user_id=user_id, quest_id="plant_tree", proof_text="planted",
+                                              idempotency_key="retry-1")
+        assert replay[0].text == retries[0][0].text
+    run(scenario())
+
+def test_version_conflict_discards_stale_copy():
+    async def scenario():
+        await _setup()
+        user_id = "stress_conflict"
+        user = await server._get_user(user_id)
+        await server.write_buffer.flush()
+        # A second server instance writes the document behind our back
+        doc = await server.store.get("users", user_id)
+        await server.store.upsert("users", user_id, {"total_xp": 99, "version": doc["version"] + 1})
+        user.total_xp = 1
+        server._persist("users", user)
+        conflicts = server.write_buffer.conflicts
+        stored = await _stored_user(user_id)
+        assert stored["total_xp"] == 99, "stale write overwrote a newer version"
+        # The dropped write is reported, not lost silently
+        assert server.write_buffer.conflicts == conflicts + 1
+        collection, op = server.write_buffer.lost[-1]
+        assert (collection, op.key, op.set_fields["total_xp"]) == ("users", user_id, 1)
+        assert "degraded" in await server.health_check.fn()
+        assert f"quest_write_conflicts_total {conflicts + 1}" in server.METRICS.render()
+        assert user_id not in server.USERS
+        assert (await server._get_user(user_id)).total_xp == 99
+    run(scenario())
+
+def test_many_users_throughput(users: int = 500, min_ops_per_s: float = 200.0):
+    async def scenario():
+        await _setup()
+        user_ids = [f"stress_many_{i}" for i in range(users)]
+        calls = [(user_id, quest_id) for user_id in user_ids for quest_id in AUTO_QUESTS[:3]]
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _call(server.complete_quest, puch_user_id=user_id, quest_id=quest_id) for user_id, quest_id in calls
+        ))
+        elapsed = time.perf_counter() - start
+        for user_id in user_ids:
+            assert (await server._get_user(user_id)).total_xp == 15
+        ops_per_s = len(calls) / elapsed
+        print(f"   • {len(calls)} completions across {users} users: {ops_per_s:,.0f} ops/s")
+        assert ops_per_s >= min_ops_per_s, f"throughput {ops_per_s:.0f} ops/s below {min_ops_per_s}"
+    run(scenario())
+
+if __name__ == "__main__":
+    print("🧪 Stress-testing concurrent quest traffic...\n")
+    for test in (test_same_quest_completed_once, test_daily_cap_under_concurrency, test_submission_reviewed_once,
+                 test_review_after_eviction_approves_once,
+                 test_batch_review_after_eviction_approves_once, test_reward_claimed_once, test_idempotent_retries, test_version_conflict_discards_stale_copy,
+                 test_many_users_throughput):
+        test()
+        print(f"✅ {test.__name__}")
+    run(server._shutdown())
+    print("\n🎉 All concurrency invariants held!")
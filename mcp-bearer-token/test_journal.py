@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Journal store tests for the Quest & Rewards MCP Server
+Checks writes survive restarts, torn tails are dropped, snapshots bound replay without
+catching later writes, and fsyncs are grouped
+"""
+
+import asyncio
+import copy
+import os
+import pickle
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+from conftest import run
+import quest_journal
+from quest_journal import JournalQuestStore
+from quest_storage import UpdateOp
+
+async def _write_users(store: JournalQuestStore, count: int, start: int = 0) -> None:
+    await asyncio.gather(*(store.bulk_write("users", [UpdateOp(key=f"u{i}", set_fields={"total_xp": i}, add_to_set={"quests_completed": ["q1"]})])
+                           for i in range(start, start + count)))
+
+def _reopen(directory: str, **kwargs) -> JournalQuestStore:
+    store = JournalQuestStore(directory, **kwargs)
+    run(store.connect())
+    return store
+
+def _crash(store: JournalQuestStore) -> None:
+    """Stop without the final snapshot, as a killed process would (its directory lock goes with it)"""
+    store.journal.close()
+    store._unlock()
+
+def test_writes_survive_a_restart_without_close():
+    with tempfile.TemporaryDirectory() as directory:
+        store = _reopen(directory)
+        run(_write_users(store, 50))
+        run(store.upsert("idempotency", "k1", {"expires_at": datetime(2030, 1, 1)}))
+        assert run(store.update_many("users", {"total_xp": {"$gte": 40}}, inc={"total_xp": 100})) == 10
+        conflicts = run(store.bulk_write("users", [UpdateOp(key="u1", set_fields={"total_xp": 0}, expect_version=7)]))
+        assert conflicts == ["u1"]
+        _crash(store)  # no final snapshot
+
+        recovered = _reopen(directory)
+        assert recovered.collections == store.collections
+        assert recovered.collections["idempotency"]["k1"]["expires_at"] == datetime(2030, 1, 1)
+        assert recovered.recovery["replayed_records"] == 53
+        run(recovered.close())
+
+def test_torn_tail_is_truncated():
+    with tempfile.TemporaryDirectory() as directory:
+        store = _reopen(directory)
+        run(_write_users(store, 5))
+        path = store.journal.path(store.journal.segment)
+        _crash(store)
+        intact = os.path.getsize(path)
+        with open(path, "ab") as f:
+            f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00half a reco")  # crash mid-append
+
+        recovered = _reopen(directory)
+        assert len(recovered.collections["users"]) == 5 and os.path.getsize(path) == intact
+        run(_write_users(recovered, 1, start=5))
+        _crash(recovered)
+        final = _reopen(directory)
+        assert len(final.collections["users"]) == 6
+        run(final.close())
+
+def test_snapshots_compact_the_journal():
+    with tempfile.TemporaryDirectory() as directory:
+        store = _reopen(directory, snapshot_every=20)
+        for batch in range(5):
+            run(_write_users(store, 10, start=batch * 10))
+            run(store._snapshotting or asyncio.sleep(0))
+        _crash(store)
+        files = sorted(os.listdir(directory))
+        assert sum(name.startswith("snapshot-") for name in files) == 1, files
+        recovered = _reopen(directory)
+        assert recovered.collections == store.collections and recovered.recovery["replayed_records"] < 20
+
+        run(recovered.close())  # a clean shutdown leaves one snapshot and nothing to replay
+        assert all(name.startswith("snapshot-") for name in os.listdir(directory) if name != "LOCK")
+        final = _reopen(directory)
+        assert final.collections == store.collections and final.recovery["replayed_records"] == 0
+        run(final.close())
+
+def test_snapshot_is_taken_between_batches():
+    with tempfile.TemporaryDirectory() as directory:
+        store = _reopen(directory, snapshot_every=10)
+        release = threading.Event()
+        write_snapshot = store._write_snapshot
+        store._write_snapshot = lambda segment, image: (release.wait(5), write_snapshot(segment, image))
+
+        async def scenario():
+            await _write_users(store, 10)
+            assert store._snapshotting is not None
+            before = copy.deepcopy(store.collections)
+            # The server keeps writing while the snapshot thread is still pickling
+            await store.bulk_write("users", [UpdateOp(key="u0", set_fields={"total_xp": 999}, add_to_set={"quests_completed": ["q2"]})])
+            await store.update_many("users", {}, inc={"total_xp": 1})
+            await _write_users(store, 3, start=10)
+            release.set()
+            await store._snapshotting
+            return before
+
+        before = run(scenario())
+        _, path = store._files(quest_journal._SNAPSHOT)[-1]
+        with open(path, "rb") as f:
+            assert pickle.load(f) == before  # exactly the state when the snapshot was cut
+        _crash(store)
+        recovered = _reopen(directory)
+        assert recovered.collections == store.collections and recovered.collections["users"]["u0"]["quests_completed"] == ["q1", "q2"]
+        run(recovered.close())
+
+def test_concurrent_writes_share_fsyncs():
+    with tempfile.TemporaryDirectory() as directory:
+        store = _reopen(directory)
+        run(_write_users(store, 200))
+        print(f"   • {store.journal.records} appends in {store.journal.batches} fsyncs")
+        assert store.journal.records == 200 and store.journal.batches < 200
+        run(store.close())
+
+def test_expired_idempotency_records_are_deleted():
+    with tempfile.TemporaryDirectory() as directory:
+        store = _reopen(directory)
+        run(store.upsert("idempotency", "old", {"expires_at": datetime(2020, 1, 1)}))
+        run(store.upsert("idempotency", "new", {"expires_at": datetime(2030, 1, 1, tzinfo=timezone.utc)}))
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        assert run(store.delete_expired(now)) == 1 and list(store.collections["idempotency"]) == ["new"]
+        assert run(store.delete_expired(now)) == 0 and store.journal.records == 3  # nothing left to journal
+        _crash(store)
+
+        recovered = _reopen(directory)  # the deletion is replayed, not resurrected
+        assert list(recovered.collections["idempotency"]) == ["new"]
+        run(recovered.close())
+
+def test_a_second_store_cannot_open_the_directory():
+    with tempfile.TemporaryDirectory() as directory:
+        store = _reopen(directory)
+        run(_write_users(store, 3))
+        try:
+            _reopen(directory)
+        except RuntimeError as e:
+            assert "in use by another server process" in str(e)
+        else:
+            raise AssertionError("two stores opened the same journal")
+        run(store.close())  # a clean shutdown releases the directory
+        reopened = _reopen(directory)
+        assert len(reopened.collections["users"]) == 3
+        run(reopened.close())
+
+if __name__ == "__main__":
+    print("🧪 Testing the journal store...\n")
+    for test in (test_writes_survive_a_restart_without_close, test_torn_tail_is_truncated,
+                 test_snapshots_compact_the_journal, test_snapshot_is_taken_between_batches, test_concurrent_writes_share_fsyncs,
+                 test_expired_idempotency_records_are_deleted, test_a_second_store_cannot_open_the_directory):
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 Journaled writes are durable and recover quickly!")
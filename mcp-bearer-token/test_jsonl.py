@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+JSONL import/export tests for the Quest & Rewards MCP Server
+Round-trips collections, checks invalid rows are reported, memory stays flat and live indexes update
+"""
+
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+
+from mcp import McpError
+
+from conftest import run
+import quest_rewards_mcp as server
+from quest_jsonl import import_jsonl, export_jsonl
+from quest_rewards_mcp import Quest, User
+from quest_storage import MemoryQuestStore, QuestStore
+
+def _quest_line(i: int, **overrides) -> str:
+    return json.dumps({
+        "quest_id": f"jsonl_{i}", "title": f"🌿 Imported quest {i}", "description": "Loaded from a JSONL seed file",
+        "xp_reward": 1 + i % 5, "quest_type": "climate", "created_by": "admin", "created_at": "2025-01-01T00:00:00",
+        **overrides,
+    }) + "\n"
+
+class CountingStore(QuestStore):
+    """Discards writes, counting bulk_write calls, so only the importer's own memory is measured"""
+
+    def __init__(self):
+        self.bulk_writes = 0
+        self.rows = 0
+
+    async def bulk_write(self, collection, ops):
+        self.bulk_writes += 1
+        self.rows += len(ops)
+        return []
+
+def test_round_trip_preserves_documents():
+    source, target = MemoryQuestStore(), MemoryQuestStore()
+    user = User(user_id="u1", name="Ana", total_xp=42, last_reset_day=20000, created_at=1728000000,
+                rewards_claimed={"first_quest"}, xp_by_type={"climate": 42}, version=3)
+    run(source.upsert("users", "u1", user.model_dump(mode="json")))
+    out = io.StringIO()
+    assert run(export_jsonl(source, "users", out)) == 1
+    report = run(import_jsonl(target, "users", io.StringIO(out.getvalue()), User))
+    assert (report.imported, report.rejected) == (1, 0)
+    assert target.collections["users"] == source.collections["users"]
+
+def test_invalid_rows_are_reported_and_skipped():
+    store = CountingStore()
+    lines = [_quest_line(i) for i in range(5)]
+    lines[1] = _quest_line(1, xp_reward="lots")
+    lines[3] = "{oops\n"
+    report = run(import_jsonl(store, "quests", ["\n", *lines], Quest, chunk_size=2))
+    assert (report.imported, report.rejected) == (3, 2)
+    assert report.errors[0].startswith("line 3: xp_reward") and report.errors[1].startswith("line 5: invalid JSON")
+    assert store.bulk_writes == 2  # chunks of 2 valid rows
+
+def test_import_memory_stays_flat(rows: int = 20000, max_peak_mb: float = 8.0):
+    store = CountingStore()
+    tracemalloc.start()
+    try:
+        report = run(import_jsonl(store, "quests", (_quest_line(i) for i in range(rows)), Quest))
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+    print(f"   • {rows} rows in {store.bulk_writes} bulk writes, peak {peak_mb:.1f} MB")
+    assert report.imported == store.rows == rows and store.bulk_writes == rows // 1000
+    assert peak_mb < max_peak_mb, f"import peaked at {peak_mb:.1f} MB"
+
+def test_admin_tools_update_live_indexes():
+    async def scenario():
+        if not server.QUESTS:
+            await server._startup()
+        settings = server.JSONL_DIR, server.ADMIN_IDS
+        with tempfile.TemporaryDirectory() as directory:
+            server.JSONL_DIR, server.ADMIN_IDS = directory, {"ops_admin"}
+            with open(os.path.join(directory, "seed.jsonl"), "w") as f:
+                f.writelines(_quest_line(i, title=f"🌿 Mangrove planting {i}") for i in range(3))
+            imported = await server.import_collection.fn(admin_id="ops_admin", collection="quests", file_name="seed.jsonl")
+            assert "Imported 3 quests" in imported[0].text
+            found = await server.search_quests.fn(puch_user_id="jsonl_user", query="mangrove")
+            assert found[0].text.count("🆔") == 3
+            listed = await server.list_quests.fn(puch_user_id="jsonl_user", quest_type="climate", limit=100, compact=True)
+            assert {"jsonl_0", "jsonl_1", "jsonl_2"} <= {item["quest_id"] for item in json.loads(listed[0].text)["items"]}
+
+            exported = await server.export_collection.fn(admin_id="ops_admin", collection="quests", file_name="backup.jsonl")
+            stored = [doc async for doc in server.store.find("quests")]  # other tests seed QUESTS without persisting
+            with open(os.path.join(directory, "backup.jsonl")) as f:
+                assert [json.loads(line) for line in f] == stored
+            assert f"Exported {len(stored)} quests" in exported[0].text
+
+            for admin_id, file_name in (("someone", "seed.jsonl"), ("ops_admin", "../seed.jsonl"), ("ops_admin", "seed.txt")):
+                try:
+                    await server.import_collection.fn(admin_id=admin_id, collection="quests", file_name=file_name)
+                except McpError:
+                    continue
+                raise AssertionError(f"import by {admin_id} from {file_name} was allowed")
+        server.JSONL_DIR, server.ADMIN_IDS = settings
+    run(scenario())
+
+if __name__ == "__main__":
+    print("🧪 Testing JSONL import/export...\n")
+    for test in (test_round_trip_preserves_documents, test_invalid_rows_are_reported_and_skipped,
+                 test_import_memory_stays_flat, test_admin_tools_update_live_indexes):
+        test()
+        print(f"✅ {test.__name__}")
+    run(server._shutdown())
+    print("\n🎉 Bulk import and export work!")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Leaderboard tests for the Quest & Rewards MCP Server
+Checks ranks with ties, paged top-N, score changes and removal against a brute-force ranking,
+and that the daily board starts afresh on a new UTC day
+"""
+
+import random
+
+import quest_rewards_mcp as server
+from quest_indexes import Leaderboard
+
+def _expected_rank(scores: dict[str, int], user_id: str) -> int:
+    return 1 + sum(score > scores[user_id] for score in scores.values())
+
+def test_ties_share_a_rank_and_keep_arrival_order():
+    board = Leaderboard()
+    for user_id, score in (("ana", 10), ("ben", 30), ("cai", 10), ("dev", 20), ("eli", 30)):
+        board.update(user_id, score)
+    assert [board.rank(u) for u in ("ben", "eli", "dev", "ana", "cai")] == [1, 1, 3, 4, 4]
+    assert board.top(10) == [("ben", 30), ("eli", 30), ("dev", 20), ("ana", 10), ("cai", 10)]
+    assert board.rank("nobody") is None and board.score("nobody") is None
+
+def test_top_pages_with_offset():
+    board = Leaderboard()
+    for i, score in enumerate((5, 9, 9, 9, 1, 7)):
+        board.update(f"u{i}", score)
+    everyone = board.top(100)
+    assert [score for _, score in everyone] == [9, 9, 9, 7, 5, 1]
+    assert [board.top(2, offset) for offset in (0, 2, 4, 6)] == [everyone[0:2], everyone[2:4], everyone[4:6], []]
+    assert board.top(2, 1) == everyone[1:3]  # an offset inside a tied bucket
+
+def test_updates_and_removal_match_brute_force():
+    rng = random.Random(7)
+    board, scores = Leaderboard(capacity=4), {}  # small capacity so the tree has to grow
+    for _ in range(3000):
+        user_id = f"u{rng.randrange(60)}"
+        if rng.random() < 0.1:
+            board.remove(user_id)
+            scores.pop(user_id, None)
+        else:
+            scores[user_id] = rng.randrange(5000) if rng.random() < 0.2 else scores.get(user_id, 0) + rng.randrange(30)
+            board.update(user_id, scores[user_id])
+    assert len(board) == len(scores)
+    assert all(board.rank(user_id) == _expected_rank(scores, user_id) for user_id in scores)
+    assert [score for _, score in board.top(len(scores))] == sorted(scores.values(), reverse=True)
+
+    # A user who moves to another score is listed once, behind those already there
+    board.add_if_absent("late", 0)
+    board.update("late", board.top(1)[0][1])
+    assert board.top(len(board)).count(("late", board.score("late"))) == 1
+    board.add_if_absent("late", 0)  # never overwrites a live score
+    assert board.rank("late") == 1 and [u for u, _ in board.top(len(board))].index("late") > 0
+
+def test_daily_board_rolls_over_at_utc_midnight():
+    clock = server._clock
+    boards = dict(server.LEADERBOARDS)  # other tests' boards, restored below
+    day = 20000
+    try:
+        server.set_clock(lambda: day * server.SECONDS_PER_DAY + 3600)
+        server._daily_board().update("night_owl", 12)
+        assert f"daily:{day}" in server.LEADERBOARDS and server._daily_board().rank("night_owl") == 1
+
+        server.set_clock(lambda: (day + 1) * server.SECONDS_PER_DAY)
+        today = server._daily_board()
+        assert len(today) == 0 and "night_owl" not in today
+        assert [key for key in server.LEADERBOARDS if key.startswith("daily:")] == [f"daily:{day + 1}"]
+    finally:
+        server.set_clock(clock)
+        server.LEADERBOARDS.clear()
+        server.LEADERBOARDS.update(boards)
+
+if __name__ == "__main__":
+    print("🧪 Testing leaderboards...\n")
+    for test in (test_ties_share_a_rank_and_keep_arrival_order, test_top_pages_with_offset,
+                 test_updates_and_removal_match_brute_force, test_daily_board_rolls_over_at_utc_midnight):
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 Leaderboards rank correctly!")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Metrics tests for the Quest & Rewards MCP Server
+Checks histogram buckets and quantiles, tool and storage error counting, and that the stats
+tool and /metrics refuse callers without credentials
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from mcp import ErrorData, McpError
+from mcp.types import INVALID_PARAMS
+from starlette.testclient import TestClient
+
+from conftest import run
+import quest_rewards_mcp as server
+from quest_metrics import Histogram, Metrics, MetricsMiddleware, instrument_store
+from quest_storage import MemoryQuestStore, UpdateOp
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram((0.1, 0.5, 1.0))
+    assert histogram.quantile(0.5) == 0.0
+    for value in (0.05, 0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value)
+    assert histogram.counts == [3, 1, 0, 1] and histogram.count == 5  # bounds are inclusive, like `le`
+    assert abs(histogram.total - 2.5) < 1e-9
+    assert abs(histogram.quantile(0.5) - 0.1 * 2.5 / 3) < 1e-9  # interpolated inside the first bucket
+    assert abs(histogram.quantile(0.7) - 0.3) < 1e-9
+    assert histogram.quantile(1.0) == 1.0  # the +Inf bucket reports its lower bound
+
+    metrics = Metrics(buckets=(0.1, 0.5, 1.0))
+    for seconds in (0.05, 0.3, 2.0):
+        metrics.observe_tool("list_quests", seconds, error=False)
+    text = metrics.render()
+    for line in ('quest_tool_latency_seconds_bucket{tool="list_quests",le="0.1"} 1',
+                 'quest_tool_latency_seconds_bucket{tool="list_quests",le="0.5"} 2',
+                 'quest_tool_latency_seconds_bucket{tool="list_quests",le="+Inf"} 3',
+                 'quest_tool_latency_seconds_count{tool="list_quests"} 3',
+                 'quest_tool_calls_total{tool="list_quests"} 3'):
+        assert line in text, line
+
+def test_middleware_counts_failed_calls():
+    metrics = Metrics()
+    middleware = MetricsMiddleware(metrics)
+
+    def call(tool: str, handler):
+        return run(middleware.on_call_tool(SimpleNamespace(message=SimpleNamespace(name=tool)), handler))
+
+    async def ok(context):
+        return SimpleNamespace(isError=False)
+
+    async def error_result(context):
+        return SimpleNamespace(isError=True)
+
+    async def raises(context):
+        raise McpError(ErrorData(code=INVALID_PARAMS, message="nope"))
+
+    call("claim_reward", ok)
+    call("claim_reward", error_result)
+    try:
+        call("claim_reward", raises)
+    except McpError:
+        pass
+    assert metrics.tool_calls == {"claim_reward": 3} and metrics.tool_errors == {"claim_reward": 2}
+    assert metrics.tool_latency["claim_reward"].count == 3
+
+def test_instrumented_store_times_every_operation():
+    metrics = Metrics()
+    store = instrument_store(MemoryQuestStore(), metrics)
+
+    async def scenario():
+        await store.upsert("users", "u1", {"total_xp": 1})
+        await store.get("users", "u1")
+        await store.bulk_write("users", [UpdateOp("u1", set_fields={"total_xp": 2})])
+        await store.update_many("users", {"total_xp": 2}, inc={"total_xp": 1})
+        found = store.find("users")
+        async for _ in found:
+            break
+        await found.aclose()  # stopping early is not an error
+        await store.upsert("idempotency", "k1", {"expires_at": datetime(2020, 1, 1, tzinfo=timezone.utc)})
+        assert await store.delete_expired(datetime.now(timezone.utc)) == 1
+        try:
+            await store.update_many("users", {"total_xp": {"$regex": "x"}}, inc={"total_xp": 1})
+        except ValueError:
+            pass
+    run(scenario())
+
+    assert {key: h.count for key, h in metrics.store_latency.items()} == {
+        ("upsert", "users"): 1, ("get", "users"): 1, ("bulk_write", "users"): 1, ("update_many", "users"): 2,
+        ("find", "users"): 1, ("upsert", "idempotency"): 1, ("delete_expired", "idempotency"): 1,
+    }
+    assert metrics.store_errors == {("update_many", "users"): 1}
+    assert 'quest_store_latency_seconds_count{op="delete_expired",collection="idempotency"} 1' in metrics.render()
+
+def test_stats_and_metrics_need_credentials():
+    settings = server.ADMIN_IDS
+    server.ADMIN_IDS = {"ops_admin"}
+    try:
+        assert "Server Stats" in run(server.server_stats.fn(admin_id="ops_admin"))[0].text
+        try:
+            run(server.server_stats.fn(admin_id="someone"))
+        except McpError:
+            pass
+        else:
+            raise AssertionError("server_stats answered a non-admin")
+    finally:
+        server.ADMIN_IDS = settings
+
+    client = TestClient(server.mcp.http_app())
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    metrics = client.get("/metrics", headers={"Authorization": f"Bearer {server.TOKEN}"})
+    assert metrics.status_code == 200 and "quest_write_buffer_pending" in metrics.text
+
+if __name__ == "__main__":
+    print("🧪 Testing metrics...\n")
+    for test in (test_histogram_buckets_and_quantiles, test_middleware_counts_failed_calls,
+                 test_instrumented_store_times_every_operation, test_stats_and_metrics_need_credentials):
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 Metrics add up!")
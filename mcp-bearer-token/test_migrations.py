@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Migration tests for the Quest & Rewards MCP Server
+Checks legacy ISO-timestamp users and Reward.given_to claim lists are rewritten in the current
+format, and that the bulk daily reset matches the per-user streak rules
+"""
+
+from datetime import datetime, timezone
+
+from conftest import run
+import quest_rewards_mcp as server
+from quest_rewards_mcp import Reward
+
+def _epoch(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+def test_iso_timestamps_are_rewritten_on_first_load():
+    async def scenario():
+        await server.store.upsert("users", "legacy_iso", {
+            "name": "Legacy", "total_xp": 40, "daily_xp": 3, "quests_completed": ["plant_tree"], "streak_days": 2,
+            "created_at": "2024-03-01T10:00:00", "last_daily_reset": "2024-03-05T00:00:00Z",
+            "last_quest_date": "2024-03-04T18:30:00+00:00",
+        })
+        user = await server._get_user("legacy_iso")
+        assert user.created_at == _epoch(2024, 3, 1, 10)  # naive values are UTC
+        assert user.last_reset_day == _epoch(2024, 3, 5) // server.SECONDS_PER_DAY
+        assert (user.last_quest_at, user.last_quest_day) == (_epoch(2024, 3, 4, 18, 30), _epoch(2024, 3, 4) // server.SECONDS_PER_DAY)
+        assert (user.total_xp, user.streak_days) == (40, 2)
+
+        await server.write_buffer.flush()
+        stored = await server.store.get("users", "legacy_iso")
+        assert not {"last_daily_reset", "last_quest_date"} & set(stored)
+        assert stored["created_at"] == user.created_at and stored["last_reset_day"] == user.last_reset_day
+    run(scenario())
+
+def test_given_to_moves_into_claims():
+    async def scenario():
+        cached = await server._get_user("claim_cached")
+        await server.store.upsert("users", "claim_stored", {"name": "Stored", "created_at": 1, "last_reset_day": 0})
+        server._register_reward(Reward(reward_id="legacy_badge", title="🏅 Legacy badge", xp_required=0, reward_type="badge",
+                                       given_to=["claim_cached", "claim_stored"], created_at=server._now()))
+        await server._migrate_legacy_claims()
+
+        assert server.REWARDS["legacy_badge"].given_to == []
+        assert (await server.store.get("rewards", "legacy_badge"))["given_to"] == []
+        for user_id in ("claim_cached", "claim_stored"):
+            claim = await server.store.get("claims", f"legacy_badge:{user_id}")
+            assert claim["user_id"] == user_id and claim["reward_id"] == "legacy_badge"
+            assert "legacy_badge" in (await server.store.get("users", user_id))["rewards_claimed"]
+        assert "legacy_badge" in cached.rewards_claimed
+        assert "claim_stored" not in server.USERS  # an uncached user isn't loaded just to record the claim
+
+        await server._migrate_legacy_claims()  # nothing left to move
+        assert len([doc async for doc in server.store.find("claims", {"reward_id": "legacy_badge"})]) == 2
+    run(scenario())
+
+def test_bulk_daily_reset_follows_streak_rules():
+    async def scenario():
+        today = server._epoch_day()
+        seeds = {
+            "reset_streak": {"last_reset_day": today - 1, "last_quest_day": today - 1, "streak_days": 4},
+            "reset_missed": {"last_reset_day": today - 3, "last_quest_day": today - 3, "streak_days": 4},
+            "reset_never": {"last_reset_day": today - 1, "streak_days": 0},
+            "reset_done": {"last_reset_day": today, "last_quest_day": today, "streak_days": 5},
+        }
+        for user_id, fields in seeds.items():
+            await server.store.upsert("users", user_id, {"name": user_id, "created_at": 1, "daily_xp": 12, **fields})
+
+        assert await server._bulk_daily_reset(today) >= 3
+        stored = {user_id: await server.store.get("users", user_id) for user_id in seeds}
+        assert {user_id: doc["streak_days"] for user_id, doc in stored.items()} == {
+            "reset_streak": 5, "reset_missed": 0, "reset_never": 0, "reset_done": 5}
+        for user_id in ("reset_streak", "reset_missed", "reset_never"):
+            assert (stored[user_id]["daily_xp"], stored[user_id]["last_reset_day"]) == (0, today)
+        assert stored["reset_done"]["daily_xp"] == 12  # already reset today
+
+        # Users loading afterwards see the bulk values and don't reset again
+        user = await server._get_user("reset_streak")
+        server._reset_daily_xp_if_needed(user)
+        assert (user.streak_days, user.daily_xp, user.last_reset_day) == (5, 0, today)
+    run(scenario())
+
+if __name__ == "__main__":
+    print("🧪 Testing migrations and the daily reset...\n")
+    for test in (test_iso_timestamps_are_rewritten_on_first_load, test_given_to_moves_into_claims,
+                 test_bulk_daily_reset_follows_streak_rules):
+        test()
+        print(f"✅ {test.__name__}")
+    run(server._shutdown())
+    print("\n🎉 Old documents upgrade cleanly!")
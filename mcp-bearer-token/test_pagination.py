@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Pagination tests for the Quest & Rewards MCP Server
+Walks every list tool page by page, in markdown and compact JSON, and checks nothing is skipped or repeated
+"""
+
+import json
+
+from mcp import McpError
+
+from conftest import run
+import quest_rewards_mcp as server
+from quest_rewards_mcp import Quest
+
+USER = "paging_user"
+
+async def _setup():
+    if not server.QUESTS:
+        await server._startup()
+    for i in range(45):
+        if f"paging_{i}" not in server.QUESTS:
+            server._register_quest(Quest(
+                quest_id=f"paging_{i}",
+                title=f"📄 Paging quest {i}",
+                description="Recycle one page of paper",
+                xp_reward=1 + i % 5,
+                quest_type="personal",
+                created_by="admin",
+                created_at=server._now(),
+            ))
+    user = await server._get_user(USER)
+    if not user.quests_completed:
+        # Enough XP for some rewards but not all, and rivals to fill a few leaderboard pages
+        for i in range(0, 45, 4):
+            server._award_xp(user, server.QUESTS[f"paging_{i}"], 3)
+        for j in range(10):
+            rival = await server._get_user(f"paging_rival_{j}")
+            server._award_xp(rival, server.QUESTS["paging_1"], j + 1)
+    return user
+
+def _walk(tool, limit: int, **kwargs) -> list[dict]:
+    """Every item of a compact listing, following next_cursor to the end"""
+    items, cursor = [], None
+    while True:
+        result = run(tool.fn(compact=True, limit=limit, cursor=cursor, **kwargs))
+        page = json.loads(result[0].text)
+        assert len(page["items"]) <= limit
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+def test_list_quests_pages_cover_the_catalogue_once():
+    user = run(_setup())
+    personal = [q.quest_id for q in server.QUESTS.values() if q.quest_type == "personal"]
+    open_quests = [quest_id for quest_id in personal if quest_id not in user.quests_completed]
+    assert [item["quest_id"] for item in _walk(server.list_quests, 7, puch_user_id=USER, quest_type="personal")] == open_quests
+    with_completed = _walk(server.list_quests, 10, puch_user_id=USER, quest_type="personal", show_completed=True)
+    assert [item["quest_id"] for item in with_completed] == personal
+    assert sum(item["completed"] for item in with_completed) == len(personal) - len(open_quests)
+
+def test_list_quests_markdown_pages():
+    run(_setup())
+    first = run(server.list_quests.fn(puch_user_id=USER, quest_type="personal", limit=5))[0].text
+    assert "showing 5)" in first and first.count("🆔") == 5
+    cursor = first.rsplit("cursor=", 1)[1].strip()
+    assert "quest_type=personal" in first and "limit=5" in first
+    second = run(server.list_quests.fn(puch_user_id=USER, quest_type="personal", limit=5, cursor=cursor))[0].text
+    assert not set(first.split("🆔")[1:]) & set(second.split("🆔")[1:])
+    marked = run(server.list_quests.fn(puch_user_id=USER, quest_type="personal", show_completed=True, limit=100))[0].text
+    assert "✅ **📄 Paging quest 0**" in marked and "cursor=" not in marked
+
+def test_other_list_tools_page_in_order():
+    user = run(_setup())
+    earned, locked = server.REWARD_LADDER.split(user.total_xp)
+    assert earned and locked
+    assert [item["reward_id"] for item in _walk(server.list_rewards, 3, puch_user_id=USER)] == earned + locked
+
+    everything = json.loads(run(server.search_quests.fn(puch_user_id=USER, query="paging recycle", limit=50, compact=True))[0].text)
+    paged = _walk(server.search_quests, 6, puch_user_id=USER, query="paging recycle")
+    assert [item["quest_id"] for item in paged[:50]] == [item["quest_id"] for item in everything["items"]]
+    assert len({item["quest_id"] for item in paged}) == len(paged)
+
+    ranks = [item["rank"] for item in _walk(server.leaderboard, 3, puch_user_id=USER)]
+    assert ranks == sorted(ranks) and len(ranks) == len(server._board("global")) >= 11
+
+def test_invalid_cursor_is_rejected():
+    run(_setup())
+    for cursor in ("abc", "-1"):
+        try:
+            run(server.list_quests.fn(puch_user_id=USER, cursor=cursor))
+        except McpError as e:
+            assert "cursor" in str(e)
+        else:
+            raise AssertionError(f"cursor {cursor!r} accepted")
+
+if __name__ == "__main__":
+    print("🧪 Testing list pagination...\n")
+    for test in (test_list_quests_pages_cover_the_catalogue_once, test_list_quests_markdown_pages,
+                 test_other_list_tools_page_in_order, test_invalid_cursor_is_rejected):
+        test()
+        print(f"✅ {test.__name__}")
+    run(server._shutdown())
+    print("\n🎉 Every list tool pages without gaps or repeats!")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Review queue tests for the Quest & Rewards MCP Server
+Checks pending submissions page oldest-first with stable cursors while reviews land between pages,
+that filters and the age cutoff behave, and that compaction keeps cursors valid
+"""
+
+import json
+from types import SimpleNamespace
+
+from conftest import run
+import quest_rewards_mcp as server
+from quest_indexes import PendingQueue
+from quest_rewards_mcp import Quest
+
+def _queue(count: int) -> PendingQueue:
+    queue = PendingQueue()
+    for i in range(count):
+        queue.add(f"s{i}", SimpleNamespace(key=f"s{i}", user=f"u{i % 3}", age=count - i))
+    return queue
+
+def _keys(items) -> list[str]:
+    return [item.key for item in items]
+
+def test_cursor_continues_across_reviews():
+    queue = _queue(10)
+    first, cursor = queue.page(limit=4)
+    assert _keys(first) == ["s0", "s1", "s2", "s3"] and cursor is not None
+    for key in ("s1", "s4", "s5"):  # reviewed before the next page is fetched
+        queue.remove(key)
+    queue.add("s0", SimpleNamespace(key="s0"))  # still queued, so not added twice
+    second, cursor = queue.page(after=cursor, limit=4)
+    assert _keys(second) == ["s6", "s7", "s8", "s9"] and cursor is None
+    assert len(queue) == 7 and "s4" not in queue
+
+    queue.add("s4", SimpleNamespace(key="s4"))  # resubmitted after review: back of the queue
+    assert _keys(queue.page(limit=10)[0]) == ["s0", "s2", "s3", "s6", "s7", "s8", "s9", "s4"]
+
+def test_filters_and_early_stop():
+    queue = _queue(12)
+    mine, cursor = queue.page(limit=2, accept=lambda item: item.user == "u1")
+    assert _keys(mine) == ["s1", "s4"]
+    assert _keys(queue.page(after=cursor, limit=10, accept=lambda item: item.user == "u1")[0]) == ["s7", "s10"]
+
+    seen = []
+
+    def too_new(item) -> bool:
+        seen.append(item.key)
+        return item.age < 6
+
+    old, cursor = queue.page(limit=100, stop=too_new)
+    assert _keys(old) == [f"s{i}" for i in range(7)] and cursor is None
+    assert seen == [f"s{i}" for i in range(8)]  # nothing after the first too-new entry is looked at
+
+def test_compaction_keeps_cursors_valid():
+    queue = _queue(3000)
+    _, cursor = queue.page(limit=2500)
+    for i in range(0, 3000, 2):
+        queue.remove(f"s{i}")
+    for i in range(1, 400, 2):
+        queue.remove(f"s{i}")
+    assert len(queue._seqs) < 3000  # reviewed entries were dropped, not just skipped
+    assert len(queue._seqs) == len(queue._keys) == len(queue._items)
+    rest, _ = queue.page(after=cursor, limit=1000)
+    assert _keys(rest) == [f"s{i}" for i in range(2501, 3000, 2)]
+    assert _keys(queue.page(limit=3000)[0]) == [f"s{i}" for i in range(401, 3000, 2)] and len(queue) == 1300
+
+def _walk(limit: int, **kwargs) -> list[dict]:
+    items, cursor = [], None
+    while True:
+        page = json.loads(run(server.list_pending_submissions.fn(
+            reviewer_id="admin", compact=True, limit=limit, cursor=cursor, **kwargs))[0].text)
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+def _walk_from(cursor: str, **kwargs) -> list[dict]:
+    page = json.loads(run(server.list_pending_submissions.fn(reviewer_id="admin", compact=True, limit=100, cursor=cursor, **kwargs))[0].text)
+    assert page["next_cursor"] is None
+    return page["items"]
+
+def test_list_pending_submissions():
+    async def submit(user_id: str, quest_id: str, at: int) -> str:
+        server.set_clock(lambda: at)
+        result = await server.submit_proof.fn(puch_user_id=user_id, quest_id=quest_id, proof_text="done")
+        return result[0].text.split("`")[1]
+
+    async def setup() -> tuple[dict[str, list[str]], int]:
+        if not server.QUESTS:
+            await server._startup()
+        for quest_id, program in (("queue_a", "queue_program"), ("queue_b", None)):
+            server._register_quest(Quest(quest_id=quest_id, title=f"🧾 {quest_id}", description="Queue test quest",
+                                         xp_reward=5, quest_type="personal", program=program, created_by="admin",
+                                         created_at=server._now()))
+        start = int(server._clock()) + 60  # after anything already queued, so arrival order matches age
+        ids = {"queue_a": [], "queue_b": []}
+        for i in range(12):
+            quest_id = "queue_a" if i % 3 else "queue_b"
+            ids[quest_id].append(await submit(f"queue_user_{i}", quest_id, start + i * 300))
+        return ids, start
+
+    clock = server._clock
+    try:
+        ids, start = run(setup())
+    finally:
+        server.set_clock(clock)
+    queued = lambda items: [item["submission_id"] for item in items]
+    assert queued(_walk(3, quest_id="queue_a")) == ids["queue_a"]
+    assert queued(_walk(5, program="queue_program")) == ids["queue_a"]
+
+    # Reviews between pages don't shift the cursor
+    page = json.loads(run(server.list_pending_submissions.fn(reviewer_id="admin", quest_id="queue_a", limit=3, compact=True))[0].text)
+    run(server.review_submission.fn(reviewer_id="admin", submission_id=ids["queue_a"][1], approve=False))
+    run(server.review_submission.fn(reviewer_id="admin", submission_id=ids["queue_a"][4], approve=True))
+    rest = _walk_from(page["next_cursor"], quest_id="queue_a")
+    assert queued(page["items"]) + queued(rest) == ids["queue_a"][:4] + ids["queue_a"][5:]
+
+    # Five-minute spacing ending five minutes ago: only the first seven are 30 minutes old
+    server.set_clock(lambda: start + 3600)
+    try:
+        assert queued(_walk(10, quest_id="queue_b", min_age_minutes=30)) == ids["queue_b"][:3]
+        assert queued(_walk(10, program="queue_program", min_age_minutes=30)) == [ids["queue_a"][i] for i in (0, 2, 3)]
+    finally:
+        server.set_clock(clock)
+
+if __name__ == "__main__":
+    print("🧪 Testing the review queue...\n")
+    for test in (test_cursor_continues_across_reviews, test_filters_and_early_stop,
+                 test_compaction_keeps_cursors_valid, test_list_pending_submissions):
+        test()
+        print(f"✅ {test.__name__}")
+    run(server._shutdown())
+    print("\n🎉 Pending submissions page cleanly!")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Sampling profiler tests for the MCP servers
+Checks that profiled calls are charged to their tool and dumped as collapsed stacks
+"""
+
+import asyncio
+import tempfile
+import time
+from types import SimpleNamespace
+
+from mcp_profiler import ProfilerMiddleware, StackSampler
+
+def _busy_loop(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    spins = 0
+    while time.perf_counter() < deadline:
+        spins += 1
+    return spins
+
+async def _run_tool(middleware: ProfilerMiddleware, tool: str, seconds: float):
+    async def handler(context):
+        await asyncio.sleep(0)
+        return _busy_loop(seconds)
+    return await middleware.on_call_tool(SimpleNamespace(message=SimpleNamespace(name=tool, arguments={})), handler)
+
+def test_profiled_stacks_are_grouped_by_tool():
+    sampler = StackSampler(interval=0.001)
+    middleware = ProfilerMiddleware(sampler, sample_rate=1.0)
+    asyncio.run(_run_tool(middleware, "complete_quest", 0.2))
+    stacks = sampler.stacks["complete_quest"]
+    assert sampler.calls["complete_quest"] == 1
+    assert sum(stacks.values()) >= 10, f"only {sum(stacks.values())} samples in 200 ms"
+    assert all(stack.startswith("complete_quest;") for stack in stacks)
+    assert any("_busy_loop (test_profiler.py" in stack for stack in stacks)
+
+def test_unsampled_calls_are_not_profiled():
+    sampler = StackSampler(interval=0.001)
+    middleware = ProfilerMiddleware(sampler, sample_rate=0.0)
+    asyncio.run(_run_tool(middleware, "list_quests", 0.05))
+    assert not sampler.calls and not sampler.stacks
+
+def test_dump_writes_collapsed_files():
+    sampler = StackSampler()
+    sampler.stacks["submit_proof"] = {"submit_proof;handler (x.py:1);_busy_loop (x.py:9)": 7}
+    with tempfile.TemporaryDirectory() as directory:
+        paths = sampler.dump(directory)
+        assert [path.name for path in paths] == ["submit_proof.collapsed", "all.collapsed"]
+        assert paths[1].read_text() == "submit_proof;handler (x.py:1);_busy_loop (x.py:9) 7\n"
+
+if __name__ == "__main__":
+    print("🧪 Testing the sampling profiler...\n")
+    for test in (test_profiled_stacks_are_grouped_by_tool, test_unsampled_calls_are_not_profiled,
+                 test_dump_writes_collapsed_files):
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 Profiler works!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Quest counter tests for the Quest & Rewards MCP Server
+Checks User.quest_counts follows completions and approvals without double counting, and that
+the backfill-quest-counts rebuild recounts stored and cached users from quests_completed
+"""
+
+from conftest import run
+import quest_rewards_mcp as server
+from quest_rewards_mcp import Quest
+
+async def _setup():
+    if not server.QUESTS:
+        await server._startup()
+    for quest_id, quest_type, method in (("counts_auto", "climate", "auto"), ("counts_manual", "social", "manual"),
+                                         ("counts_other", "social", "auto")):
+        server._register_quest(Quest(quest_id=quest_id, title=f"🔢 {quest_id}", description="Counter test quest",
+                                     xp_reward=5, quest_type=quest_type, verification_method=method,
+                                     created_by="admin", created_at=server._now()))
+
+async def _approve(user_id: str, quest_id: str) -> None:
+    result = await server.submit_proof.fn(puch_user_id=user_id, quest_id=quest_id, proof_text="done")
+    await server.review_submission.fn(reviewer_id="admin", submission_id=result[0].text.split("`")[1], approve=True)
+
+def test_counts_follow_completions_and_approvals():
+    async def scenario():
+        await _setup()
+        user_id = "counts_player"
+        await server.complete_quest.fn(puch_user_id=user_id, quest_id="counts_auto")
+        await _approve(user_id, "counts_manual")
+        await server.complete_quest.fn(puch_user_id=user_id, quest_id="counts_other")
+        try:
+            await server.complete_quest.fn(puch_user_id=user_id, quest_id="counts_auto")
+        except server.McpError:
+            pass
+        await _approve(user_id, "counts_manual")  # a second approved proof pays (and counts) nothing
+
+        user = await server._get_user(user_id)
+        assert dict(user.quest_counts.items()) == {"climate": 1, "social": 2}
+        await server.write_buffer.flush()
+        assert (await server.store.get("users", user_id))["quest_counts"] == {"climate": 1, "social": 2}
+    run(scenario())
+
+def test_rebuild_recounts_stored_and_cached_users():
+    async def scenario():
+        await _setup()
+        await server.store.upsert("users", "counts_stored", {
+            "name": "Stored", "created_at": 1, "last_reset_day": 0,
+            "quests_completed": ["counts_auto", "counts_manual", "counts_other", "retired_quest"],
+            "quest_counts": {"climate": 7},
+        })
+        await server.store.upsert("users", "counts_empty", {"name": "Empty", "created_at": 1, "last_reset_day": 0})
+        cached = await server._get_user("counts_cached")
+        server._award_xp(cached, server.QUESTS["counts_auto"], 5)
+        cached.quest_counts = {"personal": 3}  # drifted, e.g. written before counters existed
+
+        assert await server._rebuild_quest_counts() >= 3
+        await server.write_buffer.flush()
+        stored = {user_id: (await server.store.get("users", user_id))["quest_counts"]
+                  for user_id in ("counts_stored", "counts_empty", "counts_cached")}
+        assert stored == {"counts_stored": {"climate": 1, "social": 2}, "counts_empty": {}, "counts_cached": {"climate": 1}}
+        assert dict(cached.quest_counts.items()) == {"climate": 1}
+
+        # The cached copy was fixed too, so its next award builds on the right count
+        server._award_xp(cached, server.QUESTS["counts_other"], 5)
+        await server.write_buffer.flush()
+        assert (await server.store.get("users", "counts_cached"))["quest_counts"] == {"climate": 1, "social": 1}
+    run(scenario())
+
+if __name__ == "__main__":
+    print("🧪 Testing quest counters...\n")
+    for test in (test_counts_follow_completions_and_approvals, test_rebuild_recounts_stored_and_cached_users):
+        test()
+        print(f"✅ {test.__name__}")
+    run(server._shutdown())
+    print("\n🎉 Quest counters add up!")
@@ -6,9 +6,8 @@ This script tests the basic functionality without requiring Puch AI
 
 import asyncio
 import json
-from datetime import datetime
 from quest_rewards_mcp import (
-    _get_user, _reset_daily_xp_if_needed, _calculate_xp_gain,
+    _get_user, _reset_daily_xp_if_needed, _calculate_xp_gain, _epoch_seconds, _epoch_day,
     _initialize_default_content, USERS, QUESTS, REWARDS
 )
 
@@ -17,12 +16,12 @@ async def test_quest_system():
     print("🧪 Testing Quest & Rewards MCP Server...\n")
     
     # Initialize default content
-    _initialize_default_content()
+    await _initialize_default_content()
     print("✅ Default quests and rewards loaded")
     
     # Test user creation
     test_user_id = "test_user_123"
-    user = _get_user(test_user_id)
+    user = await _get_user(test_user_id)
     print(f"✅ User created: {user.name}")
     
     # Test quest listing
@@ -50,8 +49,9 @@ async def test_quest_system():
     if test_quest.quest_id not in user.quests_completed:
         user.daily_xp += xp_gain
         user.total_xp += xp_gain
-        user.quests_completed.append(test_quest.quest_id)
-        user.last_quest_date = datetime.utcnow().isoformat()
+        user.add_to_set("quests_completed", test_quest.quest_id)
+        user.last_quest_at = _epoch_seconds()
+        user.last_quest_day = _epoch_day(user.last_quest_at)
         print(f"✅ Completed quest: {test_quest.title}")
         print(f"   • New total XP: {user.total_xp}")
         print(f"   • New daily XP: {user.daily_xp}/15")
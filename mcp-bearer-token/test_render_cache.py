@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Render cache tests for the Quest & Rewards MCP Server
+Checks that list_quests views page around completions and re-render only changed quests
+"""
+
+from quest_indexes import RenderCache
+
+def _cache() -> tuple[dict, RenderCache]:
+    catalogue = {"a": ("climate", "A"), "b": ("social", "B"), "c": ("climate", "C")}
+    cache = RenderCache(catalogue, group=lambda entry: entry[0], render=lambda entry: f"🎯 {entry[1]}\n")
+    return catalogue, cache
+
+def _text(view) -> str:
+    return view.join(range(len(view)))
+
+def test_views_page_and_mark_entries():
+    _, cache = _cache()
+    view = cache.view()
+    assert view.join(range(len(view)), head="# ") == "# 🎯 A\n🎯 B\n🎯 C\n"
+    skip = set(view.positions(["b", "zz"]))
+    assert view.page(0, 1, skip) == ([0], 2) and view.page(2, 5, skip) == ([2], None)
+    assert view.page(0, 1, {1, 2}) == ([0], None)
+    assert view.join([0, 2]) == "🎯 A\n🎯 C\n"
+    assert view.join([0, 1, 2], marked=set(view.positions(["c", "a"])), old="🎯", new="✅") == "✅ A\n🎯 B\n✅ C\n"
+    climate = cache.view("climate")
+    assert climate.keys == ["a", "c"] and climate.join(climate.page(0, 10, {0})[0]) == "🎯 C\n"
+    assert cache.renders == 3  # the climate view reused the fragments rendered for the full view
+
+def test_new_entries_append_and_edits_rerender_one_entry():
+    catalogue, cache = _cache()
+    full, social = cache.view(), cache.view("social")
+    catalogue["d"] = ("social", "D")
+    cache.touch("d")
+    assert cache.view() is full and cache.view("social") is social and cache.renders == 4
+    assert _text(full) == "🎯 A\n🎯 B\n🎯 C\n🎯 D\n" and _text(social) == "🎯 B\n🎯 D\n"
+
+    catalogue["a"] = ("social", "A2")  # an edit can move an entry to another group
+    cache.touch("a")
+    assert _text(cache.view("social")) == "🎯 A2\n🎯 B\n🎯 D\n"
+    assert _text(cache.view("climate")) == "🎯 C\n"
+    assert cache.renders == 5
+
+    del catalogue["b"]
+    cache.touch("b")
+    assert _text(cache.view()) == "🎯 A2\n🎯 C\n🎯 D\n"
+
+def test_changes_behind_touch_are_noticed():
+    catalogue, cache = _cache()
+    cache.view()
+    catalogue["e"] = ("personal", "E")  # added without touch(), e.g. seeded directly
+    assert _text(cache.view()).endswith("🎯 E\n")
+
+if __name__ == "__main__":
+    print("🧪 Testing the list_quests render cache...\n")
+    for test in (test_views_page_and_mark_entries, test_new_entries_append_and_edits_rerender_one_entry,
+                 test_changes_behind_touch_are_noticed):
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 Rendered quest views stay in step with the catalogue!")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Reward ladder tests for the Quest & Rewards MCP Server
+Checks thresholds crossed between two XP totals, the earned/locked split and re-adding a reward,
+and that complete_quest announces each unlocked reward once
+"""
+
+from conftest import run
+import quest_rewards_mcp as server
+from quest_indexes import RewardLadder
+from quest_rewards_mcp import Quest, Reward
+
+def test_between_split_and_readd():
+    ladder = RewardLadder()
+    for reward_id, xp in (("free", 0), ("bronze", 10), ("bronze_alt", 10), ("silver", 50), ("gold", 100)):
+        ladder.add(reward_id, xp)
+    assert ladder.between(0, 10) == ["bronze", "bronze_alt"]  # the old total's own threshold was crossed already
+    assert ladder.between(10, 49) == [] and ladder.between(9, 10) == ["bronze", "bronze_alt"]
+    assert ladder.between(-1, 100) == ["free", "bronze", "bronze_alt", "silver", "gold"]
+    assert ladder.between(100, 500) == []
+    assert ladder.split(10) == (["free", "bronze", "bronze_alt"], ["silver", "gold"])
+    assert ladder.split(-1) == ([], ["free", "bronze", "bronze_alt", "silver", "gold"])
+
+    ladder.add("bronze", 60)  # an admin edit moves the threshold rather than duplicating it
+    assert len(ladder) == 5 and ladder.between(50, 60) == ["bronze"]
+    assert ladder.split(10) == (["free", "bronze_alt"], ["silver", "bronze", "gold"])
+    ladder.remove("silver")
+    ladder.remove("silver")
+    assert ladder.split(1000) == (["free", "bronze_alt", "bronze", "gold"], [])
+
+def test_complete_quest_announces_each_reward_once():
+    async def scenario():
+        if not server.QUESTS:
+            await server._startup()
+        server._register_quest(Quest(quest_id="ladder_quest", title="🪜 Ladder quest", description="Climb one rung",
+                                     xp_reward=5, quest_type="personal", verification_method="auto",
+                                     created_by="admin", created_at=server._now()))
+        server._register_quest(Quest(quest_id="ladder_next", title="🪜 Next rung", description="Climb another rung",
+                                     xp_reward=5, quest_type="personal", verification_method="auto",
+                                     created_by="admin", created_at=server._now()))
+        server._register_reward(Reward(reward_id="ladder_start", title="🪜 Starter", xp_required=0,
+                                       reward_type="badge", created_at=server._now()))
+        server._register_reward(Reward(reward_id="ladder_five", title="🪜 Five XP", xp_required=5,
+                                       reward_type="sticker", created_at=server._now()))
+
+        first = (await server.complete_quest.fn(puch_user_id="ladder_climber", quest_id="ladder_quest"))[0].text
+        assert "🪜 Starter" in first and "🪜 Five XP" in first  # the first award reaches the 0-XP rewards too
+        user = await server._get_user("ladder_climber")
+        assert user.total_xp == 5 and "ladder_five" not in user.rewards_claimed
+
+        # Still unclaimed, but the threshold sat at the old total: it was announced last time
+        second = (await server.complete_quest.fn(puch_user_id="ladder_climber", quest_id="ladder_next"))[0].text
+        assert "Quest Completed" in second and "New Rewards Unlocked" not in second
+    run(scenario())
+
+if __name__ == "__main__":
+    print("🧪 Testing the reward ladder...\n")
+    for test in (test_between_split_and_readd, test_complete_quest_announces_each_reward_once):
+        test()
+        print(f"✅ {test.__name__}")
+    run(server._shutdown())
+    print("\n🎉 Rewards unlock once, at the right XP!")
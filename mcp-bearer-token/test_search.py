@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Quest search tests for the Quest & Rewards MCP Server
+Checks tokenizing, ranking, prefix matching and incremental updates of the inverted index
+"""
+
+import random
+import time
+
+from quest_indexes import SearchIndex, tokenize
+
+def _catalogue() -> SearchIndex:
+    index = SearchIndex()
+    index.add("plant_tree", "🌱 Plant a Tree", "Plant a tree in your community or garden")
+    index.add("walk", "🚶 Walk to Work", "Walk past the planting beds instead of driving")
+    index.add("recycle", "📱 Recycle Electronics", "Properly recycle old electronics or donate them")
+    return index
+
+def test_tokenize_drops_emoji_and_punctuation():
+    assert tokenize("🌱 Plant-a-Tree! (eco_friendly) Café 2x") == ["plant", "a", "tree", "eco", "friendly", "café", "2x"]
+    assert tokenize("🌍♻️!!") == []
+
+def test_title_matches_rank_first():
+    index = _catalogue()
+    results = index.search("plant")
+    assert [doc_id for doc_id, _ in results] == ["plant_tree", "walk"]  # "planting" only via prefix
+    assert results[0][1] > results[1][1]
+    assert index.search("recyc")[0][0] == "recycle"
+    assert index.search("zz") == []
+
+def test_filter_and_limit():
+    index = _catalogue()
+    assert [doc_id for doc_id, _ in index.search("plant walk", accept=lambda doc_id: doc_id != "walk")] == ["plant_tree"]
+    assert len(index.search("plant walk recycle", limit=2)) == 2
+
+def test_updates_apply_without_rebuild():
+    index = _catalogue()
+    index.add("walk", "🚲 Cycle to Work", "Ride a bike instead of driving")
+    assert [doc_id for doc_id, _ in index.search("walk")] == []
+    assert index.search("bike")[0][0] == "walk"
+    for doc_id in ("plant_tree", "walk", "recycle"):
+        index.remove(doc_id)
+    assert len(index) == 0 and not index._postings and not index._vocabulary
+
+def test_search_latency_at_catalogue_scale(quests: int = 20000, max_ms: float = 50.0):
+    rng = random.Random(7)
+    words = [f"word{i}" for i in range(3000)] + ["tree", "plant", "recycle", "walk", "bottle", "garden"]
+    index = SearchIndex()
+    start = time.perf_counter()
+    for i in range(quests):
+        index.add(f"quest_{i}", " ".join(rng.choices(words, k=4)), " ".join(rng.choices(words, k=15)))
+    build_s = time.perf_counter() - start
+    timings = []
+    for query in ("plant tree", "garden", "recycle bottle walk", "word12"):
+        start = time.perf_counter()
+        index.search(query, limit=10)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"   • {quests} quests indexed in {build_s:.2f}s; slowest search {max(timings):.1f} ms")
+    assert max(timings) < max_ms, f"search took {max(timings):.1f} ms"
+
+if __name__ == "__main__":
+    print("🧪 Testing quest search...\n")
+    for test in (test_tokenize_drops_emoji_and_punctuation, test_title_matches_rank_first, test_filter_and_limit,
+                 test_updates_apply_without_rebuild, test_search_latency_at_catalogue_scale):
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 Quest search works!")
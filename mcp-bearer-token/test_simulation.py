@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Simulated-clock tests for the Quest & Rewards MCP Server
+Replays three weeks of activity (so streak bonuses kick in) and checks every user's streak and XP
+"""
+
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def _simulate(*args: str, **env: str) -> str:
+    """Run simulate_campaign.py in its own process: it swaps the server clock and owns the event loop"""
+    result = subprocess.run(
+        [sys.executable, os.path.join(HERE, "simulate_campaign.py"), *args],
+        capture_output=True, text=True, cwd=HERE, env={**os.environ, **env},
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+def test_streaks_match_with_bulk_reset():
+    output = _simulate("--users", "300", "--days", "21")
+    assert "match the expected rules" in output
+
+def test_streaks_match_with_lazy_reset_and_evictions():
+    # A cache far smaller than the population reloads users from bulk-reset and lazily-reset documents
+    output = _simulate("--users", "600", "--days", "15", "--reset", "lazy", USER_CACHE_SIZE="50")
+    assert "match the expected rules" in output
+
+if __name__ == "__main__":
+    print("🧪 Replaying simulated campaigns...\n")
+    for test in (test_streaks_match_with_bulk_reset, test_streaks_match_with_lazy_reset_and_evictions):
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 Streaks and daily caps hold over simulated weeks!")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Storage helper tests for the Quest & Rewards MCP Server
+Checks coalesced updates write what the updates would have written one by one, and that the
+LRU caches never evict entries pinned by unflushed writes
+"""
+
+import asyncio
+import copy
+
+from quest_storage import LRUCache, MemoryQuestStore, UpdateOp
+
+def _apply(ops: list[UpdateOp], seed: dict) -> tuple[dict, list[str]]:
+    store = MemoryQuestStore()
+    store.collections["users"]["u1"] = copy.deepcopy(seed)
+    conflicts = []
+    for op in ops:
+        conflicts += asyncio.run(store.bulk_write("users", [op]))
+    return store.collections["users"]["u1"], conflicts
+
+def test_merge_matches_applying_updates_in_order():
+    seed = {"user_id": "u1", "version": 2, "total_xp": 1, "quests_completed": ["q0"], "last_daily_reset": "2024-01-01"}
+    updates = [
+        UpdateOp("u1", set_fields={"total_xp": 5, "version": 3}, add_to_set={"quests_completed": ["q1"]}, expect_version=2),
+        UpdateOp("u1", set_fields={"total_xp": 9, "version": 4, "badges": ["a"]}, unset={"last_daily_reset"}, expect_version=3),
+        UpdateOp("u1", set_fields={"version": 5}, add_to_set={"quests_completed": ["q1", "q2"], "badges": ["a", "b"]},
+                 expect_version=4),
+    ]
+    merged = copy.deepcopy(updates[0])
+    for op in copy.deepcopy(updates[1:]):
+        merged.merge(op)
+
+    # One write, checked against the first expected version and leaving the newest
+    assert merged.expect_version == 2 and merged.set_fields["version"] == 5
+    assert merged.set_fields["badges"] == ["a", "b"] and merged.unset == {"last_daily_reset"}
+    one_by_one, conflicts = _apply(updates, seed)
+    assert not conflicts
+    assert _apply([merged], seed) == (one_by_one, [])
+    assert one_by_one == {"user_id": "u1", "version": 5, "total_xp": 9, "quests_completed": ["q0", "q1", "q2"], "badges": ["a", "b"]}
+
+    # A stale merged write conflicts as a whole instead of half-applying
+    assert _apply([merged], {**seed, "version": 3})[1] == ["u1"]
+
+def test_merge_set_and_unset_cancel_in_order():
+    op = UpdateOp("u1", set_fields={"name": "old"}, add_to_set={"tags": ["x"]})
+    op.merge(UpdateOp("u1", unset={"name", "tags"}))
+    assert op.set_fields == {} and op.add_to_set == {} and op.unset == {"name", "tags"} and op
+    op.merge(UpdateOp("u1", set_fields={"name": "new"}))
+    assert op.set_fields == {"name": "new"} and op.unset == {"tags"}
+    assert not UpdateOp("u1")
+
+def test_lru_evicts_oldest_unpinned_entry():
+    pinned = {"a"}
+    cache = LRUCache(2, pinned=pinned.__contains__)
+    cache["a"], cache["b"] = 1, 2
+    cache["c"] = 3
+    assert set(cache) == {"a", "c"}  # "a" is older but has unflushed writes
+    cache.get("a")
+    pinned.clear()
+    cache["d"] = 4
+    assert set(cache) == {"a", "d"}  # the read made "a" recent
+
+def test_lru_keeps_new_entry_when_everything_is_pinned():
+    pinned = {"a", "b"}
+    cache = LRUCache(2, pinned=pinned.__contains__)
+    cache["a"], cache["b"] = 1, 2
+    cache["c"] = 3
+    assert len(cache) == 3 and "c" in cache  # over size rather than dropping data
+    pinned.clear()
+    cache["d"] = 4
+    assert list(cache) == ["c", "d"]
+
+if __name__ == "__main__":
+    print("🧪 Testing storage helpers...\n")
+    for test in (test_merge_matches_applying_updates_in_order, test_merge_set_and_unset_cancel_in_order,
+                 test_lru_evicts_oldest_unpinned_entry, test_lru_keeps_new_entry_when_everything_is_pinned):
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 Coalesced writes and caches behave!")
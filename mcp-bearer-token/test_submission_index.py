@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Submission index tests for the Quest & Rewards MCP Server
+Checks that records made while a user's slice is loading are neither lost nor duplicated, and
+that lookups still see every submission after the caches have evicted it
+"""
+
+import asyncio
+
+from conftest import run
+import quest_rewards_mcp as server
+from quest_indexes import SubmissionIndex
+
+def test_records_during_a_load_are_kept_once():
+    async def scenario():
+        release, loads = asyncio.Event(), []
+
+        async def loader(user_id: str):
+            loads.append(user_id)
+            yield {"submission_id": "s1", "quest_id": "q1", "status": "pending"}
+            await release.wait()  # the store is slow; the server keeps going meanwhile
+            yield {"submission_id": "s2", "quest_id": "q1", "status": "rejected"}
+            yield {"submission_id": "s1", "quest_id": "q1", "status": "pending"}  # an older copy, seen twice
+
+        index = SubmissionIndex(loader)
+        first = asyncio.ensure_future(index.submissions("u1", "q1"))
+        second = asyncio.ensure_future(index.statuses("u1", "q1"))
+        await asyncio.sleep(0)
+        index.record("u1", "q1", "s1", "approved")  # reviewed while the load is in flight
+        index.record("u1", "q1", "s3", "pending")  # submitted while the load is in flight
+        index.record("u2", "q1", "s9", "pending")  # not loaded: picked up by its own load later
+        release.set()
+
+        assert await first == {"s1": "approved", "s2": "rejected", "s3": "pending"}
+        assert await second == {"approved", "rejected", "pending"}
+        assert loads == ["u1"]  # concurrent lookups shared one load
+        assert await index.submissions("u1", "q2") == {} and loads == ["u1"]
+    run(scenario())
+
+def test_a_failed_load_is_retried():
+    async def scenario():
+        attempts = []
+
+        async def loader(user_id: str):
+            attempts.append(user_id)
+            if len(attempts) == 1:
+                raise ConnectionError("store unavailable")
+            yield {"submission_id": "s1", "quest_id": "q1", "status": "approved"}
+
+        index = SubmissionIndex(loader)
+        try:
+            await index.statuses("u1", "q1")
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("the load error was swallowed")
+        index.record("u1", "q1", "s2", "pending")  # not loaded, so nothing half-filled to record into
+        assert await index.statuses("u1", "q1") == {"approved"} and len(attempts) == 2
+    run(scenario())
+
+def test_lookups_after_cache_eviction():
+    async def scenario():
+        if not server.QUESTS:
+            await server._startup()
+        user_id = "index_evicted"
+        approved = await server.submit_proof.fn(puch_user_id=user_id, quest_id="plant_tree", proof_text="planted an oak")
+        approved_id = approved[0].text.split("`")[1]
+        await server.review_submission.fn(reviewer_id="admin", submission_id=approved_id, approve=True)
+        await server.write_buffer.flush()
+
+        # Unflushed: only the write buffer knows about this one
+        pending = await server.submit_proof.fn(puch_user_id=user_id, quest_id="reduce_plastic", proof_text="used a steel bottle")
+        pending_id = pending[0].text.split("`")[1]
+        assert server.write_buffer.is_pending("submissions", pending_id)
+
+        server.SUBMISSIONS.pop(approved_id)
+        server.SUBMISSION_INDEX._users.pop(user_id)
+        assert await server._has_approved_submission(user_id, "plant_tree")
+        assert await server.SUBMISSION_INDEX.submissions(user_id, "plant_tree") == {approved_id: "approved"}
+        assert await server.SUBMISSION_INDEX.submissions(user_id, "reduce_plastic") == {pending_id: "pending"}
+        assert (await server._get_submission(approved_id)).status == "approved"
+
+        await server.write_buffer.flush()  # now in the store as well as the cache
+        server.SUBMISSION_INDEX._users.pop(user_id)
+        assert await server.SUBMISSION_INDEX.submissions(user_id, "reduce_plastic") == {pending_id: "pending"}
+    run(scenario())
+
+if __name__ == "__main__":
+    print("🧪 Testing the submission index...\n")
+    for test in (test_records_during_a_load_are_kept_once, test_a_failed_load_is_retried,
+                 test_lookups_after_cache_eviction):
+        test()
+        print(f"✅ {test.__name__}")
+    run(server._shutdown())
+    print("\n🎉 Submission lookups survive loads and evictions!")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Proof verification tests for the Quest & Rewards MCP Server
+Runs the checks against a local stub HTTP server, bounds the worker pool and auto-reviews "auto" quest submissions
+"""
+
+import asyncio
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+from conftest import run
+import quest_rewards_mcp as server
+from quest_rewards_mcp import Quest
+from quest_verifier import ImageHashIndex, ProofVerifier, VerificationPool, default_checks, dhash
+
+def _picture(seed: int) -> bytes:
+    """A PNG of colour bands that depend on `seed`, so different seeds hash far apart"""
+    image = Image.new("RGB", (120, 90))
+    image.putdata([((x * 2 + seed * 40) % 256, (y * 2) % 256, ((x + y) * seed) % 256) for y in range(90) for x in range(120)])
+    out = io.BytesIO()
+    image.save(out, "PNG")
+    return out.getvalue()
+
+def _reencoded(picture: bytes) -> bytes:
+    """The same picture at twice the size, as a lossy JPEG"""
+    image = Image.open(io.BytesIO(picture))
+    out = io.BytesIO()
+    image.resize((image.width * 2, image.height * 2)).save(out, "JPEG", quality=70)
+    return out.getvalue()
+
+# path -> (status, content type, body)
+ROUTES = {
+    "/tree.png": (200, "image/png", _picture(1)),
+    "/tree-copy.jpg": (200, "image/jpeg", _reencoded(_picture(1))),  # same picture, re-encoded and resized
+    "/bike.png": (200, "image/png", _picture(3)),
+    "/cleanup.png": (200, "image/png", _picture(5)),
+    "/cleanup-again.png": (200, "image/png", _picture(5)),
+    "/article": (200, "text/html; charset=utf-8", b"<h1>I planted a tree</h1>"),
+    "/notes.txt": (200, "text/plain", b"trust me"),
+    "/broken.png": (200, "image/png", b"not really a png"),
+}
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(1)
+        status, content_type, body = ROUTES.get(self.path, (404, "text/plain", b"missing"))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+_STUB = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+threading.Thread(target=_STUB.serve_forever, daemon=True).start()
+BASE = f"http://127.0.0.1:{_STUB.server_address[1]}"
+
+def _verifier(**kwargs) -> ProofVerifier:
+    return ProofVerifier(default_checks(ImageHashIndex()), allow_private=True, **kwargs)
+
+def test_checks_approve_good_proofs_and_flag_bad_ones():
+    verifier = _verifier(timeout=0.3)
+    try:
+        verdicts = {path: run(verifier.verify(path, BASE + path)) for path in (
+            "/tree.png", "/tree-copy.jpg", "/bike.png", "/article", "/notes.txt", "/missing.png", "/broken.png", "/slow")}
+        assert verdicts["/tree.png"].approved and verdicts["/tree.png"].image_hash is not None
+        assert verdicts["/bike.png"].approved and verdicts["/article"].approved
+        assert verdicts["/tree-copy.jpg"].reasons == ["same picture as submission /tree.png"]
+        assert verdicts["/notes.txt"].reasons == ["unexpected content type text/plain"]
+        assert verdicts["/missing.png"].reasons == ["proof URL returned HTTP 404"]
+        assert verdicts["/broken.png"].reasons == ["image could not be decoded"]
+        assert verdicts["/slow"].reasons == ["proof URL timed out"]
+        assert not run(verifier.verify("ftp", "ftp://example.com/tree.png")).approved
+    finally:
+        run(verifier.close())
+
+def test_private_addresses_and_large_images_are_refused():
+    verifier = ProofVerifier(default_checks(ImageHashIndex()))
+    small = _verifier(max_bytes=100)
+    try:
+        port = _STUB.server_address[1]
+        # Literal, shorthand and integer forms of loopback, and a name that resolves to it
+        for host in ("127.0.0.1", "127.1", "0x7f000001", "2130706433", "localhost"):
+            verdict = run(verifier.verify("s1", f"http://{host}:{port}/tree.png"))
+            assert not verdict.approved and "private address" in verdict.reasons[0], (host, verdict)
+        assert run(small.verify("s2", BASE + "/tree.png")).reasons == ["image larger than 100 bytes"]
+    finally:
+        run(verifier.close())
+        run(small.close())
+
+def test_hash_index_finds_near_duplicates_only():
+    index = ImageHashIndex()
+    original = dhash(_picture(1))
+    index.add(original, "a")
+    assert index.find(original ^ 0b101) == "a" and index.find(original ^ (1 << 63 | 1 << 40 | 1 << 17)) == "a"
+    assert index.find(original ^ 0b1111) is None  # four bits apart
+    assert index.find(original, exclude="a") is None
+    assert (dhash(_picture(1)) ^ dhash(_picture(3))).bit_count() > 10
+
+def test_pool_is_bounded():
+    async def scenario():
+        release, running, peak = asyncio.Event(), set(), [0]
+
+        async def handle(item):
+            running.add(item)
+            peak[0] = max(peak[0], len(running))
+            await release.wait()
+            running.discard(item)
+            return "approved"
+
+        pool = VerificationPool(handle, workers=2, queue_size=3)
+        accepted = [pool.submit(f"s{i}") for i in range(5)]
+        assert accepted == [True, True, True, False, False] and pool.submit("s0")
+        await asyncio.sleep(0.01)
+        assert len(running) == 2 and len(pool) == 1 and pool.submit("s5")
+        release.set()
+        await pool.join()
+        assert peak[0] == 2 and pool.outcomes["approved"] == 4
+    run(scenario())
+
+def test_auto_quest_submissions_are_reviewed_in_the_background():
+    async def scenario():
+        if not server.QUESTS:
+            await server._startup()
+        verifier, server.VERIFIER = server.VERIFIER, _verifier()
+        server.PROOF_IMAGES = server.VERIFIER.checks[-1].index
+        server._register_quest(Quest(quest_id="auto_cleanup", title="🧹 Beach cleanup", description="Photo of the bags you filled",
+                                     xp_reward=5, quest_type="climate", verification_method="auto",
+                                     created_by="admin", created_at=server._now()))
+        try:
+            first = await server.submit_proof.fn(puch_user_id="verify_a", quest_id="auto_cleanup", proof_url=BASE + "/cleanup.png")
+            await server.VERIFICATION_POOL.join()  # so the copy below is the one that gets flagged
+            second = await server.submit_proof.fn(puch_user_id="verify_b", quest_id="auto_cleanup", proof_url=BASE + "/cleanup-again.png")
+            third = await server.submit_proof.fn(puch_user_id="verify_c", quest_id="auto_cleanup", proof_url=BASE + "/notes.txt")
+            assert all("checked automatically" in result[0].text for result in (first, second, third))
+            await server.VERIFICATION_POOL.join()
+
+            ids = [result[0].text.split("`")[1] for result in (first, second, third)]
+            approved, duplicate, wrong_type = [await server._get_submission(sid) for sid in ids]
+            assert approved.status == "approved" and approved.reviewer_id == server.AUTO_REVIEWER_ID and approved.proof_hash
+            assert "auto_cleanup" in (await server._get_user("verify_a")).quests_completed
+            assert duplicate.status == "pending" and f"same picture as submission {ids[0]}" in duplicate.notes
+            assert wrong_type.status == "pending" and "content type" in wrong_type.notes
+            assert ids[0] not in server.PENDING_QUEUE and ids[1] in server.PENDING_QUEUE and ids[2] in server.PENDING_QUEUE
+
+            # A flagged proof is left for a human reviewer and is not checked again
+            assert await server._verify_submission(ids[1]) == "skipped"
+            manual = await server.submit_proof.fn(puch_user_id="verify_a", quest_id="plant_tree", proof_url=BASE + "/bike.png")
+            assert "A reviewer will validate it soon" in manual[0].text
+        finally:
+            await server.VERIFIER.close()
+            server.VERIFIER = verifier
+    run(scenario())
+
+def test_repeat_proofs_go_to_a_reviewer():
+    async def scenario():
+        if not server.QUESTS:
+            await server._startup()
+        verifier, server.VERIFIER = server.VERIFIER, _verifier()
+        server._register_quest(Quest(quest_id="auto_article", title="✍️ Write about it", description="Link your blog post",
+                                     xp_reward=3, quest_type="social", verification_method="auto",
+                                     created_by="admin", created_at=server._now()))
+        try:
+            async def submit(user_id: str) -> server.Submission:
+                result = await server.submit_proof.fn(puch_user_id=user_id, quest_id="auto_article", proof_url=BASE + "/article")
+                await server.VERIFICATION_POOL.join()
+                return await server._get_submission(result[0].text.split("`")[1])
+
+            assert (await submit("repeat_a")).status == "approved"
+            xp = (await server._get_user("repeat_a")).total_xp
+            again = [await submit("repeat_a") for _ in range(3)]  # pages are never hashed, so only these rules catch it
+            assert all(s.status == "pending" and "quest already completed" in s.notes for s in again)
+
+            # A link a reviewer already rejected is not approved just by sending it again
+            rejected = server.Submission(submission_id="repeat_b_first", quest_id="auto_article", user_id="repeat_b",
+                                         proof_url=BASE + "/article", status="rejected", reviewer_id="admin",
+                                         created_at=server._now(), reviewed_at=server._now())
+            server.SUBMISSIONS[rejected.submission_id] = rejected
+            server._index_submission(rejected)
+            server._persist("submissions", rejected, new=True)
+            resent = await submit("repeat_b")
+            assert resent.status == "pending" and "same proof link as submission repeat_b_first" in resent.notes
+
+            # Approving a repeat by hand doesn't pay the quest twice
+            review = await server.review_submission.fn(reviewer_id="admin", submission_id=again[0].submission_id, approve=True)
+            assert "Awarded" not in review[0].text and (await server._get_user("repeat_a")).total_xp == xp
+        finally:
+            await server.VERIFIER.close()
+            server.VERIFIER = verifier
+    run(scenario())
+
+if __name__ == "__main__":
+    print("🧪 Testing proof verification...\n")
+    for test in (test_checks_approve_good_proofs_and_flag_bad_ones, test_private_addresses_and_large_images_are_refused,
+                 test_hash_index_finds_near_duplicates_only, test_pool_is_bounded,
+                 test_auto_quest_submissions_are_reviewed_in_the_background, test_repeat_proofs_go_to_a_reviewer):
+        test()
+        print(f"✅ {test.__name__}")
+    run(server._shutdown())
+    _STUB.shutdown()
+    print("\n🎉 Auto-quest proofs are verified off the request path!")